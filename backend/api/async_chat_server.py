@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Asyncio chat server: the chat endpoints of chat_server.py on an event loop
+
+Each Gemini call takes seconds. chat_server.py pins a Flask worker thread
+for the whole round-trip. Here the calls go through an AsyncGeminiClient on
+one event loop with a pool of keep-alive connections, so a single worker
+process holds many conversations at once. Doesn't require TensorFlow.
+
+Environment:
+    GEMINI_API_KEY           API key (fallback responses without it)
+    GEMINI_MODEL             Model name (default: models/gemini-2.0-flash-lite)
+    GEMINI_API_BASE_URL      API root, e.g. http://127.0.0.1:8089 for
+                             benchmarks/gemini_stub_server.py
+    GEMINI_MAX_CONNECTIONS   Pooled connections to the API (default: 32)
+    GEMINI_TIMEOUT           Seconds allowed per Gemini call (default: 60)
+"""
+import os
+import sys
+import time
+from collections import deque
+
+from aiohttp import web
+
+# Load environment variables from .env file (repository root first, then backend/)
+try:
+    from dotenv import load_dotenv
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for env_path in (os.path.join(os.path.dirname(backend_dir), '.env'), os.path.join(backend_dir, '.env')):
+        if os.path.exists(env_path):
+            load_dotenv(env_path)
+            print(f"✓ Loaded .env from: {env_path}")
+            break
+except ImportError:
+    print("Warning: python-dotenv not installed")
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.gemini_handler import GeminiHandler
+from utils.gemini_async_client import AsyncGeminiClient, DEFAULT_BASE_URL, DEFAULT_MODEL
+
+# Same limits as chat_server.py
+MAX_QUERY_LENGTH = 32000
+CHAT_RATE_LIMIT = int(os.environ.get('CHAT_RATE_LIMIT', 20))  # per client per minute
+
+BACKEND_API_KEY = os.environ.get('BACKEND_API_KEY', '')
+REQUIRE_AUTH = os.environ.get('REQUIRE_AUTH', 'false').lower() == 'true'
+ALLOWED_ORIGINS = os.environ.get('ALLOWED_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(',')
+
+
+class RateLimiter:
+    """Sliding one-minute window of requests per client address"""
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(self, limit_per_minute):
+        self.limit = limit_per_minute
+        self._requests = {}
+        self._last_prune = time.monotonic()
+
+    def allow(self, client):
+        now = time.monotonic()
+        if now - self._last_prune > self.WINDOW_SECONDS:
+            self._prune(now)
+
+        window = self._requests.get(client)
+        if window is None:
+            window = self._requests[client] = deque()
+        while window and now - window[0] > self.WINDOW_SECONDS:
+            window.popleft()
+        if len(window) >= self.limit:
+            return False
+        window.append(now)
+        return True
+
+    def _prune(self, now):
+        # Forget clients without a request in the last window, so addresses
+        # that never come back don't keep their deques forever
+        self._requests = {
+            client: window for client, window in self._requests.items()
+            if window and now - window[-1] <= self.WINDOW_SECONDS
+        }
+        self._last_prune = now
+
+
+def create_app(gemini_handler, gemini_client):
+    """
+    Build the chat application
+
+    Args:
+        gemini_handler: GeminiHandler holding the conversation context
+        gemini_client: AsyncGeminiClient, or None for fallback responses
+
+    Returns:
+        aiohttp web.Application (closes the client's connections on cleanup)
+    """
+    rate_limiter = RateLimiter(CHAT_RATE_LIMIT)
+
+    @web.middleware
+    async def cors_middleware(request, handler):
+        if request.method == 'OPTIONS':
+            response = web.Response()
+        else:
+            response = await handler(request)
+        origin = request.headers.get('Origin')
+        if origin in ALLOWED_ORIGINS:
+            response.headers['Access-Control-Allow-Origin'] = origin
+            response.headers['Access-Control-Allow-Credentials'] = 'true'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, X-API-Key, Authorization'
+        return response
+
+    def unauthorized(request):
+        """Check the API key the same way require_api_key does"""
+        if REQUIRE_AUTH and BACKEND_API_KEY:
+            api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
+            if not api_key or api_key != BACKEND_API_KEY:
+                return web.json_response({'error': 'Unauthorized. Invalid or missing API key.'}, status=401)
+        return None
+
+    async def health_check(request):
+        """Health check endpoint"""
+        return web.json_response({
+            'status': 'healthy',
+            'gemini_api': 'initialized' if gemini_client is not None else 'not_initialized',
+            'version': '1.0.0-chat-async'
+        })
+
+    async def chat(request):
+        """Handle a chat query using the Gemini API with context awareness"""
+        error = unauthorized(request)
+        if error is not None:
+            return error
+        if not rate_limiter.allow(request.remote):
+            return web.json_response({'error': 'Rate limit exceeded. Please try again later.'}, status=429)
+
+        try:
+            payload = await request.json()
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict) or 'query' not in payload:
+            return web.json_response({'error': 'No query provided'}, status=400)
+
+        user_query = payload['query']
+        if not isinstance(user_query, str) or len(user_query.strip()) == 0:
+            return web.json_response({'error': 'Query is empty'}, status=400)
+        if len(user_query) > MAX_QUERY_LENGTH:
+            return web.json_response(
+                {'error': f'Query exceeds maximum length of {MAX_QUERY_LENGTH} characters'}, status=400)
+
+        response = await gemini_handler.process_query_async(user_query, gemini_client)
+        return web.json_response({'response': response})
+
+    async def clear_context(request):
+        """Clear the conversation context"""
+        error = unauthorized(request)
+        if error is not None:
+            return error
+        gemini_handler.context_manager.clear_context()
+        return web.json_response({'message': 'Context cleared successfully'})
+
+    async def stats(request):
+        """Gemini client statistics (calls in flight, pooled connections, latency)"""
+        return web.json_response({
+            'gemini_client': gemini_client.get_stats() if gemini_client is not None else {'enabled': False}
+        })
+
+    async def close_client(app):
+        if gemini_client is not None:
+            await gemini_client.close()
+
+    app = web.Application(middlewares=[cors_middleware])
+    app.router.add_get('/health', health_check)
+    app.router.add_post('/chat', chat)
+    app.router.add_post('/clear-context', clear_context)
+    app.router.add_get('/stats', stats)
+    app.on_cleanup.append(close_client)
+    return app
+
+
+def create_gemini_client():
+    """AsyncGeminiClient configured from the environment, or None without an API key"""
+    api_key = os.environ.get('GEMINI_API_KEY', '')
+    if not api_key:
+        print("WARNING: GEMINI_API_KEY not found! Chat will use fallback responses.")
+        return None
+    return AsyncGeminiClient(
+        api_key,
+        model=os.environ.get('GEMINI_MODEL', DEFAULT_MODEL),
+        base_url=os.environ.get('GEMINI_API_BASE_URL', DEFAULT_BASE_URL),
+        max_connections=int(os.environ.get('GEMINI_MAX_CONNECTIONS', 32)),
+        timeout=float(os.environ.get('GEMINI_TIMEOUT', 60))
+    )
+
+
+if __name__ == '__main__':
+    host = os.environ.get('HOST', '127.0.0.1')
+    port = int(os.environ.get('PORT', 5002))
+
+    gemini_client = create_gemini_client()
+    # The handler only builds prompts and keeps the context here; the calls
+    # go through gemini_client
+    gemini_handler = GeminiHandler(init_model=False)
+
+    print("\n" + "=" * 60)
+    print("🚀 Starting Async Chat Server")
+    print(f"📍 Server: http://{host}:{port}")
+    print(f"💬 Chat endpoint: http://{host}:{port}/chat")
+    if gemini_client is not None:
+        print(f"🔗 Gemini: {gemini_client.endpoint} ({gemini_client.max_connections} pooled connections)")
+    print("=" * 60 + "\n")
+
+    web.run_app(create_app(gemini_handler, gemini_client), host=host, port=port, print=None)
@@ -1,8 +1,12 @@
 import os
 import sys
-import base64
+import binascii
 import re
-from functools import wraps
+import threading
+import time
+from functools import wraps, partial
+import numpy as np
+from PIL import Image
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_limiter import Limiter
@@ -50,8 +54,23 @@ except Exception as e:
 # Add parent directory to path so we can import our modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.image_preprocessor import decode_and_load_base64_image
+from utils.image_preprocessor import (
+    decode_base64_payload,
+    sniff_image_format,
+    read_image_header,
+    load_image_pixels,
+    load_image_tiles,
+    perceptual_hash,
+    TTA_AUGMENTATIONS
+)
 from utils.model_loader import ModelLoader
+from utils.batch_scheduler import BatchScheduler
+from utils.decode_pool import DecodePool, DecodeQueueFullError
+from utils.model_registry import ModelRegistry, ModelVersionError
+from utils.prediction_cache import PredictionCache
+from utils.near_duplicate_index import NearDuplicateIndex
+from utils.image_quality import ImageQualityGate, ImageQualityError
+from utils.process_memory import read_memory_usage
 from utils.deficiency_info import DeficiencyInfoProvider
 from utils.gemini_handler import GeminiHandler
 
@@ -69,10 +88,175 @@ limiter = Limiter(
     storage_uri="memory://"
 )
 
-# Initialize components
-model_loader = ModelLoader(model_dir='../models_runtime')
+# Performance: Micro-batch concurrent /predict requests into one forward pass
+BATCHING_ENABLED = os.environ.get('BATCHING_ENABLED', 'true').lower() == 'true'
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 8))
+
+# Performance: Warm up the batch sizes we actually serve at load time
+WARMUP_BATCH_SIZES = [
+    int(size) for size in
+    os.environ.get('WARMUP_BATCH_SIZES', f"1,{BATCH_MAX_SIZE}" if BATCHING_ENABLED else "1").split(',')
+    if size.strip()
+]
+
+# Performance: Forward inference to a shared model server (run_model_server.py)
+# instead of loading TensorFlow and the model in every worker
+MODEL_SERVER_ADDRESS = os.environ.get('MODEL_SERVER_ADDRESS') or None
+MODEL_SERVER_AUTHKEY = os.environ.get('MODEL_SERVER_AUTHKEY', '').encode() or None
+
+def create_model_loader(class_mapping_file='class_mapping.txt'):
+    """Create a ModelLoader configured from the environment"""
+    return ModelLoader(
+        model_dir='../models_runtime',
+        interpreter_pool_size=int(os.environ.get('TFLITE_POOL_SIZE', 2)),
+        interpreter_num_threads=int(os.environ.get('TFLITE_NUM_THREADS', 1)),
+        pool_wait_timeout=float(os.environ.get('TFLITE_POOL_TIMEOUT', 10)),
+        inference_mode=os.environ.get('KERAS_INFERENCE_MODE', 'function'),
+        warmup_batch_sizes=WARMUP_BATCH_SIZES,
+        class_mapping_file=class_mapping_file,
+        model_server_address=MODEL_SERVER_ADDRESS,
+        model_server_authkey=MODEL_SERVER_AUTHKEY,
+        cascade_model_file=os.environ.get('CASCADE_MODEL_FILE') or None,
+        cascade_class_mapping_file=os.environ.get('CASCADE_CLASS_MAPPING_FILE', 'mobile_class_mapping.txt'),
+        cascade_confidence_threshold=float(os.environ.get('CASCADE_CONFIDENCE_THRESHOLD', 0.85)),
+        cascade_margin_threshold=float(os.environ.get('CASCADE_MARGIN_THRESHOLD', 0.0)),
+        runtime=os.environ.get('INFERENCE_RUNTIME', 'auto'),
+        onnx_num_threads=int(os.environ.get('ONNX_NUM_THREADS', 1)),
+        tflite_use_mmap=os.environ.get('TFLITE_MMAP', 'true').lower() == 'true'
+    )
+
+def create_batch_scheduler(loader):
+    """Create a BatchScheduler in front of a loaded model"""
+    return BatchScheduler(
+        loader,
+        max_batch_size=BATCH_MAX_SIZE,
+        max_wait_ms=float(os.environ.get('BATCH_MAX_WAIT_MS', 5)),
+        # Formed batches run in parallel on the pooled interpreters; more
+        # workers than interpreters would only wait for one
+        num_workers=min(int(os.environ.get('BATCH_WORKERS', 4)), loader.interpreter_pool_size)
+    )
+
+# Initialize components. Models live in a registry so new versions can be
+# loaded, warmed up and swapped in without restarting the server.
+model_registry = ModelRegistry(
+    create_model_loader,
+    scheduler_factory=create_batch_scheduler if BATCHING_ENABLED else None,
+    drain_timeout=float(os.environ.get('MODEL_DRAIN_TIMEOUT', 30))
+)
 deficiency_info_provider = DeficiencyInfoProvider()
 
+# Model served at startup. MODEL_FILE defaults to the h5 model with a TFLite fallback.
+DEFAULT_MODEL_VERSION = os.environ.get('MODEL_VERSION', 'default')
+DEFAULT_MODEL_FILE = os.environ.get('MODEL_FILE') or None
+DEFAULT_CLASS_MAPPING_FILE = os.environ.get('MODEL_CLASS_MAPPING_FILE', 'class_mapping.txt')
+
+# Model lifecycle: the server only reports ready once the model is loaded
+# and a warmup inference has succeeded
+model_state = {
+    'status': 'not_started',  # not_started -> loading -> ready | failed
+    'ready': False,
+    'load_ms': None,
+    'warmup_ms': None,
+    'error': None
+}
+_model_init_lock = threading.Lock()
+
+def initialize_model():
+    """Load the model, run a warmup inference and flip the readiness flag"""
+    with _model_init_lock:
+        if model_state['status'] != 'not_started':
+            return model_state['ready']
+        model_state['status'] = 'loading'
+    
+    started = time.perf_counter()
+    try:
+        entry = model_registry.load_version(
+            DEFAULT_MODEL_VERSION,
+            model_path=DEFAULT_MODEL_FILE,
+            wait=True,
+            class_mapping_file=DEFAULT_CLASS_MAPPING_FILE
+        )
+        if entry.state != 'ready':
+            raise RuntimeError(entry.error or "No model could be loaded")
+        
+        model_state['load_ms'] = entry.loader.load_time_ms
+        model_state['warmup_ms'] = sum(entry.loader.warmup_times.values())
+        model_state['status'] = 'ready'
+        model_state['ready'] = True
+        print(f"Model ready in {(time.perf_counter() - started):.1f}s "
+              f"(load {model_state['load_ms']:.0f} ms, warmup {model_state['warmup_ms']:.0f} ms)")
+    except Exception as e:
+        model_state['status'] = 'failed'
+        model_state['error'] = str(e)
+        print(f"Warning: {e}. Server will start but predictions will fail.")
+    
+    return model_state['ready']
+
+# Load the model at import time so WSGI servers (and `flask run`) serve with
+# a warm model. Loading runs in the background; /health/ready gates traffic.
+if os.environ.get('MODEL_EAGER_LOAD', 'true').lower() == 'true':
+    threading.Thread(target=initialize_model, name='model-init', daemon=True).start()
+
+# Performance: Cache predictions for re-uploaded photos, keyed by image content
+# and model version; concurrent identical uploads share one inference
+if os.environ.get('PREDICTION_CACHE_ENABLED', 'true').lower() == 'true':
+    prediction_cache = PredictionCache(
+        max_entries=int(os.environ.get('PREDICTION_CACHE_SIZE', 1024)),
+        ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+    )
+else:
+    prediction_cache = None
+
+# Performance: Reuse recent predictions for near-identical photos (re-compressed,
+# slightly cropped) matched by perceptual hash. Requests opt out with
+# "near_duplicate": false.
+if os.environ.get('NEAR_DUPLICATE_ENABLED', 'true').lower() == 'true':
+    near_duplicate_index = NearDuplicateIndex(
+        max_entries=int(os.environ.get('NEAR_DUPLICATE_SIZE', 512)),
+        max_distance=int(os.environ.get('NEAR_DUPLICATE_MAX_DISTANCE', 8)),
+        ttl_seconds=float(os.environ.get('NEAR_DUPLICATE_TTL', 600))
+    )
+else:
+    near_duplicate_index = None
+
+# Accuracy: Re-score low-confidence images with test-time augmentation (flips,
+# rotations and a center crop scored in one batched forward pass). Requests can
+# force it on or off with "tta": true / false.
+TTA_ENABLED = os.environ.get('TTA_ENABLED', 'true').lower() == 'true'
+TTA_CONFIDENCE_THRESHOLD = float(os.environ.get('TTA_CONFIDENCE_THRESHOLD', 0.6))
+
+# Accuracy: Opt-in tiled inference for high-resolution photos ("tiled": true).
+# The image is cut into overlapping model-input tiles that are scored in
+# batches and aggregated ("tile_aggregation": mean, max or vote), so small
+# leaf patterns are not lost to the downscale. The tile cap and batch size
+# bound the added latency.
+TILED_INFERENCE_ENABLED = os.environ.get('TILED_INFERENCE_ENABLED', 'true').lower() == 'true'
+TILE_MAX_COUNT = int(os.environ.get('TILE_MAX_COUNT', 16))
+TILE_OVERLAP = float(os.environ.get('TILE_OVERLAP', 0.25))
+TILE_BATCH_SIZE = int(os.environ.get('TILE_BATCH_SIZE', 8))
+TILE_AGGREGATION = os.environ.get('TILE_AGGREGATION', 'mean')
+
+# Performance: Flag blurry, badly exposed and non-leaf photos before the
+# forward pass with retake advice (checks on every second pixel of the
+# downscaled image take about 0.2 ms). Requests opt out with "quality_check": false.
+# The thresholds are not yet calibrated on the training images, so flagged
+# photos only get a warning unless QUALITY_GATE_ENFORCE=true; run
+# benchmarks/calibrate_quality_gate.py on a dataset before enforcing.
+if os.environ.get('QUALITY_GATE_ENABLED', 'true').lower() == 'true':
+    quality_gate = ImageQualityGate(
+        min_sharpness=float(os.environ.get('QUALITY_MIN_SHARPNESS', 150)),
+        min_brightness=float(os.environ.get('QUALITY_MIN_BRIGHTNESS', 40)),
+        max_brightness=float(os.environ.get('QUALITY_MAX_BRIGHTNESS', 225)),
+        max_clipped_fraction=float(os.environ.get('QUALITY_MAX_CLIPPED_FRACTION', 0.5)),
+        min_green_ratio=float(os.environ.get('QUALITY_MIN_GREEN_RATIO', 0.15)),
+        enforce=os.environ.get('QUALITY_GATE_ENFORCE', 'false').lower() == 'true'
+    )
+else:
+    quality_gate = None
+
+# Maximum number of images accepted by a single /predict-batch request
+MAX_BATCH_IMAGES = int(os.environ.get('MAX_BATCH_IMAGES', 200))
+
 # Initialize Gemini handler with explicit API key check
 print("=" * 60)
 print("Initializing Gemini Handler...")
@@ -109,31 +293,213 @@ def require_api_key(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def validate_base64_image(image_data: str):
-    """Validate base64 encoded image - returns (is_valid: bool, error_msg: str)"""
+def require_model_ready(f):
+    """Decorator to reject prediction requests until the model is ready"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not model_state['ready']:
+            return jsonify({
+                'error': 'Model is not ready. Please try again shortly.',
+                'status': model_state['status']
+            }), 503
+        return f(*args, **kwargs)
+    return decorated_function
+
+# Largest accepted image file, and the longest base64 payload that can
+# decode to it (plus room for a data URL prefix)
+MAX_IMAGE_BYTES = 10 * 1024 * 1024  # 10MB
+MAX_IMAGE_BASE64_LENGTH = 4 * -(-MAX_IMAGE_BYTES // 3) + 256
+IMAGE_SIZE_ERROR = f"Image size exceeds maximum allowed size of {MAX_IMAGE_BYTES / (1024*1024)}MB"
+
+# Security/Performance: Limits checked from the image header before any pixels
+# are decoded, so a small file with huge dimensions is rejected up front.
+# MPO photos from some phones carry a second (preview or stereo) frame; only
+# the first frame is used.
+MAX_IMAGE_PIXELS = int(os.environ.get('MAX_IMAGE_PIXELS', 50_000_000))
+MAX_IMAGE_FRAMES = int(os.environ.get('MAX_IMAGE_FRAMES', 2))
+# Pillow modes that convert cleanly to 8-bit RGB (16-bit and float grayscale don't)
+ACCEPTED_IMAGE_MODES = ('1', 'L', 'LA', 'P', 'PA', 'RGB', 'RGBA', 'CMYK')
+
+# Performance: Decode JPEGs at 1/2-1/8 scale in the DCT domain when they are
+# much larger than the model input, instead of decoding every pixel
+JPEG_DRAFT_DECODE = os.environ.get('JPEG_DRAFT_DECODE', 'true').lower() == 'true'
+
+# Performance: Decode and resize uploads on a pool of worker threads that feeds
+# the inference stage, so decoding overlaps with model compute. When the
+# bounded queue stays full, requests get a 503 instead of piling up.
+if os.environ.get('DECODE_POOL_ENABLED', 'true').lower() == 'true':
+    decode_pool = DecodePool(
+        num_workers=int(os.environ.get('DECODE_POOL_WORKERS', 2)),
+        max_queue_size=int(os.environ.get('DECODE_QUEUE_SIZE', 32)),
+        queue_timeout=float(os.environ.get('DECODE_QUEUE_TIMEOUT', 1))
+    )
+else:
+    decode_pool = None
+
+# Binary uploads: raw image bodies and room for multipart boundaries and form
+# fields around each file
+RAW_IMAGE_MIMETYPES = ('image/jpeg', 'image/png')
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+def check_image_bytes(image_bytes: bytes):
+    """Validate decoded image bytes - returns (image_bytes, image_format, error_msg)"""
+    if not image_bytes:
+        return None, None, "Image data is empty"
+    
+    if len(image_bytes) > MAX_IMAGE_BYTES:
+        return None, None, IMAGE_SIZE_ERROR
+    
+    # Check if it's a valid image format
+    image_format = sniff_image_format(image_bytes)
+    if image_format is None:
+        return None, None, "Invalid image format. Only JPEG and PNG are supported."
+    
+    error_msg = check_image_header(image_bytes, image_format)
+    if error_msg:
+        return None, None, error_msg
+    
+    return image_bytes, image_format, ""
+
+def check_image_header(image_bytes: bytes, image_format: str):
+    """Admission check on the image header, without decoding pixels - returns an error message or ''"""
+    try:
+        header = read_image_header(image_bytes, image_format)
+    except Image.DecompressionBombError:
+        # Pillow refuses to even open images far beyond its own pixel limit
+        return f"Image dimensions exceed the maximum of {MAX_IMAGE_PIXELS} pixels"
+    except Exception:
+        return "Could not read image header"
+    
+    if header['width'] * header['height'] > MAX_IMAGE_PIXELS:
+        return (f"Image dimensions {header['width']}x{header['height']} exceed the maximum of "
+                f"{MAX_IMAGE_PIXELS} pixels")
+    if header['mode'] not in ACCEPTED_IMAGE_MODES:
+        return f"Unsupported image mode {header['mode']}"
+    if header['frames'] > MAX_IMAGE_FRAMES:
+        return f"Images with more than {MAX_IMAGE_FRAMES} frames are not supported"
+    return ""
+
+def decode_image_payload(image_data: str):
+    """
+    Decode and validate a base64 encoded image in a single pass
+    
+    Returns:
+        Tuple of (image_bytes, image_format, error_msg); image_bytes is None
+        when the payload is invalid
+    """
+    if not isinstance(image_data, str):
+        return None, None, "Image data must be a base64 string"
     if not image_data:
-        return False, "Image data is empty"
+        return None, None, "Image data is empty"
+    
+    # Reject oversized payloads before allocating the decoded copy
+    if len(image_data) > MAX_IMAGE_BASE64_LENGTH:
+        return None, None, IMAGE_SIZE_ERROR
     
-    # Check if it's valid base64
     try:
-        # Remove data URL prefix if present
-        if ',' in image_data:
-            image_data = image_data.split(',')[1]
-        
-        decoded = base64.b64decode(image_data, validate=True)
-        
-        # Check size (max 10MB)
-        max_size = 10 * 1024 * 1024  # 10MB
-        if len(decoded) > max_size:
-            return False, f"Image size exceeds maximum allowed size of {max_size / (1024*1024)}MB"
-        
-        # Check if it's a valid image format
-        if not decoded.startswith(b'\xff\xd8') and not decoded.startswith(b'\x89PNG'):
-            return False, "Invalid image format. Only JPEG and PNG are supported."
-        
-        return True, ""
-    except Exception as e:
-        return False, f"Invalid base64 encoding: {str(e)}"
+        image_bytes = decode_base64_payload(image_data)
+    except (binascii.Error, ValueError) as e:
+        return None, None, f"Invalid base64 encoding: {str(e)}"
+    
+    return check_image_bytes(image_bytes)
+
+def read_image_stream(stream, size=None):
+    """
+    Read an uploaded image file or raw body - returns (image_bytes, image_format, error_msg)
+    
+    Args:
+        stream: File-like object positioned at the start of the image
+        size: Number of bytes in the stream, if known (e.g. Content-Length)
+    """
+    if size is None and stream.seekable():
+        # Multipart files are spooled to a seekable buffer or temp file
+        start = stream.tell()
+        size = stream.seek(0, os.SEEK_END) - start
+        stream.seek(start)
+    # One bounded read straight into the buffer that is validated and
+    # decoded. Streams allocate the requested size up front, so ask for the
+    # actual size instead of the limit.
+    read_size = MAX_IMAGE_BYTES + 1 if size is None else min(size, MAX_IMAGE_BYTES + 1)
+    return check_image_bytes(stream.read(read_size))
+
+def get_request_options():
+    """
+    Get the options of a prediction request
+    
+    JSON requests carry options next to the image, multipart uploads as form
+    fields and raw image bodies in the query string.
+    """
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        return payload if isinstance(payload, dict) else {}
+    if request.mimetype == 'multipart/form-data':
+        return request.form
+    return request.args
+
+def parse_bool_option(value):
+    """Turn 'true'/'false' form and query values into booleans (JSON is used as is)"""
+    if isinstance(value, str) and not request.is_json:
+        return {'true': True, '1': True, 'false': False, '0': False}.get(value.lower(), value)
+    return value
+
+def upload_too_large(max_images=1):
+    """Check the declared size of a binary upload before the body is parsed"""
+    content_length = request.content_length
+    return content_length is not None and content_length > max_images * (MAX_IMAGE_BYTES + MULTIPART_OVERHEAD_BYTES)
+
+def read_request_image():
+    """
+    Read the image of a /predict request
+    
+    Accepts JSON with a base64 'image', multipart/form-data with an 'image'
+    file, or a raw image/jpeg or image/png body. Binary uploads skip the
+    base64 and JSON parsing entirely.
+    
+    Returns:
+        Tuple of (image_bytes, image_format, error_msg)
+    """
+    if request.is_json:
+        payload = get_request_options()
+        if 'image' not in payload:
+            return None, None, "No image provided"
+        return decode_image_payload(payload['image'])
+    
+    if request.mimetype == 'multipart/form-data':
+        if upload_too_large():
+            return None, None, IMAGE_SIZE_ERROR
+        upload = request.files.get('image')
+        if upload is None:
+            return None, None, "No image provided"
+        return read_image_stream(upload.stream)
+    
+    if request.mimetype in RAW_IMAGE_MIMETYPES:
+        if upload_too_large():
+            return None, None, IMAGE_SIZE_ERROR
+        return read_image_stream(request.stream, request.content_length)
+    
+    return None, None, "No image provided"
+
+def get_request_images():
+    """
+    Get the images of a /predict-batch request without decoding them
+    
+    Accepts JSON with a list of base64 'images', or multipart/form-data with
+    one file per image under 'images'.
+    
+    Returns:
+        Tuple of (images, read_image); read_image turns one item into
+        (image_bytes, image_format, error_msg). images is None if the
+        request has no image list.
+    """
+    if request.is_json:
+        images = get_request_options().get('images')
+        return (images if isinstance(images, list) else None), decode_image_payload
+    
+    if request.mimetype == 'multipart/form-data':
+        images = request.files.getlist('images')
+        return (images or None), lambda upload: read_image_stream(upload.stream)
+    
+    return None, None
 
 def validate_query(query: str):
     """Validate user query input - returns (is_valid: bool, error_msg: str)"""
@@ -149,6 +515,138 @@ def validate_query(query: str):
     
     return True, ""
 
+def start_decode(image_bytes, image_format, decode_fn=load_image_pixels, **kwargs):
+    """
+    Start decoding one upload into uint8 model-input pixels
+    
+    Args:
+        image_bytes: Validated image file bytes
+        image_format: Pillow format name from the header
+        decode_fn: Decoder, load_image_pixels or load_image_tiles
+        **kwargs: Extra arguments for decode_fn
+        
+    Returns:
+        Callable returning the decoded result; with the decode pool the
+        decode is already queued for a worker
+    """
+    if decode_pool is None:
+        return partial(decode_fn, image_bytes, image_format=image_format, draft=JPEG_DRAFT_DECODE, **kwargs)
+    return decode_pool.enqueue(decode_fn, image_bytes, image_format=image_format,
+                               draft=JPEG_DRAFT_DECODE, **kwargs).wait
+
+def use_quality_gate(options):
+    """Whether the quality gate applies to a request (on unless "quality_check": false)"""
+    return quality_gate is not None and parse_bool_option(options.get('quality_check', True)) is not False
+
+def retake_response(report):
+    """422 response asking the client to retake a photo that failed the quality gate"""
+    return jsonify({
+        'error': 'Image quality is too low for a reliable diagnosis. Please retake the photo.',
+        'retake': True,
+        'issues': report['issues'],
+        'advice': report['advice'],
+        'quality': report['metrics']
+    }), 422
+
+def quality_warning(report):
+    """Warning added to a diagnosis of a photo the (non-enforcing) quality gate flagged"""
+    return {
+        'issues': report['issues'],
+        'advice': report['advice'],
+        'quality': report['metrics']
+    }
+
+def build_prediction_result(predictions, served_by):
+    """Build the JSON-serializable prediction result for one image"""
+    model_loader = served_by.loader
+    
+    # Get the predicted class
+    deficiency_type, confidence = model_loader.get_prediction_label(predictions)
+    
+    # Get detailed information
+    info = deficiency_info_provider.get_deficiency_info(deficiency_type)
+    
+    # Get all class probabilities as a dictionary
+    probabilities = {
+        model_loader.class_mapping.get(i, f"Class {i}"): float(prob) 
+        for i, prob in enumerate(predictions)
+    }
+    
+    return {
+        'deficiency': deficiency_type,
+        'confidence': confidence,
+        'symptoms': info['symptoms'],
+        'treatment': info['treatment'],
+        'prevention': info['prevention'],
+        'probabilities': probabilities,
+        'model_version': served_by.version
+    }
+
+def apply_tta(served_by, processed_img, predictions, tta=None):
+    """
+    Re-score an image with test-time augmentation when requested or when the
+    plain prediction is not confident enough
+    
+    Args:
+        served_by: ModelVersion serving the request
+        processed_img: Image array of shape (1, H, W, 3), float32 or uint8 pixels
+        predictions: Probabilities from the plain forward pass
+        tta: True/False to force TTA on/off, None for automatic
+        
+    Returns:
+        Tuple of (final probabilities, TTA summary for the response)
+    """
+    _, base_confidence = served_by.loader.get_prediction_label(predictions)
+    if tta is None:
+        tta = TTA_ENABLED and base_confidence < TTA_CONFIDENCE_THRESHOLD
+        reason = 'low_confidence' if tta else None
+    else:
+        reason = 'requested' if tta else None
+    
+    if not tta:
+        return predictions, {'used': False, 'base_confidence': base_confidence}
+    
+    started = time.perf_counter()
+    tta_predictions = served_by.loader.predict_tta(processed_img)
+    return tta_predictions, {
+        'used': True,
+        'reason': reason,
+        'base_confidence': base_confidence,
+        'augmentations': len(TTA_AUGMENTATIONS),
+        'added_latency_ms': (time.perf_counter() - started) * 1000.0
+    }
+
+def run_tiled_inference(served_by, image_bytes, image_format, aggregation):
+    """
+    Score an image as overlapping tiles and aggregate the tile predictions
+    
+    Args:
+        served_by: ModelVersion serving the request
+        image_bytes: Validated image file bytes
+        image_format: Pillow format name from the header
+        aggregation: One of ModelLoader.TILE_AGGREGATIONS
+        
+    Returns:
+        Tuple of (aggregated probabilities, tile summary with a per-tile map
+        of top-1 classes and confidences)
+    """
+    tile_batch, (rows, cols) = start_decode(image_bytes, image_format, load_image_tiles,
+                                            max_tiles=TILE_MAX_COUNT, overlap=TILE_OVERLAP)()
+    
+    started = time.perf_counter()
+    predictions, tile_predictions = served_by.loader.predict_tiles(tile_batch, aggregation, TILE_BATCH_SIZE)
+    tile_labels = [served_by.loader.get_prediction_label(tile) for tile in tile_predictions]
+    return predictions, {
+        'used': True,
+        'grid': [rows, cols],
+        'count': len(tile_batch),
+        'aggregation': aggregation,
+        'map': [[label for label, _ in tile_labels[row * cols:(row + 1) * cols]] for row in range(rows)],
+        'confidence_map': [[confidence for _, confidence in tile_labels[row * cols:(row + 1) * cols]]
+                           for row in range(rows)],
+        'inference_ms': (time.perf_counter() - started) * 1000.0
+    }
+
 @app.errorhandler(Exception)
 def handle_error(e):
     """Generic error handler - don't expose internal errors"""
@@ -166,57 +664,221 @@ def handle_error(e):
 @app.route('/predict', methods=['POST'])
 @require_api_key
 @limiter.limit("10 per minute")
+@require_model_ready
 def predict_api():
     """Predict nutrient deficiency from image"""
-    if not request.json or 'image' not in request.json:
-        return jsonify({'error': 'No image provided'}), 400
-    
-    # Get the base64 encoded image
-    image_data = request.json['image']
-    
-    # Validate image
-    is_valid, error_msg = validate_base64_image(image_data)
-    if not is_valid:
+    # Decode once; the same bytes are validated, hashed for the cache and loaded
+    image_bytes, image_format, error_msg = read_request_image()
+    if image_bytes is None:
         return jsonify({'error': error_msg}), 400
     
+    # Requests may pin a specific model version
+    options = get_request_options()
+    model_version = options.get('model_version')
+    use_near_duplicate = (near_duplicate_index is not None
+                          and parse_bool_option(options.get('near_duplicate', True)) is not False)
+    check_quality = use_quality_gate(options)
+    # None means automatic: TTA only below the confidence threshold
+    tta = parse_bool_option(options.get('tta'))
+    if tta is not None and not isinstance(tta, bool):
+        return jsonify({'error': "'tta' must be a boolean"}), 400
+    tiled = parse_bool_option(options.get('tiled', False))
+    if not isinstance(tiled, bool):
+        return jsonify({'error': "'tiled' must be a boolean"}), 400
+    if tiled and not TILED_INFERENCE_ENABLED:
+        return jsonify({'error': 'Tiled inference is disabled on this server'}), 400
+    tile_aggregation = options.get('tile_aggregation', TILE_AGGREGATION)
+    if tiled and tile_aggregation not in ModelLoader.TILE_AGGREGATIONS:
+        return jsonify({'error': f"'tile_aggregation' must be one of {', '.join(ModelLoader.TILE_AGGREGATIONS)}"}), 400
+    
     try:
-        # Process the image
-        processed_img = decode_and_load_base64_image(image_data)
-        
-        # Make prediction
-        predictions = model_loader.predict(processed_img)
-        
-        # Get the predicted class
-        deficiency_type, confidence = model_loader.get_prediction_label(predictions)
-        
-        # Get detailed information
-        info = deficiency_info_provider.get_deficiency_info(deficiency_type)
-        
-        # Get all class probabilities as a dictionary
-        probabilities = {
-            model_loader.class_mapping.get(i, f"Class {i}"): float(prob) 
-            for i, prob in enumerate(predictions)
-        }
-        
-        # Prepare the result
-        result = {
-            'deficiency': deficiency_type,
-            'confidence': confidence,
-            'symptoms': info['symptoms'],
-            'treatment': info['treatment'],
-            'prevention': info['prevention'],
-            'probabilities': probabilities
-        }
+        with model_registry.acquire(model_version) as served_by:
+            near_duplicate = {}
+            # Results are keyed by this load of the model version. Forced TTA
+            # on/off and tiling can give a different answer than the automatic
+            # mode, so their results are cached and indexed apart
+            if tiled:
+                prediction_version = f"{served_by.cache_key}:tiles={tile_aggregation}"
+            else:
+                prediction_version = served_by.cache_key if tta is None else f"{served_by.cache_key}:tta={tta}"
+                # Results of requests that skipped the quality gate must not
+                # answer requests that go through it
+                if quality_gate is not None and not check_quality:
+                    prediction_version += ':unchecked'
+            
+            def run_inference():
+                if tiled:
+                    # Tiles replace TTA and skip the quality gate and the
+                    # near-duplicate index, which both work on the downscaled image
+                    return (*run_tiled_inference(served_by, image_bytes, image_format, tile_aggregation), None)
+                
+                # Decode on the decode pool; the uint8 pixels are cast straight
+                # into the model's input buffer
+                processed_img = start_decode(image_bytes, image_format)()
+                
+                # Rejections raise, so they are never cached; warnings are
+                # cached with the prediction
+                warning = None
+                if check_quality:
+                    report = quality_gate.check(processed_img)
+                    if not report['passed']:
+                        if quality_gate.enforce:
+                            raise ImageQualityError(report)
+                        warning = quality_warning(report)
+                
+                if use_near_duplicate:
+                    image_hash = perceptual_hash(processed_img)
+                    match = near_duplicate_index.lookup(image_hash, prediction_version)
+                    if match is not None:
+                        near_duplicate['distance'] = match[1]
+                        return (*match[0], warning)
+                
+                # Make prediction
+                predictions = served_by.predict(processed_img)
+                predictions, tta_info = apply_tta(served_by, processed_img, predictions, tta)
+                if use_near_duplicate:
+                    near_duplicate_index.add(image_hash, prediction_version, (predictions, tta_info))
+                return predictions, tta_info, warning
+            
+            if prediction_cache is not None:
+                cache_key = PredictionCache.make_key(image_bytes, prediction_version)
+                # A near duplicate's answer belongs to another photo, so it is
+                # not cached under these exact bytes
+                (predictions, details, warning), cache_status = prediction_cache.get_or_compute(
+                    cache_key, run_inference, should_store=lambda _: not near_duplicate)
+            else:
+                (predictions, details, warning), cache_status = run_inference(), 'disabled'
+            
+            # Prepare the result
+            result = build_prediction_result(predictions, served_by)
+            result['tiles' if tiled else 'tta'] = details
+            result['cache'] = 'near_duplicate' if near_duplicate else cache_status
+            if near_duplicate:
+                result['near_duplicate_distance'] = near_duplicate['distance']
+            if warning is not None:
+                result['quality_warning'] = warning
         
         # Update Gemini handler with this prediction
         gemini_handler.update_with_prediction(result)
         
         return jsonify(result)
     
+    except ImageQualityError as e:
+        return retake_response(e.report)
+    except ModelVersionError as e:
+        return jsonify({'error': str(e)}), 409
+    except DecodeQueueFullError as e:
+        return jsonify({'error': f"Server is busy: {e}"}), 503
     except Exception as e:
         app.logger.error(f"Error in predict_api: {str(e)}", exc_info=True)
         raise  # Let the error handler deal with it
 
+@app.route('/predict-batch', methods=['POST'])
+@require_api_key
+@limiter.limit("10 per minute")
+@require_model_ready
+def predict_batch_api():
+    """Predict nutrient deficiencies for many images in one forward pass"""
+    if not request.is_json and upload_too_large(MAX_BATCH_IMAGES):
+        return jsonify({'error': IMAGE_SIZE_ERROR}), 400
+    
+    images, read_image = get_request_images()
+    if images is None:
+        return jsonify({'error': 'No images provided'}), 400
+    
+    if not images:
+        return jsonify({'error': 'Image list is empty'}), 400
+    if len(images) > MAX_BATCH_IMAGES:
+        return jsonify({'error': f"Too many images. Maximum is {MAX_BATCH_IMAGES} per request"}), 400
+    
+    options = get_request_options()
+    model_version = options.get('model_version')
+    check_quality = use_quality_gate(options)
+    
+    try:
+        # Record failures per item instead of rejecting the whole batch
+        results = [None] * len(images)
+        uploads = []
+        for i, image_data in enumerate(images):
+            image_bytes, image_format, error_msg = read_image(image_data)
+            if image_bytes is None:
+                results[i] = {'index': i, 'error': error_msg}
+                continue
+            uploads.append((i, image_bytes, image_format))
+        
+        # Each image is decoded straight into its row of one uint8 batch (the
+        # decoders resize to the 224x224 model input)
+        img_batch = np.empty((len(uploads), 224, 224, 3), dtype=np.uint8)
+        
+        # Decode in parallel on the decode pool, queuing at most a queue's
+        # worth of images at a time so a large batch cannot overflow it
+        chunk_size = decode_pool.max_queue_size if decode_pool is not None else max(len(uploads), 1)
+        batch_slots = []
+        batch_indices = []
+        warnings = {}
+        pending = list(enumerate(uploads))
+        while pending:
+            decodes = []
+            for slot, (i, image_bytes, image_format) in pending[:chunk_size]:
+                try:
+                    decodes.append((slot, i, start_decode(image_bytes, image_format, out=img_batch[slot])))
+                except DecodeQueueFullError as e:
+                    # Other requests hold the free slots; retry after this chunk
+                    queue_full = e
+                    break
+            if not decodes:
+                # The queue stayed full without any of our images in it
+                for _, (i, _, _) in pending:
+                    results[i] = {'index': i, 'error': f"Server is busy: {queue_full}"}
+                break
+            pending = pending[len(decodes):]
+            
+            for slot, i, decode in decodes:
+                try:
+                    img_pixels = decode()
+                except Exception as e:
+                    results[i] = {'index': i, 'error': f"Could not decode image: {str(e)}"}
+                    continue
+                if check_quality:
+                    report = quality_gate.check(img_pixels)
+                    if not report['passed'] and quality_gate.enforce:
+                        results[i] = {'index': i, 'error': 'Image quality is too low. Please retake the photo.',
+                                      'retake': True, 'issues': report['issues'], 'advice': report['advice']}
+                        continue
+                    if not report['passed']:
+                        warnings[i] = quality_warning(report)
+                batch_slots.append(slot)
+                batch_indices.append(i)
+        
+        if batch_indices:
+            # Close the rows of failed images up in place, so the single
+            # forward pass takes a view of the batch; the backend casts the
+            # pixels to the model's input dtype
+            for row, slot in enumerate(batch_slots):
+                if row != slot:
+                    img_batch[row] = img_batch[slot]
+            img_batch = img_batch[:len(batch_slots)]
+            with model_registry.acquire(model_version) as served_by:
+                predictions = served_by.predict_batch(img_batch)
+                
+                for row, i in enumerate(batch_indices):
+                    results[i] = {'index': i, **build_prediction_result(predictions[row], served_by)}
+                    if i in warnings:
+                        results[i]['quality_warning'] = warnings[i]
+        
+        return jsonify({
+            'results': results,
+            'count': len(results),
+            'succeeded': len(batch_indices),
+            'failed': len(results) - len(batch_indices)
+        })
+    
+    except ModelVersionError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        app.logger.error(f"Error in predict_batch_api: {str(e)}", exc_info=True)
+        raise
+
 @app.route('/chat', methods=['POST'])
 @require_api_key
 @limiter.limit("20 per minute")
@@ -272,13 +934,103 @@ def get_context():
 @app.route('/health', methods=['GET'])
 def health_check():
     """Check if the API is healthy and the model is loaded - Public endpoint"""
-    model_loaded = (model_loader.model is not None or model_loader.interpreter is not None)
+    model_loaded = model_registry.active_version is not None
     return jsonify({
         'status': 'healthy', 
         'model_loaded': model_loaded,
+        'ready': model_state['ready'],
         'version': '1.0.0'
     })
 
+@app.route('/health/live', methods=['GET'])
+def liveness_check():
+    """Check that the process is up and serving requests - Public endpoint"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Check that the model is loaded and warmed up - Public endpoint"""
+    payload = {
+        'status': model_state['status'],
+        'ready': model_state['ready'],
+        'load_ms': model_state['load_ms'],
+        'warmup_ms': model_state['warmup_ms']
+    }
+    if model_state['error'] and os.environ.get('FLASK_ENV', 'production') == 'development':
+        payload['error'] = model_state['error']
+    return jsonify(payload), (200 if model_state['ready'] else 503)
+
+@app.route('/stats', methods=['GET'])
+@require_api_key
+def get_stats():
+    """Get inference performance statistics"""
+    return jsonify({
+        'batching_enabled': BATCHING_ENABLED,
+        'models': model_registry.describe(),
+        'prediction_cache': prediction_cache.get_stats() if prediction_cache is not None else {'enabled': False},
+        'near_duplicate_index': near_duplicate_index.get_stats() if near_duplicate_index is not None else {'enabled': False},
+        'decode_pool': decode_pool.get_stats() if decode_pool is not None else {'enabled': False},
+        'quality_gate': quality_gate.get_stats() if quality_gate is not None else {'enabled': False},
+        'process': {'pid': os.getpid(), 'memory': read_memory_usage()}
+    })
+
+@app.route('/models', methods=['GET'])
+@require_api_key
+def list_models():
+    """List registered model versions and their serving state"""
+    return jsonify(model_registry.describe())
+
+@app.route('/models/load', methods=['POST'])
+@require_api_key
+@limiter.limit("5 per minute")
+def load_model_version():
+    """Load and warm up a model version in the background, optionally switching traffic to it"""
+    if not request.json or 'version' not in request.json or 'model_file' not in request.json:
+        return jsonify({'error': 'version and model_file are required'}), 400
+    
+    version = str(request.json['version'])
+    model_file = str(request.json['model_file'])
+    class_mapping_file = str(request.json.get('class_mapping_file', 'class_mapping.txt'))
+    activate = request.json.get('activate', True)
+    
+    if not isinstance(activate, bool):
+        return jsonify({'error': "'activate' must be a boolean"}), 400
+    
+    # Only allow plain file names inside the model directory
+    if not re.match(r'^[\w.-]{1,64}$', version):
+        return jsonify({'error': 'Invalid version name'}), 400
+    if not re.match(r'^[\w-]+\.(h5|keras|tflite|onnx)$', model_file):
+        return jsonify({'error': 'model_file must be a .h5, .keras, .tflite or .onnx file name'}), 400
+    if not re.match(r'^[\w-]+\.txt$', class_mapping_file):
+        return jsonify({'error': 'class_mapping_file must be a .txt file name'}), 400
+    
+    try:
+        entry = model_registry.load_version(
+            version,
+            model_path=model_file,
+            activate=activate,
+            class_mapping_file=class_mapping_file
+        )
+    except ModelVersionError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    return jsonify(entry.describe()), 202
+
+@app.route('/models/activate', methods=['POST'])
+@require_api_key
+@limiter.limit("5 per minute")
+def activate_model_version():
+    """Switch unpinned traffic to a ready model version and drain the previous one"""
+    if not request.json or 'version' not in request.json:
+        return jsonify({'error': 'version is required'}), 400
+    
+    try:
+        model_registry.activate(str(request.json['version']))
+    except ModelVersionError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    return jsonify(model_registry.describe())
+
 @app.route('/deficiencies', methods=['GET'])
 @require_api_key
 def get_deficiencies():
@@ -299,10 +1051,8 @@ def get_deficiency_details(deficiency_type):
     return jsonify(info)
 
 if __name__ == '__main__':
-    # Load the model
-    model_loaded = model_loader.load_model()
-    if not model_loaded:
-        print("Warning: No model loaded. Server will start but predictions will fail.")
+    # Load the model here if eager loading is disabled
+    initialize_model()
     
     # Security: Use 127.0.0.1 by default, allow override via env var
     host = os.environ.get('HOST', '127.0.0.1')
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Compare inference backends (Keras, TFLite, ONNX Runtime) on the same images
+
+Every model file is loaded through ModelLoader, so the numbers include the
+same backend code the API uses. Latency is measured per batch size, and every
+backend's predictions are compared with the first one (top-1 agreement).
+
+Usage:
+    python benchmarks/benchmark_backends.py --images-dir /path/to/leaf/photos \\
+        --model-files banana_nutrient_model.h5 banana_nutrient_model.tflite banana_nutrient_model.onnx
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.image_preprocessor import preprocess_pil_image_batch
+from utils.model_loader import ModelLoader
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def load_images(images_dir, num_images, img_size=224, seed=42):
+    """
+    Load and preprocess benchmark images
+
+    Args:
+        images_dir: Directory searched recursively for photos, or None for
+            synthetic images
+        num_images: Maximum number of images
+        img_size: Model input size
+
+    Returns:
+        Preprocessed image batch of shape (N, img_size, img_size, 3)
+    """
+    if images_dir is None:
+        print("No --images-dir given, using synthetic images (agreement numbers are not meaningful)")
+        rng = np.random.default_rng(seed)
+        return rng.uniform(0, 255, (num_images, img_size, img_size, 3)).astype(np.float32)
+
+    paths = []
+    for root, _, files in os.walk(images_dir):
+        paths.extend(os.path.join(root, name) for name in sorted(files) if name.lower().endswith(IMAGE_EXTENSIONS))
+    if not paths:
+        raise ValueError(f"No images found in {images_dir}")
+    paths = sorted(paths)[:num_images]
+    print(f"Loading {len(paths)} images from {images_dir}")
+    return preprocess_pil_image_batch([Image.open(path) for path in paths], (img_size, img_size))
+
+
+def predict_all(loader, images, batch_size):
+    """Predict every image in batches"""
+    return np.concatenate([
+        loader.predict_batch(images[start:start + batch_size])
+        for start in range(0, len(images), batch_size)
+    ])
+
+
+def benchmark_backend(loader, images, batch_sizes, num_runs):
+    """
+    Measure latency of one loaded model
+
+    Returns:
+        Dictionary mapping batch size to latency statistics in milliseconds
+    """
+    results = {}
+    for batch_size in batch_sizes:
+        batches = [images[start:start + batch_size] for start in range(0, len(images) - batch_size + 1, batch_size)]
+        if not batches:
+            continue
+        timings = []
+        for run in range(num_runs):
+            img_batch = batches[run % len(batches)]
+            started = time.perf_counter()
+            loader.predict_batch(img_batch)
+            timings.append((time.perf_counter() - started) * 1000.0)
+
+        mean_ms = float(np.mean(timings))
+        results[batch_size] = {
+            'mean_ms': mean_ms,
+            'p50_ms': float(np.percentile(timings, 50)),
+            'p95_ms': float(np.percentile(timings, 95)),
+            'ms_per_image': mean_ms / batch_size,
+            'images_per_second': batch_size * 1000.0 / mean_ms,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare inference backends on the same images')
+    parser.add_argument('--model-files', nargs='+',
+                        default=['banana_nutrient_model.h5', 'banana_nutrient_model.tflite',
+                                 'banana_nutrient_model.onnx'],
+                        help='Model files in models_runtime/ (backend chosen by extension)')
+    parser.add_argument('--images-dir', type=str, help='Directory of leaf photos (default: synthetic images)')
+    parser.add_argument('--num-images', type=int, default=64, help='Images to use (default: 64)')
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8], help='Batch sizes to measure')
+    parser.add_argument('--runs', type=int, default=50, help='Timed calls per batch size (default: 50)')
+    parser.add_argument('--num-threads', type=int, default=1, help='CPU threads for TFLite and ONNX Runtime')
+    parser.add_argument('--runtime', type=str, default='auto', choices=ModelLoader.RUNTIMES,
+                        help='TFLite interpreter preference (default: auto)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    images = load_images(args.images_dir, args.num_images)
+
+    report = {}
+    reference = None
+    for model_file in args.model_files:
+        print(f"\nBenchmarking {model_file}...")
+        loader = ModelLoader(
+            interpreter_pool_size=1,
+            interpreter_num_threads=args.num_threads,
+            onnx_num_threads=args.num_threads,
+            warmup_batch_sizes=args.batch_sizes,
+            runtime=args.runtime
+        )
+        if not loader.load_model(model_file):
+            print(f"  Skipping {model_file}: could not be loaded")
+            continue
+
+        predictions = predict_all(loader, images, max(args.batch_sizes))
+        if reference is None:
+            reference = (model_file, predictions)
+        entry = {
+            'backend': loader.get_stats()['runtime'],
+            'latency': benchmark_backend(loader, images, args.batch_sizes, args.runs),
+            'reference': reference[0],
+            'top1_agreement': float(np.mean(np.argmax(predictions, axis=1) == np.argmax(reference[1], axis=1))),
+            'max_abs_prob_diff': float(np.max(np.abs(predictions - reference[1]))),
+        }
+        report[model_file] = entry
+        loader.unload()
+
+    if not report:
+        print("No model could be loaded")
+        sys.exit(1)
+
+    print(f"\n=== BACKEND COMPARISON ({len(images)} images, {args.num_threads} thread(s)) ===")
+    print(f"{'model file':<34}{'backend':>8}{'batch':>7}{'mean ms':>10}{'p95 ms':>10}{'ms/img':>10}"
+          f"{'img/s':>9}{'top-1':>9}")
+    for model_file, entry in report.items():
+        for batch_size, stats in entry['latency'].items():
+            print(f"{model_file:<34}{entry['backend']:>8}{batch_size:>7}{stats['mean_ms']:>10.2f}"
+                  f"{stats['p95_ms']:>10.2f}{stats['ms_per_image']:>10.2f}{stats['images_per_second']:>9.1f}"
+                  f"{entry['top1_agreement']:>9.1%}")
+    print(f"Top-1 agreement is measured against {reference[0]}")
+
+    for batch_size in args.batch_sizes:
+        candidates = [
+            (entry['latency'][batch_size]['ms_per_image'], model_file)
+            for model_file, entry in report.items() if batch_size in entry['latency']
+        ]
+        if candidates:
+            print(f"Fastest at batch size {batch_size}: {min(candidates)[1]}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
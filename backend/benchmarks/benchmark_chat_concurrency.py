@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Compare blocking and asyncio Gemini calls for concurrent chat conversations
+
+Both configurations talk to benchmarks/gemini_stub_server.py, started
+in-process with a fixed latency. The 'threads' configuration makes blocking
+REST calls from a pool of worker threads, as Flask workers do, each thread
+holding one conversation at a time. The 'async' configuration sends every
+conversation through one AsyncGeminiClient on a single event loop thread.
+All conversations start at once, and each latency runs from that start to
+the conversation's answer, including any wait for a thread or connection.
+The script reports throughput, latency percentiles, the threads used and the
+HTTP connections opened.
+
+Usage:
+    python benchmarks/benchmark_chat_concurrency.py --conversations 64 --latency-ms 1000 --threads 8
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from aiohttp import web
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.gemini_async_client import AsyncGeminiClient
+from gemini_stub_server import create_stub_app
+
+PROMPT = "My Lakatan leaves have yellow edges with brown tips. What should I apply?"
+
+
+def start_stub(latency_ms, stats):
+    """Run the stub on a background event loop and return its base URL"""
+    ready = threading.Event()
+    address = {}
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(create_stub_app(latency_ms, stats=stats))
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        loop.run_until_complete(site.start())
+        address['port'] = runner.addresses[0][1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{address['port']}"
+
+
+def summarize(label, latencies, elapsed, threads, connections):
+    """Throughput and latency summary of one configuration"""
+    return {
+        'mode': label,
+        'throughput_rps': len(latencies) / elapsed,
+        'latency_ms': {
+            'p50': float(np.percentile(latencies, 50)),
+            'p99': float(np.percentile(latencies, 99)),
+        },
+        'threads': threads,
+        'connections_opened': connections,
+    }
+
+
+def run_threads(base_url, conversations, num_threads):
+    """Blocking calls from a thread pool, one connection per call"""
+    endpoint = f"{base_url}/v1beta/models/gemini-2.0-flash-lite:generateContent"
+    body = json.dumps({'contents': [{'role': 'user', 'parts': [{'text': PROMPT}]}]}).encode()
+
+    def call(_):
+        request = urllib.request.Request(endpoint, data=body, method='POST',
+                                         headers={'Content-Type': 'application/json', 'x-goog-api-key': 'stub'})
+        with urllib.request.urlopen(request) as response:
+            json.load(response)
+        return (time.perf_counter() - started) * 1000.0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=num_threads) as pool:
+        latencies = list(pool.map(call, range(conversations)))
+    return summarize('threads', latencies, time.perf_counter() - started, num_threads, conversations)
+
+
+async def run_async(base_url, conversations, max_connections):
+    """All conversations on one event loop through one pooled client"""
+    async with AsyncGeminiClient('stub', base_url=base_url, max_connections=max_connections) as client:
+        async def call():
+            await client.generate_content(PROMPT)
+            return (time.perf_counter() - started) * 1000.0
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*[call() for _ in range(conversations)])
+        elapsed = time.perf_counter() - started
+        return summarize('async', latencies, elapsed, 1, client.get_stats()['connections_opened'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare blocking and asyncio Gemini calls')
+    parser.add_argument('--conversations', type=int, default=64, help='Concurrent conversations (default: 64)')
+    parser.add_argument('--latency-ms', type=float, default=1000.0, help='Stub latency per call (default: 1000)')
+    parser.add_argument('--threads', type=int, default=8, help='Worker threads for blocking calls (default: 8)')
+    parser.add_argument('--max-connections', type=int, default=32,
+                        help='Pooled connections of the async client (default: 32)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    stub_stats = {}
+    base_url = start_stub(args.latency_ms, stub_stats)
+    report = [
+        run_threads(base_url, args.conversations, args.threads),
+        asyncio.run(run_async(base_url, args.conversations, args.max_connections)),
+    ]
+
+    print(f"\n=== CHAT CONCURRENCY ({args.conversations} conversations, {args.latency_ms:.0f} ms per call) ===")
+    print(f"{'mode':<10}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'threads':>9}{'connections':>13}")
+    for result in report:
+        print(f"{result['mode']:<10}{result['throughput_rps']:>8.1f}{result['latency_ms']['p50']:>9.0f}"
+              f"{result['latency_ms']['p99']:>9.0f}{result['threads']:>9}{result['connections_opened']:>13}")
+    print(f"Stub peak concurrent calls: {stub_stats['peak_in_flight']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
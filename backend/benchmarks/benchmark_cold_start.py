@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Compare cold start time and memory of the slim and TensorFlow runtimes
+
+Every measurement runs in a fresh Python process that imports the inference
+modules, loads the TFLite model and runs one prediction, so import cost is
+included exactly as a newly started API worker pays it.
+
+Usage:
+    python benchmarks/benchmark_cold_start.py --runtimes slim tensorflow --repeats 3
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _rss_mb():
+    """Current resident set size of this process in MB (Linux), or None"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        return None
+    return None
+
+
+def run_child(runtime, model_file):
+    """Measure one cold start in this process and print the result as JSON"""
+    started = time.perf_counter()
+    sys.path.append(BACKEND_DIR)
+
+    from utils.image_preprocessor import preprocess_pil_image_batch
+    from utils.model_loader import ModelLoader
+    from PIL import Image
+    imported = time.perf_counter()
+
+    loader = ModelLoader(runtime=runtime, warmup_batch_sizes=())
+    if not loader.load_model(model_file):
+        raise RuntimeError(f"Could not load {model_file} with the {runtime} runtime")
+    loaded = time.perf_counter()
+
+    img_batch = preprocess_pil_image_batch([Image.new('RGB', (640, 480), (40, 160, 40))], (224, 224))
+    loader.predict_batch(img_batch)
+    predicted = time.perf_counter()
+
+    import resource
+    print(json.dumps({
+        'import_ms': (imported - started) * 1000.0,
+        'load_ms': (loaded - imported) * 1000.0,
+        'first_inference_ms': (predicted - loaded) * 1000.0,
+        'ready_ms': (predicted - started) * 1000.0,
+        'rss_mb': _rss_mb(),
+        # ru_maxrss is in KB on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        'tensorflow_imported': 'tensorflow' in sys.modules,
+        'tflite_backend': loader.get_stats().get('tflite_backend'),
+    }))
+
+
+def measure(runtime, model_file):
+    """Start a fresh interpreter for one cold start measurement"""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', '--runtime', runtime, '--model-file', model_file],
+        capture_output=True, text=True, cwd=BACKEND_DIR
+    )
+    wall_ms = (time.perf_counter() - started) * 1000.0
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'child failed')
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['process_ms'] = wall_ms
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare cold start of the slim and TensorFlow runtimes')
+    parser.add_argument('--runtimes', nargs='+', default=['slim', 'tensorflow'],
+                        choices=['auto', 'slim', 'tensorflow'], help='Runtimes to compare')
+    parser.add_argument('--model-file', type=str, default='banana_nutrient_model.tflite',
+                        help='TFLite model in models_runtime/ (default: banana_nutrient_model.tflite)')
+    parser.add_argument('--repeats', type=int, default=3, help='Cold starts per runtime (default: 3)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--runtime', type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.runtime, args.model_file)
+        return
+
+    summary = {}
+    for runtime in args.runtimes:
+        print(f"Measuring '{runtime}' runtime ({args.repeats} cold starts)...")
+        try:
+            runs = [measure(runtime, args.model_file) for _ in range(args.repeats)]
+        except Exception as e:
+            print(f"  Failed: {e}")
+            continue
+        summary[runtime] = {
+            key: float(np.median([run[key] for run in runs]))
+            for key in ('process_ms', 'import_ms', 'load_ms', 'first_inference_ms', 'ready_ms', 'rss_mb', 'peak_rss_mb')
+            if runs[0][key] is not None
+        }
+        summary[runtime]['tensorflow_imported'] = runs[0]['tensorflow_imported']
+        summary[runtime]['tflite_backend'] = runs[0]['tflite_backend']
+
+    print("\n=== COLD START (median) ===")
+    print(f"{'runtime':<12}{'process ms':>12}{'import ms':>11}{'load ms':>10}{'1st inf ms':>12}"
+          f"{'RSS MB':>10}{'peak MB':>10}  backend")
+    for runtime, stats in summary.items():
+        print(f"{runtime:<12}{stats['process_ms']:>12.0f}{stats['import_ms']:>11.0f}{stats['load_ms']:>10.0f}"
+              f"{stats['first_inference_ms']:>12.1f}{stats.get('rss_mb', 0.0):>10.0f}{stats['peak_rss_mb']:>10.0f}"
+              f"  {stats['tflite_backend']}{' (TensorFlow imported)' if stats['tensorflow_imported'] else ''}")
+
+    if 'slim' in summary and 'tensorflow' in summary:
+        slim, full = summary['slim'], summary['tensorflow']
+        print(f"\nSlim vs TensorFlow runtime: start {slim['process_ms']:.0f} ms vs {full['process_ms']:.0f} ms "
+              f"({full['process_ms'] / slim['process_ms']:.1f}x), "
+              f"peak memory {slim['peak_rss_mb']:.0f} MB vs {full['peak_rss_mb']:.0f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
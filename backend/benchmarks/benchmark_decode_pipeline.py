@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Size the decode pool against the inference stage of the /predict path
+
+Concurrent clients send JPEG photos through the same two stages the API
+uses: decode and resize to uint8 pixels, then inference through the batch
+scheduler. The 'inline' configuration decodes on the client (request) thread
+as before. The pool configurations hand decoding to a DecodePool with the
+given number of workers. For each configuration the script reports
+throughput, request latency percentiles and the per-stage queue depth and
+latency statistics that /stats exposes.
+
+Usage:
+    python benchmarks/benchmark_decode_pipeline.py --model-file banana_nutrient_model.tflite \\
+        --clients 8 --workers 1 2 4
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from io import BytesIO
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.image_preprocessor import load_image_pixels
+from utils.model_loader import ModelLoader
+from utils.batch_scheduler import BatchScheduler
+from utils.decode_pool import DecodePool
+
+
+def make_photo(size=(2048, 1536), seed=42):
+    """Encode a synthetic phone-sized photo as JPEG"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.uniform(20, 220, (12, 16, 3)).astype(np.uint8)
+    pixels = np.asarray(Image.fromarray(coarse).resize(size, Image.BICUBIC), dtype=np.float32)
+    pixels += rng.normal(0, 12.0, pixels.shape)
+    buffer = BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def run_configuration(loader, image_bytes, num_workers, clients, requests_per_client, draft):
+    """
+    Send requests from concurrent clients through decode and inference
+
+    Args:
+        num_workers: Decode pool size, or 0 to decode on the client threads
+
+    Returns:
+        Dictionary with throughput, latency percentiles and stage statistics
+    """
+    scheduler = BatchScheduler(loader, max_batch_size=8, max_wait_ms=5.0)
+    decode_pool = DecodePool(num_workers=num_workers, max_queue_size=4 * clients) if num_workers else None
+
+    def decode():
+        if decode_pool is None:
+            return load_image_pixels(image_bytes, image_format='JPEG', draft=draft)
+        return decode_pool.submit(load_image_pixels, image_bytes, image_format='JPEG', draft=draft)
+
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def client():
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            scheduler.submit(decode())
+            elapsed = (time.perf_counter() - started) * 1000.0
+            with latencies_lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        'decode_workers': num_workers,
+        'throughput_rps': len(latencies) / elapsed,
+        'latency_ms': {
+            'p50': float(np.percentile(latencies, 50)),
+            'p90': float(np.percentile(latencies, 90)),
+            'p99': float(np.percentile(latencies, 99)),
+        },
+        'decode_stage': decode_pool.get_stats() if decode_pool is not None else None,
+        'inference_stage': scheduler.get_stats(),
+    }
+    scheduler.stop()
+    if decode_pool is not None:
+        decode_pool.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare inline decoding with decode pools of several sizes')
+    parser.add_argument('--model-file', type=str, default='banana_nutrient_model.tflite',
+                        help='Model in models_runtime/ (default: banana_nutrient_model.tflite)')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent clients (default: 8)')
+    parser.add_argument('--requests', type=int, default=25, help='Requests per client (default: 25)')
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4],
+                        help='Decode pool sizes to compare with inline decoding (default: 1 2 4)')
+    parser.add_argument('--no-draft', action='store_true', help='Decode JPEGs at full resolution')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    loader = ModelLoader(warmup_batch_sizes=(1, 8))
+    if not loader.load_model(args.model_file):
+        print(f"Could not load {args.model_file}")
+        sys.exit(1)
+
+    image_bytes = make_photo()
+    load_image_pixels(image_bytes, image_format='JPEG')  # warm up Pillow's decoder
+    report = [
+        run_configuration(loader, image_bytes, num_workers, args.clients, args.requests, not args.no_draft)
+        for num_workers in [0] + args.workers
+    ]
+
+    print(f"\n=== /predict PIPELINE ({args.clients} clients, {args.requests} requests each) ===")
+    print(f"{'decode':<10}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'decode q':>10}{'wait ms':>9}{'decode ms':>11}"
+          f"{'infer q':>9}{'wait ms':>9}{'batch':>7}{'infer ms':>10}")
+    for result in report:
+        decode_stage = result['decode_stage']
+        inference_stage = result['inference_stage']
+        label = f"{result['decode_workers']} workers" if result['decode_workers'] else 'inline'
+        decode_columns = (f"{decode_stage['peak_queue_depth']:>10}{decode_stage['mean_queue_wait_ms']:>9.1f}"
+                          f"{decode_stage['mean_decode_ms']:>11.1f}" if decode_stage else f"{'-':>10}{'-':>9}{'-':>11}")
+        print(f"{label:<10}{result['throughput_rps']:>8.1f}{result['latency_ms']['p50']:>9.1f}"
+              f"{result['latency_ms']['p99']:>9.1f}{decode_columns}{inference_stage['peak_queue_depth']:>9}"
+              f"{inference_stage['mean_queue_wait_ms']:>9.1f}{inference_stage['mean_batch_size']:>7.1f}"
+              f"{inference_stage['mean_inference_ms']:>10.1f}")
+    print("decode q and infer q are the peak queue depths of the two stages")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
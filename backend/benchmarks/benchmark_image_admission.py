@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Compare the header-only admission check with decoding oversized images
+
+Small, highly compressed files can declare huge dimensions. Each test image
+is run through read_image_header (what the API checks before decoding) and
+through load_image_pixels (what the API did before: a full decode and
+resize). The decoded size column is the pixel buffer Pillow has to allocate
+for a full decode; the header check allocates none of it.
+
+Usage:
+    python benchmarks/benchmark_image_admission.py --runs 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+from io import BytesIO
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.image_preprocessor import read_image_header, load_image_pixels
+
+# (label, format, Pillow mode, size): a normal photo and pixel bombs of growing size
+TEST_IMAGES = (
+    ('photo 12MP', 'JPEG', 'RGB', (4000, 3000)),
+    ('flat PNG 25MP', 'PNG', 'RGB', (5000, 5000)),
+    ('flat PNG 64MP', 'PNG', 'RGB', (8000, 8000)),
+    ('flat PNG 100MP', 'PNG', 'L', (10000, 10000)),
+)
+
+
+def make_image(image_format, mode, size, seed=42):
+    """Encode a test image: a noisy photo for JPEG, a flat color (tiny file) for PNG"""
+    if image_format == 'JPEG':
+        rng = np.random.default_rng(seed)
+        coarse = rng.uniform(20, 220, (12, 16, 3)).astype(np.uint8)
+        img = Image.fromarray(coarse).resize(size, Image.BICUBIC)
+    else:
+        img = Image.new(mode, size, 90)
+    buffer = BytesIO()
+    img.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def median_ms(fn, runs):
+    """Median milliseconds of fn() over several runs"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare header-only admission checks with full decodes')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per image (default: 5)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    # Pillow warns about images above its own 89 MP threshold
+    warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+
+    rows = []
+    for label, image_format, mode, size in TEST_IMAGES:
+        image_bytes = make_image(image_format, mode, size)
+        header = read_image_header(image_bytes, image_format)
+        rows.append({
+            'image': label,
+            'file_kb': len(image_bytes) / 1024,
+            'decoded_mb': size[0] * size[1] * Image.getmodebands(header['mode']) / (1024 * 1024),
+            'header_ms': median_ms(lambda: read_image_header(image_bytes, image_format), args.runs),
+            'decode_ms': median_ms(lambda: load_image_pixels(image_bytes, image_format=image_format), args.runs),
+        })
+
+    print(f"\n=== ADMISSION CHECK vs FULL DECODE (median of {args.runs}) ===")
+    print(f"{'image':<16}{'file KB':>10}{'decoded MB':>12}{'header ms':>11}{'decode ms':>11}")
+    for row in rows:
+        print(f"{row['image']:<16}{row['file_kb']:>10.1f}{row['decoded_mb']:>12.1f}"
+              f"{row['header_ms']:>11.2f}{row['decode_ms']:>11.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Measure /predict inference throughput for several interpreter pool sizes
+
+For each pool size the model is loaded with that many TFLite interpreters
+and put behind a BatchScheduler with as many dispatch workers, as the API
+does with TFLITE_POOL_SIZE and BATCH_WORKERS. Concurrent clients then submit
+already decoded images, so only the inference stage is measured. The script
+reports throughput, request latency percentiles, the mean batch size, the
+peak number of batches running at once and the speedup over the first pool
+size, so TFLITE_POOL_SIZE can be sized for the available cores.
+
+Usage:
+    python benchmarks/benchmark_interpreter_pool.py --model-file banana_nutrient_model.tflite \\
+        --clients 16 --pool-sizes 1 2 4
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import numpy as np
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.model_loader import ModelLoader
+from utils.batch_scheduler import BatchScheduler
+
+
+def run_configuration(model_file, pool_size, num_threads, clients, requests_per_client,
+                      max_batch_size, max_wait_ms):
+    """
+    Send single-image predictions from concurrent clients through the scheduler
+
+    Returns:
+        Dictionary with throughput, latency percentiles and scheduler statistics
+    """
+    loader = ModelLoader(interpreter_pool_size=pool_size, interpreter_num_threads=num_threads,
+                         warmup_batch_sizes=sorted({1, max_batch_size}))
+    if not loader.load_model(model_file):
+        print(f"Could not load {model_file}")
+        sys.exit(1)
+    scheduler = BatchScheduler(loader, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                               num_workers=pool_size)
+
+    rng = np.random.default_rng(42)
+    pixels = rng.integers(0, 256, (1,) + tuple(loader.get_input_shape()[1:]), dtype=np.uint8)
+
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def client():
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            scheduler.submit(pixels)
+            elapsed = (time.perf_counter() - started) * 1000.0
+            with latencies_lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        'pool_size': pool_size,
+        'throughput_rps': len(latencies) / elapsed,
+        'latency_ms': {
+            'p50': float(np.percentile(latencies, 50)),
+            'p99': float(np.percentile(latencies, 99)),
+        },
+        'scheduler': scheduler.get_stats(),
+        'runtime': loader.get_stats(),
+    }
+    scheduler.stop()
+    loader.unload()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure /predict throughput for interpreter pool sizes')
+    parser.add_argument('--model-file', type=str, default='banana_nutrient_model.tflite',
+                        help='TFLite model in models_runtime/ (default: banana_nutrient_model.tflite)')
+    parser.add_argument('--pool-sizes', nargs='+', type=int, default=[1, 2, 4],
+                        help='Interpreter pool sizes to compare (default: 1 2 4)')
+    parser.add_argument('--num-threads', type=int, default=1, help='CPU threads per interpreter (default: 1)')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent clients (default: 16)')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per client (default: 50)')
+    parser.add_argument('--batch-size', type=int, default=8, help='BATCH_MAX_SIZE (default: 8)')
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help='BATCH_MAX_WAIT_MS (default: 5)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    report = [
+        run_configuration(args.model_file, pool_size, args.num_threads, args.clients, args.requests,
+                          args.batch_size, args.max_wait_ms)
+        for pool_size in args.pool_sizes
+    ]
+
+    baseline = report[0]['throughput_rps']
+    print(f"\n=== /predict INFERENCE ({args.clients} clients, {args.requests} requests each, "
+          f"{args.num_threads} thread(s) per interpreter) ===")
+    print(f"{'pool':<6}{'req/s':>8}{'speedup':>9}{'p50 ms':>9}{'p99 ms':>9}{'batch':>7}{'parallel':>10}")
+    for result in report:
+        scheduler = result['scheduler']
+        print(f"{result['pool_size']:<6}{result['throughput_rps']:>8.1f}{result['throughput_rps'] / baseline:>8.2f}x"
+              f"{result['latency_ms']['p50']:>9.1f}{result['latency_ms']['p99']:>9.1f}"
+              f"{scheduler['mean_batch_size']:>7.1f}{scheduler['peak_running_batches']:>10}")
+    print("parallel is the peak number of batches running at once")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
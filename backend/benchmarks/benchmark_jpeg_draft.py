@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark JPEG draft-mode (DCT-domain downscaled) decoding against full decodes
+
+For each photo size the full decode + resize path is timed against the draft
+path (apply_jpeg_draft), which lets libjpeg decode at 1/2, 1/4 or 1/8 scale
+before the final resize to the model input. A quality check compares the two
+preprocessed inputs and, when a model is given, the predictions: top-1 must
+agree and probabilities must match within --tolerance. The script exits with
+status 1 if the quality check fails.
+
+Usage:
+    python benchmarks/benchmark_jpeg_draft.py --images-dir /path/to/leaf/photos \\
+        --model-file banana_nutrient_model.tflite
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from io import BytesIO
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.image_preprocessor import load_image_from_bytes
+
+# Typical phone and camera photo sizes: 1.2, 3, 8 and 12 megapixels
+PHOTO_SIZES = ((1280, 960), (2048, 1536), (3264, 2448), (4032, 3024))
+
+
+def make_photo(size, seed):
+    """Encode a synthetic leaf-like JPEG: smooth colour regions plus fine texture"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    coarse = rng.uniform(20, 220, (12, 16, 3)).astype(np.uint8)
+    smooth = np.asarray(Image.fromarray(coarse).resize(size, Image.BICUBIC), dtype=np.float32)
+    pixels = smooth + rng.normal(0, 12.0, (height, width, 3))
+    buffer = BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def load_photos(images_dir, num_images):
+    """
+    Collect the JPEG files to test
+
+    Returns:
+        List of (label, JPEG bytes) tuples
+    """
+    if images_dir is None:
+        print("No --images-dir given, using synthetic photos")
+        return [(f"{width}x{height}", make_photo((width, height), seed))
+                for seed, (width, height) in enumerate(PHOTO_SIZES)]
+
+    photos = []
+    for root, _, files in os.walk(images_dir):
+        for name in sorted(files):
+            if name.lower().endswith(('.jpg', '.jpeg')):
+                with open(os.path.join(root, name), 'rb') as f:
+                    image_bytes = f.read()
+                width, height = Image.open(BytesIO(image_bytes)).size
+                photos.append((f"{width}x{height}", image_bytes))
+    if not photos:
+        raise ValueError(f"No JPEG images found in {images_dir}")
+    return photos[:num_images]
+
+
+def time_decode(image_bytes, draft, runs):
+    """Median milliseconds to decode and preprocess one photo"""
+    load_image_from_bytes(image_bytes, draft=draft)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        load_image_from_bytes(image_bytes, draft=draft)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JPEG draft-mode decoding')
+    parser.add_argument('--images-dir', type=str, help='Directory of JPEG photos (default: synthetic photos)')
+    parser.add_argument('--num-images', type=int, default=50, help='Maximum photos from --images-dir (default: 50)')
+    parser.add_argument('--runs', type=int, default=10, help='Timed decodes per photo (default: 10)')
+    parser.add_argument('--model-file', type=str,
+                        help='Optional model in models_runtime/ for the prediction quality check')
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help='Max allowed probability difference per class (default: 0.05)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    photos = load_photos(args.images_dir, args.num_images)
+
+    rows = []
+    full_inputs = []
+    draft_inputs = []
+    for label, image_bytes in photos:
+        full_img = load_image_from_bytes(image_bytes, draft=False)
+        draft_img = load_image_from_bytes(image_bytes, draft=True)
+        full_inputs.append(full_img[0])
+        draft_inputs.append(draft_img[0])
+        rows.append({
+            'size': label,
+            'file_mb': len(image_bytes) / (1024 * 1024),
+            'full_ms': time_decode(image_bytes, False, args.runs),
+            'draft_ms': time_decode(image_bytes, True, args.runs),
+            'mean_abs_pixel_diff': float(np.mean(np.abs(full_img - draft_img))),
+        })
+
+    print(f"\n=== JPEG DECODE + PREPROCESS TO 224x224 (median of {args.runs}) ===")
+    print(f"{'photo':<12}{'file MB':>9}{'full ms':>10}{'draft ms':>10}{'speedup':>9}{'pixel diff':>12}")
+    for row in rows:
+        print(f"{row['size']:<12}{row['file_mb']:>9.2f}{row['full_ms']:>10.1f}{row['draft_ms']:>10.1f}"
+              f"{row['full_ms'] / row['draft_ms']:>8.1f}x{row['mean_abs_pixel_diff']:>12.2f}")
+    print("Pixel diff is the mean absolute difference of the model inputs (0-255 scale)")
+
+    report = {'decode': rows}
+    passed = True
+    if args.model_file:
+        from utils.model_loader import ModelLoader
+        loader = ModelLoader(interpreter_pool_size=1, warmup_batch_sizes=())
+        if not loader.load_model(args.model_file):
+            print(f"Could not load {args.model_file}, skipping the prediction check")
+        else:
+            full_predictions = loader.predict_batch(np.stack(full_inputs))
+            draft_predictions = loader.predict_batch(np.stack(draft_inputs))
+            agreement = float(np.mean(np.argmax(full_predictions, axis=1) == np.argmax(draft_predictions, axis=1)))
+            max_diff = float(np.max(np.abs(full_predictions - draft_predictions)))
+            passed = agreement == 1.0 and max_diff <= args.tolerance
+            report['quality'] = {'top1_agreement': agreement, 'max_abs_prob_diff': max_diff,
+                                 'tolerance': args.tolerance, 'passed': passed}
+            print(f"\nPrediction check on {len(photos)} photos: top-1 agreement {agreement:.1%}, "
+                  f"max probability difference {max_diff:.4f} (tolerance {args.tolerance}) -> "
+                  f"{'PASS' if passed else 'FAIL'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
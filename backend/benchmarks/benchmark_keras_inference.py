@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark Keras inference modes: model.predict vs. traced tf.function (and XLA)
+
+Usage:
+    python benchmarks/benchmark_keras_inference.py --batch-sizes 1 8 --runs 50
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.model_loader import ModelLoader
+
+
+def benchmark_mode(model_dir, mode, batch_sizes, num_runs):
+    """
+    Measure per-call latency of one Keras inference mode
+
+    Args:
+        model_dir: Directory containing banana_nutrient_model.h5
+        mode: One of ModelLoader.INFERENCE_MODES
+        batch_sizes: Batch sizes to measure
+        num_runs: Timed calls per batch size
+
+    Returns:
+        Dictionary mapping batch size to latency statistics in milliseconds
+    """
+    loader = ModelLoader(model_dir=model_dir, inference_mode=mode, warmup_batch_sizes=batch_sizes)
+    if not loader.load_model() or loader.get_stats()['runtime'] != 'keras':
+        raise RuntimeError(f"Could not load the Keras model from {model_dir}")
+
+    results = {}
+    for batch_size in batch_sizes:
+        img_batch = np.random.uniform(0, 255, (batch_size,) + loader.get_input_shape()).astype(np.float32)
+        timings = []
+        for _ in range(num_runs):
+            started = time.perf_counter()
+            loader.predict_batch(img_batch)
+            timings.append((time.perf_counter() - started) * 1000.0)
+
+        results[batch_size] = {
+            'warmup': loader.warmup_times.get(batch_size, 0.0),
+            'mean': float(np.mean(timings)),
+            'p50': float(np.percentile(timings, 50)),
+            'p95': float(np.percentile(timings, 95)),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare Keras inference modes')
+    parser.add_argument('--model-dir', type=str, default='../models_runtime',
+                        help='Model directory, relative to utils/ (default: ../models_runtime)')
+    parser.add_argument('--modes', nargs='+', default=list(ModelLoader.INFERENCE_MODES),
+                        choices=ModelLoader.INFERENCE_MODES, help='Inference modes to compare')
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8], help='Batch sizes to measure')
+    parser.add_argument('--runs', type=int, default=50, help='Timed calls per batch size (default: 50)')
+    args = parser.parse_args()
+
+    all_results = {}
+    for mode in args.modes:
+        print(f"\nBenchmarking '{mode}' mode...")
+        all_results[mode] = benchmark_mode(args.model_dir, mode, args.batch_sizes, args.runs)
+
+    print("\n=== KERAS INFERENCE LATENCY (ms) ===")
+    print(f"{'mode':<10}{'batch':>7}{'warmup':>10}{'mean':>10}{'p50':>10}{'p95':>10}{'speedup':>10}")
+    for mode, results in all_results.items():
+        for batch_size, stats in results.items():
+            baseline = all_results.get('predict', {}).get(batch_size)
+            speedup = f"{baseline['mean'] / stats['mean']:.2f}x" if baseline else '-'
+            print(f"{mode:<10}{batch_size:>7}{stats['warmup']:>10.1f}{stats['mean']:>10.2f}"
+                  f"{stats['p50']:>10.2f}{stats['p95']:>10.2f}{speedup:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Track per-request allocations of the single-image preprocessing path
+
+Compares two ways of turning an uploaded JPEG into a prediction:
+    float32    load_image_from_bytes builds a float32 (1, H, W, 3) array that
+               is then handed to the model as a batch (the previous path)
+    zero_copy  load_image_pixels returns the uint8 pixels and
+               ModelLoader.predict casts them straight into the backend's
+               input buffer (the TFLite input tensor, or a reused buffer for
+               ONNX Runtime)
+
+Allocations are traced with tracemalloc, which sees NumPy arrays and Python
+objects but not memory owned by Pillow or the inference runtime, so the
+numbers are the intermediate arrays this code creates per request.
+
+Usage:
+    python benchmarks/benchmark_preprocess_allocations.py --model-file banana_nutrient_model.tflite
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from io import BytesIO
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.image_preprocessor import load_image_from_bytes, load_image_pixels
+from utils.model_loader import ModelLoader
+
+
+def float32_path(loader, image_bytes):
+    img_array = load_image_from_bytes(image_bytes, draft=True)
+    return loader.predict_batch(img_array)[0]
+
+
+def zero_copy_path(loader, image_bytes):
+    pixels = load_image_pixels(image_bytes, draft=True)
+    return loader.predict(pixels)
+
+
+PATHS = {
+    'float32': float32_path,
+    'zero_copy': zero_copy_path,
+}
+
+
+def make_photo(size=(1600, 1200), seed=42):
+    """Encode a synthetic photo as JPEG"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.uniform(20, 220, (12, 16, 3)).astype(np.uint8)
+    pixels = np.asarray(Image.fromarray(coarse).resize(size, Image.BICUBIC), dtype=np.float32)
+    pixels += rng.normal(0, 12.0, pixels.shape)
+    buffer = BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def measure(path, loader, image_bytes, runs):
+    """
+    Run one path repeatedly under tracemalloc
+
+    Returns:
+        Dictionary with the median traced peak per request and the median latency
+    """
+    path(loader, image_bytes)
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        path(loader, image_bytes)
+        timings.append((time.perf_counter() - started) * 1000.0)
+
+    # Traced separately so tracing overhead doesn't skew the timings
+    peaks = []
+    tracemalloc.start()
+    for _ in range(runs):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        path(loader, image_bytes)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    return {
+        'peak_kb': float(np.median(peaks)) / 1024.0,
+        'latency_ms': float(np.median(timings)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-request allocations of the preprocessing paths')
+    parser.add_argument('--model-file', type=str, default='banana_nutrient_model.tflite',
+                        help='Model in models_runtime/ (default: banana_nutrient_model.tflite)')
+    parser.add_argument('--runs', type=int, default=50, help='Requests per path (default: 50)')
+    parser.add_argument('--runtime', type=str, default='auto', choices=ModelLoader.RUNTIMES,
+                        help='TFLite interpreter preference (default: auto)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    loader = ModelLoader(interpreter_pool_size=1, warmup_batch_sizes=(1,), runtime=args.runtime)
+    if not loader.load_model(args.model_file):
+        print(f"Could not load {args.model_file}")
+        sys.exit(1)
+
+    image_bytes = make_photo()
+    reference = float32_path(loader, image_bytes)
+    max_diff = float(np.max(np.abs(zero_copy_path(loader, image_bytes) - reference)))
+
+    report = {path_name: measure(path, loader, image_bytes, args.runs) for path_name, path in PATHS.items()}
+    report['max_abs_prob_diff'] = max_diff
+
+    print(f"\n=== SINGLE-IMAGE PREPROCESSING ({loader.get_stats()['runtime']}, median of {args.runs}) ===")
+    print(f"{'path':<12}{'peak traced KB':>16}{'latency ms':>12}")
+    for path_name in PATHS:
+        stats = report[path_name]
+        print(f"{path_name:<12}{stats['peak_kb']:>16.1f}{stats['latency_ms']:>12.2f}")
+    print(f"Predictions of the two paths differ by at most {max_diff:.2e}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Measure the image-quality gate against the forward pass it saves
+
+A synthetic leaf photo and degraded copies of it (blurred, underexposed,
+overexposed, and a gray non-leaf scene) are resized to model-input pixels as
+in /predict. For each one the script reports the gate's metrics and verdict
+and the median time of the check, next to the median single-image inference
+time of the model.
+
+Usage:
+    python benchmarks/benchmark_quality_gate.py --model-file banana_nutrient_model.tflite
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from PIL import Image, ImageFilter
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.image_preprocessor import pil_image_to_pixels
+from utils.image_quality import ImageQualityGate
+from utils.model_loader import ModelLoader
+
+
+def make_leaf(size=(1024, 768), seed=42):
+    """Synthetic leaf photo: green blade with bright veins and a little noise"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    x = np.arange(width)[None, :, None]
+    veins = (np.sin(x / 9.0) > 0.9) * np.array([40, 50, 10])
+    base = np.array([60, 140, 45]) + rng.normal(0, 10, (height, width, 3))
+    return Image.fromarray(np.clip(base + veins, 0, 255).astype(np.uint8))
+
+
+def make_test_images():
+    """(label, PIL image) pairs: a good photo and typical retakes"""
+    leaf = make_leaf()
+    return (
+        ('leaf', leaf),
+        ('blurred', leaf.filter(ImageFilter.GaussianBlur(8))),
+        ('underexposed', Image.eval(leaf, lambda v: v // 6)),
+        ('overexposed', Image.eval(leaf, lambda v: min(255, v * 3))),
+        ('gray scene', Image.new('RGB', leaf.size, (120, 118, 115)).filter(ImageFilter.GaussianBlur(1))),
+    )
+
+
+def median_ms(fn, runs):
+    """Median milliseconds of fn() over several runs"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the image-quality gate against model inference')
+    parser.add_argument('--model-file', type=str, default='banana_nutrient_model.tflite',
+                        help='Model in models_runtime/ (default: banana_nutrient_model.tflite)')
+    parser.add_argument('--runs', type=int, default=200, help='Timed runs per image (default: 200)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    loader = ModelLoader(warmup_batch_sizes=(1,))
+    if not loader.load_model(args.model_file):
+        print(f"Could not load {args.model_file}")
+        sys.exit(1)
+
+    gate = ImageQualityGate()
+    rows = []
+    for label, img in make_test_images():
+        pixels = pil_image_to_pixels(img)
+        report = gate.check(pixels)
+        rows.append({
+            'image': label,
+            'issues': report['issues'],
+            'metrics': report['metrics'],
+            'check_ms': median_ms(lambda: gate.check(pixels), args.runs),
+        })
+    inference_ms = median_ms(lambda: loader.predict(pixels), max(args.runs // 10, 5))
+
+    print(f"\n=== QUALITY GATE (median of {args.runs}) ===")
+    print(f"{'image':<14}{'sharpness':>11}{'brightness':>12}{'green':>8}{'check ms':>10}  issues")
+    for row in rows:
+        metrics = row['metrics']
+        print(f"{row['image']:<14}{metrics['sharpness']:>11.1f}{metrics['brightness']:>12.1f}"
+              f"{metrics['green_ratio']:>8.2f}{row['check_ms']:>10.3f}  {', '.join(row['issues']) or '-'}")
+    print(f"single-image inference: {inference_ms:.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'images': rows, 'inference_ms': inference_ms}, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
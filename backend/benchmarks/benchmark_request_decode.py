@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Measure per-request CPU time and allocations of /predict image decoding
+
+Compares the previous request path, which base64-decoded the payload once to
+validate it and again (after re-splitting the data URL) to load it, with the
+single-decode path the API uses now: one strict decode into a bytes buffer
+that is validated, header-sniffed and opened by Pillow without copies.
+
+Payloads are large camera-style photos (5-10 MB JPEG/PNG files) sent as data
+URLs. CPU time is process time per request; allocations are measured with
+tracemalloc (Python-level buffers such as the decoded bytes and strings).
+
+Usage:
+    python benchmarks/benchmark_request_decode.py --sizes-mb 5 10 --runs 20
+"""
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import tracemalloc
+from io import BytesIO
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.image_preprocessor import (
+    decode_base64_payload,
+    sniff_image_format,
+    load_image_from_bytes
+)
+
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+
+def make_payload(target_mb, image_format, seed=42):
+    """
+    Build a base64 data URL for a photo-like image of roughly target_mb
+
+    Returns:
+        Tuple of (data URL string, encoded file size in bytes)
+    """
+    rng = np.random.default_rng(seed)
+    # Smooth gradients plus sensor-like noise compress like real photos
+    width, height = 4000, 3000
+    gradient = np.linspace(40, 200, width, dtype=np.float32)[None, :, None]
+    noise_level = 30.0
+    quality = 95
+    while True:
+        pixels = gradient + rng.normal(0, noise_level, (height, width, 3))
+        img = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+        buffer = BytesIO()
+        if image_format == 'PNG':
+            img.save(buffer, format='PNG', compress_level=1)
+        else:
+            img.save(buffer, format='JPEG', quality=quality)
+        size = buffer.tell()
+        # Grow or shrink the picture until it lands near the requested size
+        scale = (target_mb * 1024 * 1024 / size) ** 0.5
+        if 0.9 <= scale <= 1.1 or width < 500:
+            break
+        width, height = int(width * scale), int(height * scale)
+        gradient = np.linspace(40, 200, width, dtype=np.float32)[None, :, None]
+
+    mime = 'image/png' if image_format == 'PNG' else 'image/jpeg'
+    data_url = f"data:{mime};base64," + base64.b64encode(buffer.getvalue()).decode('ascii')
+    return data_url, size
+
+
+def legacy_request_path(image_data):
+    """The previous path: decode to validate, then split and decode again to load"""
+    payload = image_data
+    if ',' in payload:
+        payload = payload.split(',')[1]
+    decoded = base64.b64decode(payload, validate=True)
+    if len(decoded) > MAX_IMAGE_BYTES:
+        raise ValueError("Image too large")
+    if not decoded.startswith(b'\xff\xd8') and not decoded.startswith(b'\x89PNG'):
+        raise ValueError("Invalid image format")
+
+    payload = image_data
+    if ',' in payload:
+        payload = payload.split(',', 1)[1]
+    image_bytes = base64.b64decode(payload)
+    return load_image_from_bytes(BytesIO(image_bytes))
+
+
+def single_decode_path(image_data):
+    """The current path: one decode, then validate and load the same buffer"""
+    image_bytes = decode_base64_payload(image_data)
+    if len(image_bytes) > MAX_IMAGE_BYTES:
+        raise ValueError("Image too large")
+    image_format = sniff_image_format(image_bytes)
+    if image_format is None:
+        raise ValueError("Invalid image format")
+    return load_image_from_bytes(image_bytes, image_format=image_format)
+
+
+PATHS = {
+    'legacy': legacy_request_path,
+    'single_decode': single_decode_path,
+}
+
+
+def measure(path, image_data, runs):
+    """
+    Time a request path and measure its Python allocations
+
+    Returns:
+        Dictionary with CPU and wall time per request and peak traced memory
+    """
+    path(image_data)  # warm up Pillow's decoder plugins
+
+    cpu_times = []
+    wall_times = []
+    for _ in range(runs):
+        cpu_started = time.process_time()
+        wall_started = time.perf_counter()
+        path(image_data)
+        cpu_times.append((time.process_time() - cpu_started) * 1000.0)
+        wall_times.append((time.perf_counter() - wall_started) * 1000.0)
+
+    # Measured separately so tracing overhead doesn't skew the timings
+    tracemalloc.start()
+    path(image_data)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'cpu_ms': float(np.median(cpu_times)),
+        'wall_ms': float(np.median(wall_times)),
+        'peak_alloc_mb': peak / (1024 * 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare legacy and single-decode /predict image paths')
+    parser.add_argument('--sizes-mb', nargs='+', type=float, default=[5, 10],
+                        help='Approximate image file sizes in MB (default: 5 10)')
+    parser.add_argument('--formats', nargs='+', default=['JPEG', 'PNG'], choices=['JPEG', 'PNG'],
+                        help='Image formats to test')
+    parser.add_argument('--runs', type=int, default=20, help='Timed requests per case (default: 20)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    report = []
+    for image_format in args.formats:
+        for size_mb in args.sizes_mb:
+            image_data, file_size = make_payload(size_mb, image_format)
+            if file_size > MAX_IMAGE_BYTES:
+                print(f"Note: {image_format} at {file_size / 1e6:.1f} MB exceeds the API's 10 MB limit")
+            case = {
+                'format': image_format,
+                'file_mb': file_size / (1024 * 1024),
+                'payload_mb': len(image_data) / (1024 * 1024),
+            }
+            for name, path in PATHS.items():
+                case[name] = measure(path, image_data, args.runs)
+            report.append(case)
+            print(f"Measured {image_format} {case['file_mb']:.1f} MB")
+
+    print("\n=== /predict IMAGE DECODING (median per request) ===")
+    print(f"{'format':<7}{'file MB':>9}{'path':>15}{'CPU ms':>10}{'wall ms':>10}{'peak alloc MB':>15}")
+    for case in report:
+        for name in PATHS:
+            stats = case[name]
+            print(f"{case['format']:<7}{case['file_mb']:>9.1f}{name:>15}{stats['cpu_ms']:>10.1f}"
+                  f"{stats['wall_ms']:>10.1f}{stats['peak_alloc_mb']:>15.1f}")
+        legacy, single = case['legacy'], case['single_decode']
+        print(f"{'':<16}saved {legacy['cpu_ms'] - single['cpu_ms']:.1f} ms CPU and "
+              f"{legacy['peak_alloc_mb'] - single['peak_alloc_mb']:.1f} MB of allocations per request")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
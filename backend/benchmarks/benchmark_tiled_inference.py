@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Measure the latency of tiled inference for tile caps and tile batch sizes
+
+A synthetic high-resolution photo is decoded into overlapping tiles with
+load_image_tiles and scored with ModelLoader.predict_tiles, the same path as
+/predict with "tiled": true. For each tile cap the script reports the grid,
+the decode time, and the inference time for each tile batch size, next to
+the plain single-image /predict path, so TILE_MAX_COUNT and TILE_BATCH_SIZE
+can be picked for a latency budget.
+
+Usage:
+    python benchmarks/benchmark_tiled_inference.py --model-file banana_nutrient_model.tflite \\
+        --max-tiles 4 9 16 --batch-sizes 1 4 8 16
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from io import BytesIO
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.image_preprocessor import load_image_pixels, load_image_tiles
+from utils.model_loader import ModelLoader
+
+
+def make_photo(size=(4000, 3000), seed=42):
+    """Encode a synthetic field-photo-sized JPEG"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.uniform(20, 220, (12, 16, 3)).astype(np.uint8)
+    pixels = np.asarray(Image.fromarray(coarse).resize(size, Image.BICUBIC), dtype=np.float32)
+    pixels += rng.normal(0, 12.0, pixels.shape)
+    buffer = BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, format='JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def median_ms(fn, runs):
+    """Median milliseconds of fn() over several runs"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure tiled inference latency for tile caps and batch sizes')
+    parser.add_argument('--model-file', type=str, default='banana_nutrient_model.tflite',
+                        help='Model in models_runtime/ (default: banana_nutrient_model.tflite)')
+    parser.add_argument('--width', type=int, default=4000, help='Photo width (default: 4000)')
+    parser.add_argument('--height', type=int, default=3000, help='Photo height (default: 3000)')
+    parser.add_argument('--max-tiles', nargs='+', type=int, default=[4, 9, 16],
+                        help='Tile caps to compare (default: 4 9 16)')
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 4, 8, 16],
+                        help='Tiles per forward pass to compare (default: 1 4 8 16)')
+    parser.add_argument('--overlap', type=float, default=0.25, help='Tile overlap (default: 0.25)')
+    parser.add_argument('--runs', type=int, default=10, help='Timed runs per configuration (default: 10)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    loader = ModelLoader(warmup_batch_sizes=sorted(set([1] + args.batch_sizes)))
+    if not loader.load_model(args.model_file):
+        print(f"Could not load {args.model_file}")
+        sys.exit(1)
+
+    image_bytes = make_photo((args.width, args.height))
+    pixels = load_image_pixels(image_bytes, image_format='JPEG', draft=True)
+    baseline = {
+        'decode_ms': median_ms(lambda: load_image_pixels(image_bytes, image_format='JPEG', draft=True), args.runs),
+        'inference_ms': median_ms(lambda: loader.predict(pixels), args.runs),
+    }
+
+    rows = []
+    for max_tiles in args.max_tiles:
+        decode = lambda: load_image_tiles(image_bytes, max_tiles=max_tiles, overlap=args.overlap,
+                                          image_format='JPEG', draft=True)
+        tile_batch, grid = decode()
+        row = {
+            'max_tiles': max_tiles,
+            'grid': list(grid),
+            'tiles': len(tile_batch),
+            'decode_ms': median_ms(decode, args.runs),
+            'inference_ms': {},
+        }
+        for batch_size in args.batch_sizes:
+            row['inference_ms'][batch_size] = median_ms(
+                lambda: loader.predict_tiles(tile_batch, batch_size=batch_size), args.runs)
+        rows.append(row)
+
+    print(f"\n=== TILED INFERENCE ({args.width}x{args.height}, median of {args.runs}) ===")
+    print(f"single image: decode {baseline['decode_ms']:.1f} ms, inference {baseline['inference_ms']:.1f} ms")
+    print(f"{'max tiles':<11}{'grid':>7}{'tiles':>7}{'decode ms':>11}"
+          + ''.join(f"{f'batch {size} ms':>14}" for size in args.batch_sizes))
+    for row in rows:
+        grid = f"{row['grid'][0]}x{row['grid'][1]}"
+        print(f"{row['max_tiles']:<11}{grid:>7}{row['tiles']:>7}{row['decode_ms']:>11.1f}"
+              + ''.join(f"{row['inference_ms'][size]:>14.1f}" for size in args.batch_sizes))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'single_image': baseline, 'tiled': rows}, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Compare request parsing of base64 JSON, multipart and raw image uploads
+
+Each body is parsed by the API's own read_request_image() inside a Flask
+request context, from the raw WSGI input stream up to validated image bytes
+ready for Pillow. That covers JSON parsing and base64 decoding for the JSON
+path, form parsing for multipart and a single bounded read for raw bodies.
+CPU time is process time; peak memory is measured with tracemalloc.
+
+Usage:
+    python benchmarks/benchmark_upload_parsing.py --sizes-mb 3 6 9 --runs 20
+"""
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import tracemalloc
+from io import BytesIO
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+UPLOAD_MODES = ('json_base64', 'multipart', 'raw')
+
+
+def make_photo(target_mb, seed=42):
+    """Encode a photo-like JPEG of roughly target_mb"""
+    rng = np.random.default_rng(seed)
+    width, height = 4000, 3000
+    while True:
+        gradient = np.linspace(40, 200, width, dtype=np.float32)[None, :, None]
+        pixels = gradient + rng.normal(0, 30.0, (height, width, 3))
+        buffer = BytesIO()
+        Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, format='JPEG', quality=95)
+        # Grow or shrink the picture until it lands near the requested size
+        scale = (target_mb * 1024 * 1024 / buffer.tell()) ** 0.5
+        if 0.9 <= scale <= 1.1 or width < 500:
+            return buffer.getvalue()
+        width, height = int(width * scale), int(height * scale)
+
+
+def request_kwargs(mode, image_bytes):
+    """Arguments for app.test_request_context that build one upload body"""
+    if mode == 'json_base64':
+        body = json.dumps({'image': 'data:image/jpeg;base64,' + base64.b64encode(image_bytes).decode('ascii')})
+        return {'data': body, 'content_type': 'application/json'}
+    if mode == 'multipart':
+        return {'data': {'image': (BytesIO(image_bytes), 'leaf.jpg', 'image/jpeg')},
+                'content_type': 'multipart/form-data'}
+    return {'data': image_bytes, 'content_type': 'image/jpeg'}
+
+
+def parse_once(api, mode, image_bytes, trace=False):
+    """
+    Parse one upload through the API module
+
+    Returns:
+        Tuple of (CPU ms, wall ms, peak traced MB or None, body size in bytes)
+    """
+    with api.app.test_request_context('/predict', method='POST', **request_kwargs(mode, image_bytes)):
+        body_size = api.request.content_length
+        if trace:
+            tracemalloc.start()
+        cpu_started = time.process_time()
+        wall_started = time.perf_counter()
+        parsed, _, error_msg = api.read_request_image()
+        cpu_ms = (time.process_time() - cpu_started) * 1000.0
+        wall_ms = (time.perf_counter() - wall_started) * 1000.0
+        peak_mb = None
+        if trace:
+            peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+    if parsed is None:
+        raise RuntimeError(f"{mode} upload was rejected: {error_msg}")
+    return cpu_ms, wall_ms, peak_mb, body_size
+
+
+def measure(api, mode, image_bytes, runs):
+    """Median parse time over several requests plus traced peak memory"""
+    parse_once(api, mode, image_bytes)
+    timings = [parse_once(api, mode, image_bytes) for _ in range(runs)]
+    # Measured separately so tracing overhead doesn't skew the timings
+    _, _, peak_mb, body_size = parse_once(api, mode, image_bytes, trace=True)
+    return {
+        'body_mb': body_size / (1024 * 1024),
+        'cpu_ms': float(np.median([timing[0] for timing in timings])),
+        'wall_ms': float(np.median([timing[1] for timing in timings])),
+        'peak_alloc_mb': peak_mb,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare base64 JSON, multipart and raw image uploads')
+    parser.add_argument('--sizes-mb', nargs='+', type=float, default=[3, 6, 9],
+                        help='Approximate photo sizes in MB (default: 3 6 9)')
+    parser.add_argument('--modes', nargs='+', default=list(UPLOAD_MODES), choices=UPLOAD_MODES,
+                        help='Upload encodings to compare')
+    parser.add_argument('--runs', type=int, default=20, help='Timed requests per case (default: 20)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    # Imported only now so --help and bad arguments don't start the API;
+    # only request parsing is measured, so no model is loaded
+    os.environ['MODEL_EAGER_LOAD'] = 'false'
+    from api import banana_deficiency_api as api
+
+    report = []
+    for size_mb in args.sizes_mb:
+        image_bytes = make_photo(size_mb)
+        case = {'image_mb': len(image_bytes) / (1024 * 1024)}
+        for mode in args.modes:
+            case[mode] = measure(api, mode, image_bytes, args.runs)
+        report.append(case)
+
+    print("\n=== /predict REQUEST PARSING (median per request) ===")
+    print(f"{'image MB':>9}{'upload':>13}{'body MB':>10}{'CPU ms':>9}{'wall ms':>9}{'peak alloc MB':>15}")
+    for case in report:
+        for mode in args.modes:
+            stats = case[mode]
+            print(f"{case['image_mb']:>9.1f}{mode:>13}{stats['body_mb']:>10.1f}{stats['cpu_ms']:>9.1f}"
+                  f"{stats['wall_ms']:>9.1f}{stats['peak_alloc_mb']:>15.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
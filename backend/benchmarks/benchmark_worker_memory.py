@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Measure per-worker memory of independent and pre-forked model workers
+
+Three ways of running N workers are compared:
+    read       every worker reads the model file into its own buffer (the
+               previous TFLite behaviour)
+    mmap       every worker loads the model itself, TFLite memory-maps the file
+    preforked  the parent loads the model (memory-mapped) and warms it up,
+               then forks the workers, as run_preforked.py does
+
+Each worker runs a number of inferences and then reports its RSS, PSS and
+unique (USS) memory from /proc. USS is what one more worker costs; the sum of
+PSS over the parent and all workers is the total for the node. Linux only.
+
+Usage:
+    python benchmarks/benchmark_worker_memory.py --workers 4 --model-file banana_nutrient_model.tflite
+"""
+import os
+import sys
+import json
+import signal
+import argparse
+import numpy as np
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.model_loader import ModelLoader
+from utils.process_memory import read_memory_usage
+
+MODES = ('read', 'mmap', 'preforked')
+
+
+def create_loader(args, use_mmap):
+    """Create a loader with a single 1-thread interpreter, as each worker would use"""
+    return ModelLoader(
+        interpreter_pool_size=1,
+        interpreter_num_threads=1,
+        onnx_num_threads=1,
+        warmup_batch_sizes=(1,),
+        runtime=args.runtime,
+        tflite_use_mmap=use_mmap
+    )
+
+
+def run_worker(loader, args, use_mmap, result_fd):
+    """Load the model if needed, run inferences and report memory usage"""
+    if loader is None:
+        loader = create_loader(args, use_mmap)
+        if not loader.load_model(args.model_file):
+            raise RuntimeError(f"Could not load {args.model_file}")
+
+    rng = np.random.default_rng(os.getpid())
+    input_shape = loader.get_input_shape()
+    for _ in range(args.inferences):
+        loader.predict_batch(rng.uniform(0, 255, (1,) + tuple(input_shape)).astype(np.float32))
+
+    os.write(result_fd, (json.dumps(read_memory_usage()) + '\n').encode())
+    os.close(result_fd)
+    # Stay alive so pages shared with other workers are still shared while
+    # they measure; the parent kills the worker once everyone has reported
+    signal.pause()
+
+
+def measure_mode(mode, args):
+    """
+    Start the workers for one mode and collect their memory reports
+
+    Returns:
+        Dictionary with per-worker reports, the parent's usage and summary figures
+    """
+    use_mmap = mode != 'read'
+    loader = None
+    if mode == 'preforked':
+        loader = create_loader(args, use_mmap)
+        if not loader.load_model(args.model_file):
+            raise RuntimeError(f"Could not load {args.model_file}")
+
+    read_fd, write_fd = os.pipe()
+    pids = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            try:
+                run_worker(loader, args, use_mmap, write_fd)
+            finally:
+                os._exit(1)
+        pids.append(pid)
+    os.close(write_fd)
+
+    with os.fdopen(read_fd) as results:
+        workers = [json.loads(line) for line in results if line.strip()]
+    parent = read_memory_usage()
+
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+    if loader is not None:
+        loader.unload()
+
+    if len(workers) != args.workers:
+        raise RuntimeError(f"Only {len(workers)} of {args.workers} workers reported")
+
+    return {
+        'workers': workers,
+        'parent': parent,
+        'mean_worker_rss_mb': float(np.mean([worker['rss_mb'] for worker in workers])),
+        'mean_worker_pss_mb': float(np.mean([worker['pss_mb'] for worker in workers])),
+        'mean_worker_uss_mb': float(np.mean([worker['uss_mb'] for worker in workers])),
+        'total_pss_mb': parent['pss_mb'] + sum(worker['pss_mb'] for worker in workers),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare memory of independent and pre-forked workers')
+    parser.add_argument('--model-file', type=str, default='banana_nutrient_model.tflite',
+                        help='TFLite or ONNX model in models_runtime/ (default: banana_nutrient_model.tflite)')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes per mode (default: 4)')
+    parser.add_argument('--inferences', type=int, default=20, help='Inferences per worker (default: 20)')
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES, help='Modes to measure')
+    parser.add_argument('--runtime', type=str, default='auto', choices=ModelLoader.RUNTIMES,
+                        help='TFLite interpreter preference (default: auto)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    if read_memory_usage() is None:
+        print("Per-process memory needs /proc/<pid>/smaps (Linux)")
+        sys.exit(1)
+
+    report = {}
+    for mode in args.modes:
+        print(f"\nMeasuring '{mode}' with {args.workers} workers...")
+        report[mode] = measure_mode(mode, args)
+
+    print(f"\n=== WORKER MEMORY ({args.workers} workers, {args.model_file}) ===")
+    print(f"{'mode':<12}{'RSS/worker':>12}{'PSS/worker':>12}{'USS/worker':>12}{'parent PSS':>12}{'total PSS':>12}")
+    for mode, result in report.items():
+        print(f"{mode:<12}{result['mean_worker_rss_mb']:>12.1f}{result['mean_worker_pss_mb']:>12.1f}"
+              f"{result['mean_worker_uss_mb']:>12.1f}{result['parent']['pss_mb']:>12.1f}"
+              f"{result['total_pss_mb']:>12.1f}")
+    print("All figures in MB; USS is memory unique to one worker")
+
+    if 'read' in report and 'preforked' in report:
+        before, after = report['read'], report['preforked']
+        print(f"\nUnique memory per worker: {before['mean_worker_uss_mb']:.1f} MB -> "
+              f"{after['mean_worker_uss_mb']:.1f} MB, node total {before['total_pss_mb']:.1f} MB -> "
+              f"{after['total_pss_mb']:.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Measure the image-quality gate's false-reject rate on a labelled dataset
+
+Every image under the dataset directory (the training layout, one
+sub-directory per class) is decoded and resized like a /predict upload and
+checked with the gate's thresholds. Dataset photos are usable by
+definition, so every flagged photo is a false reject. The script reports the
+false-reject rate overall, per issue and per class, and the low and high
+percentiles of each metric, with the threshold that would keep false rejects
+at --target-rate for each check. Run it before setting
+QUALITY_GATE_ENFORCE=true.
+
+Usage:
+    python benchmarks/calibrate_quality_gate.py --dataset ../dataset --target-rate 0.01
+"""
+import os
+import sys
+import json
+import argparse
+from collections import Counter, defaultdict
+import numpy as np
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.image_preprocessor import load_image_pixels
+from utils.image_quality import ImageQualityGate
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+# Metrics with a lower bound (rejected below it) and an upper bound (above it)
+LOWER_BOUNDS = ('sharpness', 'brightness', 'green_ratio')
+UPPER_BOUNDS = ('brightness', 'dark_fraction', 'bright_fraction')
+
+
+def find_images(dataset_dir):
+    """(class name, path) for every image below dataset_dir"""
+    for root, _, files in sorted(os.walk(dataset_dir)):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                label = os.path.relpath(root, dataset_dir).split(os.sep)[0]
+                yield (label if label != '.' else '-'), os.path.join(root, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the quality gate false-reject rate on a dataset')
+    parser.add_argument('--dataset', type=str, required=True, help='Dataset directory (one sub-directory per class)')
+    parser.add_argument('--min-sharpness', type=float, default=150.0, help='Gate threshold (default: 150)')
+    parser.add_argument('--min-brightness', type=float, default=40.0, help='Gate threshold (default: 40)')
+    parser.add_argument('--max-brightness', type=float, default=225.0, help='Gate threshold (default: 225)')
+    parser.add_argument('--max-clipped-fraction', type=float, default=0.5, help='Gate threshold (default: 0.5)')
+    parser.add_argument('--min-green-ratio', type=float, default=0.15, help='Gate threshold (default: 0.15)')
+    parser.add_argument('--target-rate', type=float, default=0.01,
+                        help='False-reject rate per check to suggest thresholds for (default: 0.01)')
+    parser.add_argument('--output', type=str, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    gate = ImageQualityGate(
+        min_sharpness=args.min_sharpness,
+        min_brightness=args.min_brightness,
+        max_brightness=args.max_brightness,
+        max_clipped_fraction=args.max_clipped_fraction,
+        min_green_ratio=args.min_green_ratio
+    )
+
+    metrics = defaultdict(list)
+    checked = Counter()
+    flagged = Counter()
+    issues = Counter()
+    unreadable = 0
+    for label, path in find_images(args.dataset):
+        try:
+            with open(path, 'rb') as f:
+                pixels = load_image_pixels(f.read(), draft=True)
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+            unreadable += 1
+            continue
+        report = gate.check(pixels)
+        checked[label] += 1
+        if not report['passed']:
+            flagged[label] += 1
+            issues.update(report['issues'])
+        for name, value in report['metrics'].items():
+            metrics[name].append(value)
+
+    total = sum(checked.values())
+    if not total:
+        print(f"No readable images found in {args.dataset}")
+        sys.exit(1)
+
+    percent = args.target_rate * 100.0
+    distribution = {}
+    for name, values in metrics.items():
+        values = np.asarray(values)
+        distribution[name] = {
+            'p1': float(np.percentile(values, 1)),
+            'p5': float(np.percentile(values, 5)),
+            'p50': float(np.percentile(values, 50)),
+            'p95': float(np.percentile(values, 95)),
+            'p99': float(np.percentile(values, 99)),
+        }
+        if name in LOWER_BOUNDS:
+            distribution[name]['suggested_min'] = float(np.percentile(values, percent))
+        if name in UPPER_BOUNDS:
+            distribution[name]['suggested_max'] = float(np.percentile(values, 100.0 - percent))
+
+    results = {
+        'images': total,
+        'unreadable': unreadable,
+        'thresholds': gate.get_stats()['thresholds'],
+        'false_reject_rate': sum(flagged.values()) / total,
+        'false_rejects_by_issue': {issue: count / total for issue, count in issues.items()},
+        'false_reject_rate_by_class': {label: flagged[label] / count for label, count in sorted(checked.items())},
+        'metrics': distribution,
+    }
+
+    print(f"\n=== QUALITY GATE CALIBRATION ({total} images, {unreadable} unreadable) ===")
+    print(f"false-reject rate: {results['false_reject_rate']:.2%}")
+    for issue, rate in sorted(results['false_rejects_by_issue'].items()):
+        print(f"  {issue:<14}{rate:>8.2%}")
+    print("per class:")
+    for label, rate in results['false_reject_rate_by_class'].items():
+        print(f"  {label:<14}{rate:>8.2%}  ({checked[label]} images)")
+    print(f"\n{'metric':<17}{'p1':>9}{'p5':>9}{'p50':>9}{'p95':>9}{'p99':>9}   suggested for {args.target_rate:.0%}")
+    for name, stats in distribution.items():
+        suggested = ', '.join(f"{key[10:]} {value:.3g}" for key, value in stats.items() if key.startswith('suggested_'))
+        print(f"{name:<17}" + ''.join(f"{stats[p]:>9.3g}" for p in ('p1', 'p5', 'p50', 'p95', 'p99'))
+              + f"   {suggested}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Local stub of the Gemini REST API for testing and load-testing the chat path
+
+Serves POST /v1beta/models/<model>:generateContent with the same request and
+response shape as the real API, after a configurable delay, and can fail a
+share of calls with 429/503 to exercise retries. Point the async chat server
+or AsyncGeminiClient at it with GEMINI_API_BASE_URL=http://127.0.0.1:8089.
+
+Usage:
+    python benchmarks/gemini_stub_server.py --port 8089 --latency-ms 2000 --jitter-ms 500
+"""
+import random
+import asyncio
+import argparse
+
+from aiohttp import web
+
+
+def create_stub_app(latency_ms=1000.0, jitter_ms=0.0, error_rate=0.0, error_status=503, seed=None, stats=None):
+    """
+    Build the stub application
+
+    Args:
+        latency_ms: Delay before each response
+        jitter_ms: Uniform random extra delay, up to this many milliseconds
+        error_rate: Fraction of calls answered with error_status
+        error_status: Error status returned for failed calls (429 or 503)
+        seed: Random seed for reproducible jitter and errors
+        stats: Optional dict filled with call, error and in-flight counts
+
+    Returns:
+        aiohttp web.Application
+    """
+    rng = random.Random(seed)
+    stats = stats if stats is not None else {}
+    stats.update({'calls': 0, 'errors': 0, 'in_flight': 0, 'peak_in_flight': 0})
+
+    async def generate_content(request):
+        if not (request.headers.get('x-goog-api-key') or request.query.get('key')):
+            return web.json_response(
+                {'error': {'code': 403, 'message': 'Method doesn\'t allow unregistered callers.', 'status': 'PERMISSION_DENIED'}},
+                status=403)
+        body = await request.json()
+        prompt = ''.join(part.get('text', '') for content in body.get('contents', [])
+                         for part in content.get('parts', []))
+
+        stats['calls'] += 1
+        stats['in_flight'] += 1
+        stats['peak_in_flight'] = max(stats['peak_in_flight'], stats['in_flight'])
+        try:
+            await asyncio.sleep((latency_ms + rng.uniform(0.0, jitter_ms)) / 1000.0)
+        finally:
+            stats['in_flight'] -= 1
+
+        if rng.random() < error_rate:
+            stats['errors'] += 1
+            return web.json_response(
+                {'error': {'code': error_status, 'message': 'Stubbed failure', 'status': 'UNAVAILABLE'}},
+                status=error_status)
+
+        text = f"Stub answer from {request.match_info['model']} to a {len(prompt)}-character prompt."
+        return web.json_response({
+            'candidates': [{
+                'content': {'parts': [{'text': text}], 'role': 'model'},
+                'finishReason': 'STOP',
+                'index': 0,
+            }],
+            'usageMetadata': {
+                'promptTokenCount': len(prompt) // 4,
+                'candidatesTokenCount': len(text) // 4,
+                'totalTokenCount': (len(prompt) + len(text)) // 4,
+            },
+        })
+
+    app = web.Application()
+    app.router.add_post(r'/v1beta/models/{model:[^/:]+}:generateContent', generate_content)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub of the Gemini generateContent REST API')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8089, help='Port (default: 8089)')
+    parser.add_argument('--latency-ms', type=float, default=1000.0, help='Delay per call (default: 1000)')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random extra delay (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of failed calls (default: 0)')
+    parser.add_argument('--error-status', type=int, default=503, choices=[429, 500, 503],
+                        help='Status of failed calls (default: 503)')
+    args = parser.parse_args()
+
+    print(f"Gemini stub on http://{args.host}:{args.port} "
+          f"({args.latency_ms:.0f} ms + up to {args.jitter_ms:.0f} ms, {args.error_rate:.0%} errors)")
+    web.run_app(create_stub_app(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status),
+                host=args.host, port=args.port, print=None)
+
+
+if __name__ == '__main__':
+    main()
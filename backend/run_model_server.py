@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Run the shared BananaDoc model server
+
+One model server process owns TensorFlow and the model weights; every API
+worker started with MODEL_SERVER_ADDRESS set forwards inference to it over a
+Unix domain socket instead of loading its own copy of the model.
+"""
+
+import os
+import sys
+import argparse
+
+# Add this directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.model_loader import ModelLoader
+from utils.model_server import ModelServer
+
+
+def create_model_loader(class_mapping_file='class_mapping.txt'):
+    """Create a ModelLoader configured from the environment"""
+    batch_max_size = int(os.environ.get('BATCH_MAX_SIZE', 8))
+    warmup_batch_sizes = [
+        int(size) for size in os.environ.get('WARMUP_BATCH_SIZES', f"1,{batch_max_size}").split(',')
+        if size.strip()
+    ]
+    return ModelLoader(
+        model_dir='../models_runtime',
+        interpreter_pool_size=int(os.environ.get('TFLITE_POOL_SIZE', 2)),
+        interpreter_num_threads=int(os.environ.get('TFLITE_NUM_THREADS', 1)),
+        pool_wait_timeout=float(os.environ.get('TFLITE_POOL_TIMEOUT', 10)),
+        inference_mode=os.environ.get('KERAS_INFERENCE_MODE', 'function'),
+        warmup_batch_sizes=warmup_batch_sizes,
+        class_mapping_file=class_mapping_file,
+        cascade_model_file=os.environ.get('CASCADE_MODEL_FILE') or None,
+        cascade_class_mapping_file=os.environ.get('CASCADE_CLASS_MAPPING_FILE', 'mobile_class_mapping.txt'),
+        cascade_confidence_threshold=float(os.environ.get('CASCADE_CONFIDENCE_THRESHOLD', 0.85)),
+        cascade_margin_threshold=float(os.environ.get('CASCADE_MARGIN_THRESHOLD', 0.0)),
+        runtime=os.environ.get('INFERENCE_RUNTIME', 'auto'),
+        onnx_num_threads=int(os.environ.get('ONNX_NUM_THREADS', 1)),
+        tflite_use_mmap=os.environ.get('TFLITE_MMAP', 'true').lower() == 'true'
+    )
+
+
+def main():
+    """Main function"""
+    # Load environment variables from .env if it exists
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        print("Warning: python-dotenv not installed. Install it to use .env files.")
+
+    parser = argparse.ArgumentParser(description='Run the shared BananaDoc model server')
+    parser.add_argument('--socket', type=str,
+                        default=os.environ.get('MODEL_SERVER_ADDRESS', '/tmp/bananadoc_model.sock'),
+                        help='Unix domain socket path (default: $MODEL_SERVER_ADDRESS or /tmp/bananadoc_model.sock)')
+    parser.add_argument('--model-file', type=str, default=os.environ.get('MODEL_FILE') or None,
+                        help='Model file to preload from models_runtime (default: h5, then TFLite)')
+    parser.add_argument('--class-mapping-file', type=str,
+                        default=os.environ.get('MODEL_CLASS_MAPPING_FILE', 'class_mapping.txt'),
+                        help='Class mapping file for the preloaded model')
+    args = parser.parse_args()
+
+    # Without a shared secret any local process could reach the socket and run
+    # requests on the server, so refuse to start
+    authkey = os.environ.get('MODEL_SERVER_AUTHKEY', '')
+    if not authkey:
+        print("Error: MODEL_SERVER_AUTHKEY is not set; the model server will not start without it")
+        sys.exit(1)
+    server = ModelServer(create_model_loader, args.socket, authkey=authkey.encode())
+
+    # Preload the default model so the first API worker doesn't wait for it
+    try:
+        server.get_loader(args.model_file, args.class_mapping_file)
+    except Exception as e:
+        print(f"Error preloading model: {e}")
+        sys.exit(1)
+
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
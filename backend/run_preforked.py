@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Run the BananaDoc API as pre-forked worker processes
+
+The parent process loads and warms up the model once, opens the listening
+socket and then forks the workers. With TFLITE_MMAP enabled TFLite maps the
+model file read-only, so every worker shares the same physical pages for the
+weights and each extra worker only costs its own request buffers and tensor
+arena. Workers that die are restarted; SIGTERM/SIGINT stop all of them and
+SIGUSR1 logs per-process memory again.
+
+Only runtimes that start no threads of their own can be forked safely, so the
+model must be a TFLite or ONNX model run with 1 thread (TFLITE_NUM_THREADS=1,
+ONNX_NUM_THREADS=1) and not behind a shared model server.
+
+Usage:
+    python run_preforked.py --workers 4 --host 127.0.0.1 --port 5002
+"""
+
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import threading
+
+# Add this directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# The model is loaded synchronously below, before forking, instead of in the
+# API's background thread
+os.environ['MODEL_EAGER_LOAD'] = 'false'
+
+from werkzeug.serving import make_server
+
+from api import banana_deficiency_api as api
+from utils.process_memory import read_memory_usage
+
+# Runtimes whose loaded models can be inherited by forked children
+FORK_SAFE_RUNTIMES = ('tflite', 'onnx')
+
+
+def check_fork_safe(loader):
+    """
+    Check that a loaded model can be shared with forked workers
+
+    Returns:
+        None if forking is safe, otherwise the reason it is not
+    """
+    while loader is not None:
+        stats = loader.get_stats()
+        runtime = stats.get('runtime')
+        if runtime not in FORK_SAFE_RUNTIMES:
+            return f"the '{runtime}' runtime cannot be shared with forked workers (use a .tflite or .onnx model)"
+        if stats.get('num_threads', 1) != 1:
+            return f"{runtime} uses {stats['num_threads']} threads per inference; thread pools do not survive fork"
+        # The cascade's fast model is inherited as well
+        loader = loader.fast_loader
+    return None
+
+
+def log_memory(workers):
+    """Print memory usage of the parent and every worker"""
+    rows = [('parent', os.getpid())] + [(f"worker {index}", pid) for index, pid in sorted(workers.items())]
+    print(f"{'process':<12}{'pid':>8}{'RSS MB':>10}{'PSS MB':>10}{'USS MB':>10}{'shared MB':>11}")
+    total_pss = 0.0
+    for name, pid in rows:
+        usage = read_memory_usage(pid)
+        if usage is None:
+            print(f"{name:<12}{pid:>8}  (memory usage not available)")
+            continue
+        total_pss += usage['pss_mb']
+        print(f"{name:<12}{pid:>8}{usage['rss_mb']:>10.1f}{usage['pss_mb']:>10.1f}"
+              f"{usage['uss_mb']:>10.1f}{usage['shared_mb']:>11.1f}")
+    print(f"Total PSS: {total_pss:.1f} MB")
+
+
+def run_worker(listener, host, port):
+    """Serve requests from the inherited listening socket until killed"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+    server = make_server(host, port, api.app, threaded=True, fd=listener.fileno())
+    server.serve_forever()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Run the BananaDoc API as pre-forked workers')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WORKERS', 2)),
+                        help='Number of worker processes (default: $WORKERS or 2)')
+    parser.add_argument('--host', type=str, default=os.environ.get('HOST', '127.0.0.1'),
+                        help='Host to bind (default: $HOST or 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5002)),
+                        help='Port to bind (default: $PORT or 5002)')
+    args = parser.parse_args()
+
+    if not api.initialize_model():
+        print(f"Model could not be loaded: {api.model_state['error']}")
+        sys.exit(1)
+
+    reason = check_fork_safe(api.model_registry.get_version().loader)
+    if reason is not None:
+        print(f"Cannot pre-fork workers: {reason}")
+        sys.exit(1)
+
+    other_threads = [thread.name for thread in threading.enumerate() if thread is not threading.main_thread()]
+    if other_threads:
+        print(f"Warning: threads running before fork will not exist in the workers: {', '.join(other_threads)}")
+
+    if args.host == '0.0.0.0' and os.environ.get('FLASK_ENV') != 'development':
+        print("WARNING: Server is binding to 0.0.0.0. Ensure proper firewall rules are in place.")
+
+    listener = socket.socket(socket.AF_INET6 if ':' in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((args.host, args.port))
+    listener.listen(128)
+    listener.set_inheritable(True)
+
+    workers = {}
+    shutting_down = False
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(listener, args.host, args.port)
+            finally:
+                os._exit(1)
+        workers[index] = pid
+
+    def stop(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in workers.values():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGUSR1, lambda signum, frame: log_memory(workers))
+
+    for index in range(args.workers):
+        spawn(index)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} pre-forked workers "
+          f"(parent pid {os.getpid()}, send SIGUSR1 to log memory usage)")
+    log_memory(workers)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = next((index for index, worker_pid in workers.items() if worker_pid == pid), None)
+        if index is None:
+            continue
+        del workers[index]
+        if not shutting_down:
+            print(f"Worker {index} (pid {pid}) exited with status {status}, restarting")
+            # Avoid a tight restart loop if workers keep crashing
+            time.sleep(1)
+            spawn(index)
+
+    listener.close()
+    print("All workers stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Convert the trained Keras model to ONNX for serving with ONNX Runtime
+
+The exported model keeps a dynamic batch dimension and takes the same
+preprocessed float32 input as the Keras and TFLite models, so it can be
+served by setting MODEL_FILE=banana_nutrient_model.onnx. With --uint8-input it
+takes raw uint8 pixels instead, with preprocessing in the graph (see
+uint8_input.py).
+
+Requires: pip install tf2onnx onnxruntime
+
+Usage:
+    python convert_to_onnx.py --keras-model banana_nutrient_model.h5 \\
+        --output ../models_runtime/banana_nutrient_model.onnx [--uint8-input]
+"""
+import os
+import sys
+import argparse
+import numpy as np
+import tensorflow as tf
+
+from uint8_input import add_uint8_input, PREPROCESSING
+
+
+def convert_keras_to_onnx(keras_model_path, onnx_model_path, opset=13, uint8_input=False,
+                          preprocessing='efficientnet'):
+    """
+    Convert a Keras model to ONNX format
+
+    Args:
+        keras_model_path: Path to the Keras model file
+        onnx_model_path: Path to save the ONNX model
+        opset: ONNX opset version
+        uint8_input: Export a model that takes raw uint8 pixels
+        preprocessing: Backbone preprocessing baked in with uint8_input
+
+    Returns:
+        The loaded Keras model (used for verification)
+    """
+    import tf2onnx
+
+    print(f"Loading Keras model from: {keras_model_path}")
+    model = tf.keras.models.load_model(keras_model_path)
+
+    export_model = add_uint8_input(model, preprocessing) if uint8_input else model
+
+    # Leave only the batch dimension open so every batch size uses one graph
+    input_signature = [tf.TensorSpec((None,) + tuple(model.input_shape[1:]),
+                                     tf.uint8 if uint8_input else tf.float32, name='input')]
+    print(f"Converting to ONNX (opset {opset}, {'uint8' if uint8_input else 'float32'} input)...")
+    tf2onnx.convert.from_keras(export_model, input_signature=input_signature, opset=opset,
+                               output_path=onnx_model_path)
+
+    keras_size = os.path.getsize(keras_model_path) / (1024 * 1024)
+    onnx_size = os.path.getsize(onnx_model_path) / (1024 * 1024)
+    print(f"ONNX model saved to: {onnx_model_path}")
+    print(f"Keras model size: {keras_size:.2f} MB, ONNX model size: {onnx_size:.2f} MB")
+    return model
+
+
+def verify_onnx_model(model, onnx_model_path, num_images=16, tolerance=1e-4, seed=42):
+    """
+    Compare ONNX Runtime outputs with the Keras model on random inputs
+
+    Returns:
+        True if top-1 predictions agree and probabilities are within tolerance
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        print("onnxruntime not installed, skipping verification")
+        return True
+
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (num_images,) + tuple(model.input_shape[1:]), dtype=np.uint8)
+
+    keras_predictions = model.predict(pixels.astype(np.float32), verbose=0)
+    session = ort.InferenceSession(onnx_model_path, providers=['CPUExecutionProvider'])
+    onnx_input = session.get_inputs()[0]
+    # uint8-input exports get the raw pixels, float32 ones the preprocessed batch
+    img_batch = pixels if onnx_input.type == 'tensor(uint8)' else pixels.astype(np.float32)
+    onnx_predictions = session.run(None, {onnx_input.name: img_batch})[0]
+
+    max_diff = float(np.max(np.abs(keras_predictions - onnx_predictions)))
+    top1_match = bool(np.all(np.argmax(keras_predictions, axis=1) == np.argmax(onnx_predictions, axis=1)))
+    print(f"Verification on {num_images} images: max probability difference {max_diff:.2e}, "
+          f"top-1 {'matches' if top1_match else 'DIFFERS'}")
+    return top1_match and max_diff <= tolerance
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Convert a Keras model to ONNX')
+    parser.add_argument('--keras-model', type=str, default=os.path.join(script_dir, 'banana_nutrient_model.h5'),
+                        help='Trained Keras model (.h5 or .keras)')
+    parser.add_argument('--output', type=str, default=os.path.join(script_dir, 'banana_nutrient_model.onnx'),
+                        help='Output ONNX model path')
+    parser.add_argument('--opset', type=int, default=13, help='ONNX opset version (default: 13)')
+    parser.add_argument('--uint8-input', action='store_true',
+                        help='Export a model that takes raw uint8 pixels with preprocessing in the graph')
+    parser.add_argument('--preprocessing', type=str, default='efficientnet', choices=list(PREPROCESSING),
+                        help='Backbone preprocessing baked in with --uint8-input (default: efficientnet)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.keras_model):
+        print(f"Keras model not found: {args.keras_model}")
+        sys.exit(1)
+
+    keras_model = convert_keras_to_onnx(args.keras_model, args.output, opset=args.opset,
+                                        uint8_input=args.uint8_input, preprocessing=args.preprocessing)
+    if not verify_onnx_model(keras_model, args.output):
+        print("Warning: ONNX outputs differ from the Keras model beyond tolerance")
+        sys.exit(1)
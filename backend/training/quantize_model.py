@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Quantized TFLite export pipeline with an accuracy and latency report
+
+Converts a trained Keras model into float32, dynamic-range, float16 and
+full-integer int8 TFLite models using only builtin TFLite ops, then compares
+each variant against the Keras model on size, CPU latency and top-1 agreement.
+With --uint8-input the exported models take raw uint8 pixels (see uint8_input.py).
+
+Usage:
+    python quantize_model.py --keras-model banana_nutrient_model.h5 \\
+        --data-dir "/path/to/Version-2- Augmented Images of Banana leaves deficient in Nutrients"
+
+    # Models that take uint8 pixels, with normalization in the graph
+    python quantize_model.py --data-dir ... --uint8-input --preprocessing efficientnet
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.image_preprocessor import preprocess_pil_image_batch
+from utils.interpreter_pool import PooledInterpreter
+from uint8_input import add_uint8_input, PREPROCESSING
+
+QUANTIZATION_MODES = ('float32', 'dynamic', 'float16', 'int8')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def find_images(data_dir, excluded_class='Sulphur'):
+    """
+    Find all training images below a class-per-directory dataset
+
+    Args:
+        data_dir: Directory with one sub-directory per class
+        excluded_class: Class directory to skip (Sulphur is not trained on)
+
+    Returns:
+        Sorted list of image paths
+    """
+    image_paths = []
+    for class_name in sorted(os.listdir(data_dir)):
+        class_dir = os.path.join(data_dir, class_name)
+        if not os.path.isdir(class_dir) or class_name == excluded_class or class_name.startswith('.'):
+            continue
+        for file_name in sorted(os.listdir(class_dir)):
+            if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                image_paths.append(os.path.join(class_dir, file_name))
+    return image_paths
+
+
+def load_image_batch(image_paths, img_size=224):
+    """Load and preprocess images exactly as the API does"""
+    pil_images = [Image.open(path) for path in image_paths]
+    return preprocess_pil_image_batch(pil_images, target_size=(img_size, img_size))
+
+
+def convert(model, mode, representative_paths=None, img_size=224, uint8_input=False,
+            preprocessing='efficientnet', input_size=None):
+    """
+    Convert a Keras model to TFLite with the given quantization mode
+
+    Args:
+        model: Loaded Keras model
+        mode: One of QUANTIZATION_MODES
+        representative_paths: Images used to calibrate int8 activations
+        img_size: Model input size
+        uint8_input: Export a model that takes raw uint8 pixels
+        preprocessing: Backbone preprocessing baked in with uint8_input
+        input_size: Exported input size with uint8_input (default: img_size)
+
+    Returns:
+        Serialized TFLite model bytes
+    """
+    if uint8_input:
+        # int8 keeps a float graph input: the converter makes it uint8 with
+        # the calibrated range instead of adding a Cast op
+        model = add_uint8_input(model, preprocessing, input_size,
+                                input_dtype=tf.float32 if mode == 'int8' else tf.uint8)
+        img_size = input_size or img_size
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    # Builtin ops only: SELECT_TF_OPS would pull the Flex delegate (and most of
+    # TensorFlow) into the serving runtime
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+
+    if mode == 'dynamic':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif mode == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == 'int8':
+        if not representative_paths:
+            raise ValueError("int8 quantization needs representative images (--data-dir)")
+
+        def representative_dataset():
+            for i, path in enumerate(representative_paths):
+                img_batch = load_image_batch([path], img_size)
+                if uint8_input and i == 0:
+                    # Pin the calibrated input range to [0, 255] so the uint8
+                    # input gets scale 1 and zero point 0 and raw pixels can
+                    # be copied in unchanged
+                    img_batch[0, 0, 0] = (0.0, 255.0, 0.0)
+                yield [img_batch]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # Integer I/O; ModelLoader quantizes inputs and dequantizes outputs
+        converter.inference_input_type = tf.uint8 if uint8_input else tf.int8
+        converter.inference_output_type = tf.int8
+
+    return converter.convert()
+
+
+def list_ops(tflite_model):
+    """
+    List the operators used by a TFLite model
+
+    Returns:
+        Tuple of (sorted op names, non-builtin op names)
+    """
+    interpreter = tf.lite.Interpreter(model_content=tflite_model)
+    op_names = sorted({op['op_name'] for op in interpreter._get_ops_details()})
+    custom_ops = [name for name in op_names if name.startswith('Flex') or name == 'CUSTOM']
+    return op_names, custom_ops
+
+
+def run_tflite(tflite_model, img_batch, num_threads=1):
+    """
+    Run a TFLite model image by image and time each invocation
+
+    Returns:
+        Tuple of (probabilities array, list of latencies in ms)
+    """
+    pooled = PooledInterpreter(tf.lite.Interpreter(model_content=tflite_model, num_threads=num_threads))
+    predictions = []
+    latencies = []
+    for i in range(len(img_batch)):
+        started = time.perf_counter()
+        predictions.append(pooled.invoke(img_batch[i:i + 1])[0])
+        latencies.append((time.perf_counter() - started) * 1000.0)
+    return np.array(predictions), latencies
+
+
+def build_report(keras_model_path, data_dir, output_dir, modes=QUANTIZATION_MODES,
+                 num_representative=200, num_eval=200, num_threads=1, tolerance=0.01, seed=42,
+                 uint8_input=False, preprocessing='efficientnet', input_size=None):
+    """
+    Export every quantization mode and compare it against the Keras model
+
+    Args:
+        keras_model_path: Path to the trained Keras model
+        data_dir: Training image directory (class-per-directory)
+        output_dir: Where to write the TFLite models and the report
+        modes: Quantization modes to export
+        num_representative: Images used for int8 calibration
+        num_eval: Images used for latency and agreement measurement
+        num_threads: CPU threads for the TFLite interpreter
+        tolerance: Maximum allowed top-1 disagreement rate (0.01 = 1%)
+        seed: Random seed for image sampling
+        uint8_input: Export models that take raw uint8 pixels
+        preprocessing: Backbone preprocessing baked in with uint8_input
+        input_size: Exported input size with uint8_input (default: the model's)
+
+    Returns:
+        Report dictionary (also written to quantization_report.json)
+    """
+    print(f"Loading Keras model from: {keras_model_path}")
+    model = tf.keras.models.load_model(keras_model_path)
+    img_size = model.input_shape[1]
+
+    image_paths = find_images(data_dir)
+    if not image_paths:
+        raise ValueError(f"No images found in {data_dir}")
+    rng = random.Random(seed)
+    rng.shuffle(image_paths)
+    representative_paths = image_paths[:num_representative]
+    # Evaluate on images that were not used for calibration when possible
+    eval_paths = image_paths[num_representative:num_representative + num_eval] or image_paths[:num_eval]
+    print(f"Found {len(image_paths)} images: {len(representative_paths)} for calibration, "
+          f"{len(eval_paths)} for evaluation")
+
+    eval_batch = load_image_batch(eval_paths, img_size)
+    keras_predictions = model.predict(eval_batch, verbose=0)
+    keras_top1 = np.argmax(keras_predictions, axis=1)
+
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(keras_model_path))[0]
+    if uint8_input:
+        base_name += '_uint8'
+    report = {
+        'keras_model': keras_model_path,
+        'keras_size_mb': os.path.getsize(keras_model_path) / (1024 * 1024),
+        'num_eval_images': len(eval_paths),
+        'num_threads': num_threads,
+        'tolerance': tolerance,
+        'uint8_input': uint8_input,
+        'variants': {}
+    }
+
+    for mode in modes:
+        print(f"\nConverting ({mode})...")
+        try:
+            tflite_model = convert(model, mode, representative_paths, img_size, uint8_input=uint8_input,
+                                   preprocessing=preprocessing, input_size=input_size)
+        except Exception as e:
+            print(f"  Conversion failed: {e}")
+            report['variants'][mode] = {'error': str(e)}
+            continue
+
+        tflite_path = os.path.join(output_dir, f"{base_name}_{mode}.tflite")
+        with open(tflite_path, 'wb') as f:
+            f.write(tflite_model)
+
+        op_names, custom_ops = list_ops(tflite_model)
+        predictions, latencies = run_tflite(tflite_model, eval_batch, num_threads)
+        agreement = float(np.mean(np.argmax(predictions, axis=1) == keras_top1))
+
+        report['variants'][mode] = {
+            'path': tflite_path,
+            'size_mb': len(tflite_model) / (1024 * 1024),
+            'builtin_ops_only': not custom_ops,
+            'non_builtin_ops': custom_ops,
+            'ops': op_names,
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)),
+                'p90': float(np.percentile(latencies, 90)),
+                'p99': float(np.percentile(latencies, 99)),
+                'mean': float(np.mean(latencies)),
+            },
+            'top1_agreement': agreement,
+            'mean_abs_prob_diff': float(np.mean(np.abs(predictions - keras_predictions))),
+        }
+        variant = report['variants'][mode]
+        print(f"  Size: {variant['size_mb']:.2f} MB, p50: {variant['latency_ms']['p50']:.2f} ms, "
+              f"top-1 agreement: {agreement:.2%}, builtin ops only: {variant['builtin_ops_only']}")
+
+    # Pick the fastest variant that stays within tolerance and needs no Flex ops
+    candidates = [
+        (variant['latency_ms']['p50'], mode) for mode, variant in report['variants'].items()
+        if 'error' not in variant and variant['builtin_ops_only']
+        and 1.0 - variant['top1_agreement'] <= tolerance
+    ]
+    report['recommended'] = min(candidates)[1] if candidates else None
+
+    report_path = os.path.join(output_dir, 'quantization_report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_report(report)
+    print(f"\nReport saved to: {report_path}")
+    return report
+
+
+def print_report(report):
+    """Print the comparison table"""
+    print("\n=== QUANTIZATION REPORT ===")
+    print(f"Keras model: {report['keras_size_mb']:.2f} MB, {report['num_eval_images']} evaluation images, "
+          f"{report['num_threads']} thread(s)")
+    print(f"{'mode':<10}{'size MB':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'top-1':>10}{'builtin':>10}")
+    for mode, variant in report['variants'].items():
+        if 'error' in variant:
+            print(f"{mode:<10}  conversion failed: {variant['error']}")
+            continue
+        latency = variant['latency_ms']
+        print(f"{mode:<10}{variant['size_mb']:>10.2f}{latency['p50']:>10.2f}{latency['p90']:>10.2f}"
+              f"{latency['p99']:>10.2f}{variant['top1_agreement']:>10.2%}{str(variant['builtin_ops_only']):>10}")
+    print(f"Recommended (fastest within {report['tolerance']:.1%} top-1 tolerance): {report['recommended']}")
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Export and compare quantized TFLite models')
+    parser.add_argument('--keras-model', type=str, default=os.path.join(script_dir, 'banana_nutrient_model.h5'),
+                        help='Trained Keras model (.h5 or .keras)')
+    parser.add_argument('--data-dir', type=str, required=True, help='Training image directory (one folder per class)')
+    parser.add_argument('--output-dir', type=str, default=os.path.join(script_dir, 'quantized'),
+                        help='Output directory for models and report')
+    parser.add_argument('--modes', nargs='+', default=list(QUANTIZATION_MODES), choices=QUANTIZATION_MODES)
+    parser.add_argument('--num-representative', type=int, default=200, help='Calibration images for int8')
+    parser.add_argument('--num-eval', type=int, default=200, help='Evaluation images')
+    parser.add_argument('--num-threads', type=int, default=1, help='TFLite CPU threads')
+    parser.add_argument('--tolerance', type=float, default=0.01, help='Max top-1 disagreement rate')
+    parser.add_argument('--uint8-input', action='store_true',
+                        help='Export models that take raw uint8 pixels with preprocessing in the graph')
+    parser.add_argument('--preprocessing', type=str, default='efficientnet', choices=list(PREPROCESSING),
+                        help='Backbone preprocessing baked in with --uint8-input (default: efficientnet)')
+    parser.add_argument('--input-size', type=int,
+                        help='Exported input size with --uint8-input, resized in the graph (default: trained size)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.keras_model):
+        print(f"Keras model not found: {args.keras_model}")
+        sys.exit(1)
+
+    build_report(
+        args.keras_model, args.data_dir, args.output_dir, modes=args.modes,
+        num_representative=args.num_representative, num_eval=args.num_eval,
+        num_threads=args.num_threads, tolerance=args.tolerance,
+        uint8_input=args.uint8_input, preprocessing=args.preprocessing, input_size=args.input_size
+    )
@@ -285,17 +285,19 @@ class BananaLeafDeficiencyModelTrainer:
             # Convert to TFLite
             converter = tf.lite.TFLiteConverter.from_keras_model(self.model)
             
-            # Set optimization flags
-            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            # Builtin ops only, so the model runs without the Flex delegate.
+            # Quantized variants are produced by quantize_model.py.
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
             
-            # Try with more compatibility options if needed
-            converter.target_spec.supported_ops = [
-                tf.lite.OpsSet.TFLITE_BUILTINS,  # enable TensorFlow Lite ops
-                tf.lite.OpsSet.SELECT_TF_OPS     # enable TensorFlow ops
-            ]
-            
-            # Try the conversion
-            tflite_model = converter.convert()
+            try:
+                tflite_model = converter.convert()
+            except Exception as e:
+                print(f"Builtin-only conversion failed ({e}), retrying with SELECT_TF_OPS")
+                converter.target_spec.supported_ops = [
+                    tf.lite.OpsSet.TFLITE_BUILTINS,  # enable TensorFlow Lite ops
+                    tf.lite.OpsSet.SELECT_TF_OPS     # enable TensorFlow ops
+                ]
+                tflite_model = converter.convert()
             
             # Save the TFLite model
             tflite_path = os.path.join(os.path.dirname(__file__), 'banana_nutrient_model.tflite')
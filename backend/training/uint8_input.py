@@ -0,0 +1,49 @@
+"""
+Bake input preprocessing into exported models so they take raw uint8 pixels
+
+The EfficientNet and MobileNetV3 backbones need different preprocess_input
+functions. Wrapping a trained model with add_uint8_input puts the cast to
+float32, an optional resize and the backbone's preprocess_input inside the
+graph. The server then only feeds decoded RGB pixels, a quarter of the size
+of a float32 input, and keeps no model-specific normalization in Python.
+
+Used by quantize_model.py and convert_to_onnx.py (--uint8-input).
+"""
+import tensorflow as tf
+
+# preprocess_input of the Keras application each model is trained on
+PREPROCESSING = {
+    'efficientnet': tf.keras.applications.efficientnet.preprocess_input,
+    'mobilenet_v3': tf.keras.applications.mobilenet_v3.preprocess_input,
+}
+
+
+def add_uint8_input(model, preprocessing='efficientnet', input_size=None, input_dtype=tf.uint8):
+    """
+    Wrap a trained model so it accepts raw RGB pixels
+
+    Args:
+        model: Trained Keras model taking preprocessed float32 input
+        preprocessing: Backbone whose preprocess_input is baked in (a key of PREPROCESSING)
+        input_size: Side of the exported square input. The graph resizes it to
+            the trained size. Keep the default for server models: the API
+            already resizes with Pillow and feeds the trained size.
+        input_dtype: Dtype of the exported input. Full-integer TFLite export
+            keeps a float input and lets the converter turn it into uint8.
+
+    Returns:
+        Keras model with input shape (None, input_size, input_size, 3)
+    """
+    if preprocessing not in PREPROCESSING:
+        raise ValueError(f"preprocessing must be one of {tuple(PREPROCESSING)}")
+
+    height, width = model.input_shape[1:3]
+    input_size = input_size or height
+
+    inputs = tf.keras.Input(shape=(input_size, input_size, 3), dtype=input_dtype, name='pixels')
+    x = tf.cast(inputs, tf.float32)
+    if (input_size, input_size) != (height, width):
+        x = tf.keras.layers.Resizing(height, width, interpolation='bilinear')(x)
+    x = PREPROCESSING[preprocessing](x)
+    outputs = model(x, training=False)
+    return tf.keras.Model(inputs, outputs, name=f"{model.name}_uint8")
@@ -2,24 +2,111 @@
 Utility functions for banana leaf nutrient deficiency detection
 """
 
-from .image_preprocessor import (
-    load_and_preprocess_image,
-    preprocess_pil_image,
-    load_image_from_bytes,
-    decode_and_load_base64_image
-)
+import importlib
 
-from .model_loader import ModelLoader
-from .deficiency_info import DeficiencyInfoProvider
-from .gemini_handler import GeminiHandler, ConversationContext
+# Submodules are imported on first attribute access, so importing utils (or
+# one of its submodules) doesn't pull in the Gemini client or unused code
+_LAZY_ATTRIBUTES = {
+    'load_and_preprocess_image': 'image_preprocessor',
+    'preprocess_pil_image': 'image_preprocessor',
+    'pil_image_to_pixels': 'image_preprocessor',
+    'apply_jpeg_draft': 'image_preprocessor',
+    'preprocess_pil_image_batch': 'image_preprocessor',
+    'load_image_from_bytes': 'image_preprocessor',
+    'load_image_pixels': 'image_preprocessor',
+    'open_image_bytes': 'image_preprocessor',
+    'sniff_image_format': 'image_preprocessor',
+    'read_image_header': 'image_preprocessor',
+    'IMAGE_SIGNATURES': 'image_preprocessor',
+    'decode_base64_payload': 'image_preprocessor',
+    'perceptual_hash': 'image_preprocessor',
+    'build_tta_batch': 'image_preprocessor',
+    'TTA_AUGMENTATIONS': 'image_preprocessor',
+    'plan_tile_grid': 'image_preprocessor',
+    'build_tile_batch': 'image_preprocessor',
+    'load_image_tiles': 'image_preprocessor',
+    'decode_and_load_base64_image': 'image_preprocessor',
+    'ModelLoader': 'model_loader',
+    'InferenceBackend': 'inference_backends',
+    'KerasBackend': 'inference_backends',
+    'TFLiteBackend': 'inference_backends',
+    'OnnxBackend': 'inference_backends',
+    'BatchScheduler': 'batch_scheduler',
+    'DecodePool': 'decode_pool',
+    'DecodeQueueFullError': 'decode_pool',
+    'InterpreterPool': 'interpreter_pool',
+    'ModelRegistry': 'model_registry',
+    'ModelVersion': 'model_registry',
+    'ModelVersionError': 'model_registry',
+    'ModelServer': 'model_server',
+    'ModelServerClient': 'model_server',
+    'ModelServerError': 'model_server',
+    'PredictionCache': 'prediction_cache',
+    'NearDuplicateIndex': 'near_duplicate_index',
+    'ImageQualityGate': 'image_quality',
+    'ImageQualityError': 'image_quality',
+    'read_memory_usage': 'process_memory',
+    'DeficiencyInfoProvider': 'deficiency_info',
+    'GeminiHandler': 'gemini_handler',
+    'AsyncGeminiClient': 'gemini_async_client',
+    'GeminiAPIError': 'gemini_async_client',
+    'ConversationContext': 'gemini_handler'
+}
 
 __all__ = [
     'load_and_preprocess_image',
     'preprocess_pil_image',
+    'pil_image_to_pixels',
+    'apply_jpeg_draft',
+    'preprocess_pil_image_batch',
     'load_image_from_bytes',
+    'load_image_pixels',
+    'open_image_bytes',
+    'sniff_image_format',
+    'read_image_header',
+    'IMAGE_SIGNATURES',
+    'decode_base64_payload',
+    'perceptual_hash',
+    'build_tta_batch',
+    'TTA_AUGMENTATIONS',
+    'plan_tile_grid',
+    'build_tile_batch',
+    'load_image_tiles',
     'decode_and_load_base64_image',
     'ModelLoader',
+    'InferenceBackend',
+    'KerasBackend',
+    'TFLiteBackend',
+    'OnnxBackend',
+    'BatchScheduler',
+    'DecodePool',
+    'DecodeQueueFullError',
+    'InterpreterPool',
+    'ModelRegistry',
+    'ModelVersion',
+    'ModelVersionError',
+    'ModelServer',
+    'ModelServerClient',
+    'ModelServerError',
+    'PredictionCache',
+    'NearDuplicateIndex',
+    'ImageQualityGate',
+    'ImageQualityError',
+    'read_memory_usage',
     'DeficiencyInfoProvider',
     'GeminiHandler',
+    'AsyncGeminiClient',
+    'GeminiAPIError',
     'ConversationContext'
-] 
\ No newline at end of file
+] 
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,230 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class _PendingRequest:
+    """A single image waiting to be included in a batch"""
+
+    __slots__ = ('img_array', 'enqueued_at', 'done', 'result', 'error')
+
+    def __init__(self, img_array):
+        self.img_array = img_array
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BatchScheduler:
+    """
+    Dynamic micro-batching scheduler in front of ModelLoader.predict_batch
+
+    Concurrent callers submit single preprocessed images. A background worker
+    collects them for up to `max_wait_ms` (or until `max_batch_size` images are
+    queued), runs one batched forward pass and hands each caller its own row
+    of probabilities.
+
+    With several workers, one of them forms the next batch while the others
+    run theirs, so formed batches use the loader's interpreter pool (or a
+    thread-safe session) in parallel instead of queueing behind one thread.
+    """
+
+    def __init__(self, model_loader, max_batch_size=8, max_wait_ms=5.0, num_workers=1):
+        """
+        Initialize the batch scheduler
+
+        Args:
+            model_loader: ModelLoader instance used for the batched forward pass
+            max_batch_size: Maximum number of images per forward pass
+            max_wait_ms: Maximum time the first queued image waits for others
+            num_workers: Batches run concurrently (match the interpreter pool size)
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+
+        self.model_loader = model_loader
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000.0
+        self.num_workers = int(num_workers)
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._workers = []
+        self._collecting = False
+        self._running = False
+
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._batches = 0
+        self._requests = 0
+        self._batch_size_counts = {}
+        self._peak_queue_depth = 0
+        self._total_queue_wait = 0.0
+        self._max_queue_wait = 0.0
+        self._total_inference_time = 0.0
+        self._running_batches = 0
+        self._peak_running_batches = 0
+
+    def start(self):
+        """Start the background worker threads (no-op if already running)"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._workers = [
+                threading.Thread(target=self._worker_loop, name=f'batch-scheduler-{i}', daemon=True)
+                for i in range(self.num_workers)
+            ]
+            for worker in self._workers:
+                worker.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop the worker threads after the queue has been drained
+
+        Args:
+            timeout: Seconds to wait for each worker to exit
+        """
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def submit(self, img_array, timeout=None):
+        """
+        Queue a preprocessed image and block until its prediction is ready
+
+        Args:
+            img_array: Preprocessed image array of shape (1, H, W, C) or (H, W, C)
+            timeout: Maximum seconds to wait for the result (None waits forever)
+
+        Returns:
+            Array of prediction probabilities for this image
+        """
+        if img_array.ndim == 4:
+            if img_array.shape[0] != 1:
+                raise ValueError("submit() expects a single image; use ModelLoader.predict_batch for batches")
+            img_array = img_array[0]
+
+        if not self._running:
+            self.start()
+
+        pending = _PendingRequest(img_array)
+        with self._condition:
+            self._queue.append(pending)
+            depth = len(self._queue)
+            # Wake the worker forming a batch as well as any idle ones
+            self._condition.notify_all()
+        with self._stats_lock:
+            self._peak_queue_depth = max(self._peak_queue_depth, depth)
+
+        if not pending.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for batched prediction")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect_batch(self):
+        """Wait for the batching window to close and pop the next batch"""
+        with self._condition:
+            # One worker at a time forms a batch, so concurrent requests are
+            # not split across half-empty batches
+            while self._running and (not self._queue or self._collecting):
+                self._condition.wait()
+            if not self._queue:
+                return []
+
+            self._collecting = True
+            try:
+                deadline = self._queue[0].enqueued_at + self.max_wait
+                while self._running and len(self._queue) < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                size = min(len(self._queue), self.max_batch_size)
+                return [self._queue.popleft() for _ in range(size)]
+            finally:
+                self._collecting = False
+                self._condition.notify_all()
+
+    def _worker_loop(self):
+        while True:
+            batch = self._collect_batch()
+            if not batch:
+                if not self._running:
+                    return
+                continue
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        with self._stats_lock:
+            self._running_batches += 1
+            self._peak_running_batches = max(self._peak_running_batches, self._running_batches)
+        started = time.perf_counter()
+        try:
+            if len(batch) == 1:
+                # A lone request skips stacking and uses the single-image path
+                batch[0].result = self.model_loader.predict(batch[0].img_array)
+            else:
+                img_batch = np.stack([pending.img_array for pending in batch])
+                predictions = self.model_loader.predict_batch(img_batch)
+                for i, pending in enumerate(batch):
+                    pending.result = predictions[i]
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+        finished = time.perf_counter()
+
+        waits = [started - pending.enqueued_at for pending in batch]
+        with self._stats_lock:
+            self._running_batches -= 1
+            self._batches += 1
+            self._requests += len(batch)
+            self._batch_size_counts[len(batch)] = self._batch_size_counts.get(len(batch), 0) + 1
+            self._total_queue_wait += sum(waits)
+            self._max_queue_wait = max(self._max_queue_wait, max(waits))
+            self._total_inference_time += finished - started
+
+        for pending in batch:
+            pending.done.set()
+
+    def get_stats(self):
+        """
+        Get batching statistics
+
+        Returns:
+            Dictionary with batch-size distribution, queue-wait timings and
+            the number of batches running at once
+        """
+        with self._stats_lock:
+            batches = self._batches
+            requests = self._requests
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'num_workers': self.num_workers,
+                'running_batches': self._running_batches,
+                'peak_running_batches': self._peak_running_batches,
+                'queue_depth': len(self._queue),
+                'peak_queue_depth': self._peak_queue_depth,
+                'batches': batches,
+                'requests': requests,
+                'mean_batch_size': (requests / batches) if batches else 0.0,
+                'batch_size_histogram': dict(sorted(self._batch_size_counts.items())),
+                'mean_queue_wait_ms': (self._total_queue_wait / requests * 1000.0) if requests else 0.0,
+                'max_queue_wait_ms': self._max_queue_wait * 1000.0,
+                'mean_inference_ms': (self._total_inference_time / batches * 1000.0) if batches else 0.0,
+            }
@@ -0,0 +1,216 @@
+import queue
+import threading
+import time
+
+
+class DecodeQueueFullError(Exception):
+    """Raised when the decode queue stays full for longer than the queue timeout"""
+
+
+class _DecodeTask:
+    """One decode/preprocess job and its result"""
+
+    __slots__ = ('fn', 'args', 'kwargs', 'enqueued_at', 'done', 'result', 'error')
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self, timeout=None):
+        """
+        Block until the task has run
+
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+
+        Returns:
+            The task's return value (its exception is re-raised)
+        """
+        if not self.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for image decoding")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class DecodePool:
+    """
+    Worker pool for the decode/preprocess stage of the request path
+
+    Request threads hand image decoding and resizing to a fixed set of worker
+    threads through a bounded queue and wait for the pixels, which they then
+    pass on to the inference stage (the batch scheduler or the model).
+    Pillow releases the GIL while decoding and resizing, so decodes run in
+    parallel with each other and with inference. The pool size caps how many
+    decodes compete for CPU with the model. The queue bound applies
+    backpressure when decoding falls behind.
+    """
+
+    def __init__(self, num_workers=2, max_queue_size=32, queue_timeout=1.0):
+        """
+        Initialize the decode pool
+
+        Args:
+            num_workers: Number of decode worker threads
+            max_queue_size: Maximum number of decodes waiting for a worker
+            queue_timeout: Seconds to wait for a queue slot before rejecting
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size must be at least 1")
+
+        self.num_workers = int(num_workers)
+        self.max_queue_size = int(max_queue_size)
+        self.queue_timeout = max(float(queue_timeout), 0.0)
+
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._workers = []
+        self._lifecycle_lock = threading.Lock()
+        self._running = False
+
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._tasks = 0
+        self._errors = 0
+        self._rejected = 0
+        self._busy = 0
+        self._peak_queue_depth = 0
+        self._total_queue_wait = 0.0
+        self._max_queue_wait = 0.0
+        self._total_decode_time = 0.0
+        self._max_decode_time = 0.0
+
+    def start(self):
+        """Start the worker threads (no-op if already running)"""
+        with self._lifecycle_lock:
+            if self._running:
+                return
+            self._running = True
+            self._workers = [
+                threading.Thread(target=self._worker_loop, name=f'decode-worker-{i}', daemon=True)
+                for i in range(self.num_workers)
+            ]
+            for worker in self._workers:
+                worker.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop the worker threads after the queued decodes have run
+
+        Args:
+            timeout: Seconds to wait for each worker to exit
+        """
+        with self._lifecycle_lock:
+            if not self._running:
+                return
+            self._running = False
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            # One sentinel per worker, queued behind the pending decodes
+            self._queue.put(None)
+        for worker in workers:
+            worker.join(timeout)
+
+    def enqueue(self, fn, *args, **kwargs):
+        """
+        Queue a decode job without waiting for it to run
+
+        Args:
+            fn: Callable doing the decoding, e.g. load_image_pixels
+            *args, **kwargs: Arguments for fn
+
+        Returns:
+            Task whose wait() returns fn's result
+        """
+        if not self._running:
+            self.start()
+
+        task = _DecodeTask(fn, args, kwargs)
+        try:
+            self._queue.put(task, timeout=self.queue_timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            raise DecodeQueueFullError(
+                f"Decode queue is full ({self.max_queue_size} images waiting for {self.num_workers} worker(s))"
+            )
+
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._peak_queue_depth = max(self._peak_queue_depth, depth)
+        return task
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Run a decode job on the pool and block until it is done
+
+        Returns:
+            fn's return value
+        """
+        return self.enqueue(fn, *args, **kwargs).wait()
+
+    def _worker_loop(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            self._run_task(task)
+
+    def _run_task(self, task):
+        started = time.perf_counter()
+        with self._stats_lock:
+            self._busy += 1
+        try:
+            task.result = task.fn(*task.args, **task.kwargs)
+        except Exception as e:
+            task.error = e
+        finished = time.perf_counter()
+
+        queue_wait = started - task.enqueued_at
+        decode_time = finished - started
+        with self._stats_lock:
+            self._busy -= 1
+            self._tasks += 1
+            if task.error is not None:
+                self._errors += 1
+            self._total_queue_wait += queue_wait
+            self._max_queue_wait = max(self._max_queue_wait, queue_wait)
+            self._total_decode_time += decode_time
+            self._max_decode_time = max(self._max_decode_time, decode_time)
+
+        # Drop the references so the image buffers can be freed early
+        task.fn = task.args = task.kwargs = None
+        task.done.set()
+
+    def get_stats(self):
+        """
+        Get decode stage statistics
+
+        Returns:
+            Dictionary with worker usage, queue depth and queue-wait and
+            decode timings
+        """
+        with self._stats_lock:
+            tasks = self._tasks
+            return {
+                'workers': self.num_workers,
+                'busy_workers': self._busy,
+                'max_queue_size': self.max_queue_size,
+                'queue_depth': self._queue.qsize(),
+                'peak_queue_depth': self._peak_queue_depth,
+                'tasks': tasks,
+                'errors': self._errors,
+                'rejected': self._rejected,
+                'mean_queue_wait_ms': (self._total_queue_wait / tasks * 1000.0) if tasks else 0.0,
+                'max_queue_wait_ms': self._max_queue_wait * 1000.0,
+                'mean_decode_ms': (self._total_decode_time / tasks * 1000.0) if tasks else 0.0,
+                'max_decode_ms': self._max_decode_time * 1000.0,
+            }
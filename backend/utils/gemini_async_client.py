@@ -0,0 +1,205 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Try to import aiohttp, but handle gracefully if not installed
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Public Gemini REST endpoint; point it at benchmarks/gemini_stub_server.py for tests
+DEFAULT_BASE_URL = 'https://generativelanguage.googleapis.com'
+DEFAULT_MODEL = 'models/gemini-2.0-flash-lite'
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class GeminiAPIError(Exception):
+    """Raised when the Gemini REST API answers with an error status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Gemini API error {status}: {message}")
+        self.status = status
+        self.retryable = status in RETRYABLE_STATUSES
+
+
+class AsyncGeminiClient:
+    """
+    Gemini REST client for asyncio
+
+    All requests share one aiohttp session whose connector keeps up to
+    max_connections keep-alive connections open, so concurrent conversations
+    reuse TLS connections instead of opening one per call. While a call waits
+    for the model, the event loop serves other requests, so one worker
+    process can hold many conversations at once.
+
+    Rate limiting, timeouts and transient server errors are retried with
+    exponential backoff, like GeminiHandler.process_query.
+    """
+
+    def __init__(self, api_key: str, model: str = DEFAULT_MODEL, base_url: str = DEFAULT_BASE_URL,
+                 max_connections: int = 32, timeout: float = 60.0, max_retries: int = 3,
+                 retry_delay: float = 3.0):
+        """
+        Initialize the client (the HTTP session is created on first use)
+
+        Args:
+            api_key: API key for Google's Gemini API
+            model: Model name, e.g. 'models/gemini-2.0-flash-lite'
+            base_url: API root URL
+            max_connections: Maximum open connections in the pool
+            timeout: Seconds allowed for one call, including reading the response
+            max_retries: Attempts per call for retryable errors
+            retry_delay: Seconds before the first retry, doubled for each further retry
+        """
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("The async Gemini client needs aiohttp (pip install aiohttp)")
+
+        self.api_key = api_key
+        self.model = model if model.startswith('models/') else f"models/{model}"
+        self.base_url = base_url.rstrip('/')
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_retries = max(int(max_retries), 1)
+        self.retry_delay = retry_delay
+
+        self._session = None
+
+        self._requests = 0
+        self._errors = 0
+        self._retries = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._connections_opened = 0
+        self._connections_reused = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    @property
+    def endpoint(self) -> str:
+        """URL of the generateContent method for the configured model"""
+        return f"{self.base_url}/v1beta/{self.model}:generateContent"
+
+    async def _get_session(self) -> 'aiohttp.ClientSession':
+        # The session binds to the running event loop, so it is created lazily
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_created)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'x-goog-api-key': self.api_key},
+                trace_configs=[trace_config]
+            )
+        return self._session
+
+    async def _on_connection_created(self, session, context, params) -> None:
+        self._connections_opened += 1
+
+    async def _on_connection_reused(self, session, context, params) -> None:
+        self._connections_reused += 1
+
+    async def close(self) -> None:
+        """Close the pooled connections"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> 'AsyncGeminiClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def generate_content(self, prompt: str,
+                               generation_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Generate a response for a single-turn prompt
+
+        Args:
+            prompt: Full prompt text
+            generation_config: Sampling settings, e.g. {'temperature': 0.7,
+                'max_output_tokens': 2048} (snake_case keys are accepted)
+
+        Returns:
+            Decoded JSON response of generateContent
+        """
+        body = {'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]}
+        if generation_config:
+            body['generationConfig'] = {_camel_case(key): value for key, value in generation_config.items()}
+
+        session = await self._get_session()
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        started = time.perf_counter()
+        try:
+            for attempt in range(self.max_retries):
+                try:
+                    async with session.post(self.endpoint, json=body) as response:
+                        if response.status != 200:
+                            raise GeminiAPIError(response.status, (await response.text())[:200])
+                        return await response.json()
+                except (GeminiAPIError, asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                    retryable = not isinstance(e, GeminiAPIError) or e.retryable
+                    if not retryable or attempt == self.max_retries - 1:
+                        self._errors += 1
+                        raise
+                    wait_time = self.retry_delay * (2 ** attempt)
+                    print(f"Retryable Gemini error ({e}). Waiting {wait_time}s before retry "
+                          f"{attempt + 2}/{self.max_retries}...")
+                    self._retries += 1
+                    await asyncio.sleep(wait_time)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._in_flight -= 1
+            self._requests += 1
+            self._total_latency += elapsed
+            self._max_latency = max(self._max_latency, elapsed)
+
+    @staticmethod
+    def extract_text(response: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        """
+        Get the generated text of a generateContent response
+
+        Returns:
+            Tuple of (text of all parts of the first candidate, finish reason)
+        """
+        candidates = response.get('candidates') or []
+        if not candidates:
+            return '', None
+        parts = candidates[0].get('content', {}).get('parts', [])
+        text = ''.join(part.get('text', '') for part in parts)
+        return text.strip(), candidates[0].get('finishReason')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get client statistics
+
+        Returns:
+            Dictionary with call, error and retry counts, calls in flight,
+            pooled connection usage and call latency
+        """
+        requests = self._requests
+        return {
+            'model': self.model,
+            'max_connections': self.max_connections,
+            'requests': requests,
+            'errors': self._errors,
+            'retries': self._retries,
+            'in_flight': self._in_flight,
+            'peak_in_flight': self._peak_in_flight,
+            'connections_opened': self._connections_opened,
+            'connections_reused': self._connections_reused,
+            'mean_latency_ms': (self._total_latency / requests * 1000.0) if requests else 0.0,
+            'max_latency_ms': self._max_latency * 1000.0,
+        }
+
+
+def _camel_case(key: str) -> str:
+    """max_output_tokens -> maxOutputTokens (the REST API's field names)"""
+    first, *rest = key.split('_')
+    return first + ''.join(word.capitalize() for word in rest)
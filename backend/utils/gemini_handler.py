@@ -1,6 +1,7 @@
 import os
 import json
 import time
+import asyncio
 from typing import List, Dict, Any, Optional
 
 # Try to import google.generativeai, but handle gracefully if not installed
@@ -112,17 +113,32 @@ class ConversationContext:
 class GeminiHandler:
     """Handler for interactions with Gemini LLM API"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Generation parameters for consistent, context-aware responses
+    GENERATION_CONFIG = {
+        'temperature': 0.7,
+        'top_p': 0.9,
+        'top_k': 40,
+        'max_output_tokens': 2048,  # Balanced for good responses without timeout
+    }
+    
+    def __init__(self, api_key: Optional[str] = None, init_model: bool = True):
         """
         Initialize the Gemini handler
         
         Args:
             api_key: API key for Google's Gemini API (can be set via env var GEMINI_API_KEY)
+            init_model: Set up the google-generativeai model used by process_query
+                (process_query_async calls the API through its own client)
         """
         self.api_key = api_key or os.environ.get('GEMINI_API_KEY', '')
         self.context_manager = ConversationContext()
         self.model = None
         
+        if init_model:
+            self._init_model()
+    
+    def _init_model(self) -> None:
+        """Configure google-generativeai and pick the first model that initializes"""
         # Check if API key is available
         if not self.api_key:
             print("Warning: No Gemini API key provided. Set GEMINI_API_KEY environment variable.")
@@ -240,6 +256,62 @@ class GeminiHandler:
             f"about this specific case while providing comprehensive information."
         )
     
+    def build_prompt(self, user_query: str) -> str:
+        """
+        Build the full prompt for a query: system prompt with the diagnosis
+        context, language instruction and conversation history
+        
+        Args:
+            user_query: The user's query
+            
+        Returns:
+            Prompt text sent to the model
+        """
+        system_prompt = self.format_system_prompt()
+        
+        # Detect language preference from query and add strong language instruction
+        language_instruction = ""
+        query_lower = user_query.lower()
+        if "tagalog" in query_lower or "filipino" in query_lower:
+            language_instruction = (
+                "\n\n🚨 MAHALAGANG TAGUBILIN SA WIKA 🚨\n"
+                "DAPAT kang sumagot ng BUONG TAGALOG/FILIPINO lamang.\n"
+                "HUWAG gumamit ng mga salitang Ingles. Gumamit ng purong Tagalog/Filipino sa buong sagot.\n\n"
+                "ISALIN ang LAHAT ng teknikal na termino:\n"
+                "- 'calcium' → 'kaltsyum' o 'calcium (kaltsyum)'\n"
+                "- 'nitrogen' → 'nitroheno'\n"
+                "- 'potassium' → 'potasyum'\n"
+                "- 'phosphorus' → 'posporus'\n"
+                "- 'magnesium' → 'magnesyum'\n"
+                "- 'deficiency' → 'kakulangan'\n"
+                "- 'fertilizer' → 'pataba' o 'abono'\n"
+                "- 'symptoms' → 'mga sintomas' o 'mga palatandaan'\n"
+                "- 'treatment' → 'paggamot' o 'solusyon'\n"
+                "- 'prevention' → 'pag-iwas'\n"
+                "- 'apply' → 'ilagay' o 'maglagay'\n"
+                "- 'soil' → 'lupa'\n"
+                "- 'leaves' → 'mga dahon'\n"
+                "- 'foliar spray' → 'pang-spray sa dahon'\n"
+                "- 'product' → 'produkto'\n"
+                "- 'available' → 'mabibili' o 'makukuha'\n\n"
+                "Para sa mga pangalan ng produkto (Calcium Nitrate, etc.), isulat: 'Calcium Nitrate (Kaltsyum Nitrate)'\n"
+                "MANDATORY: Sumagot ng 100% Tagalog/Filipino. Walang halong Ingles maliban sa mga brand name.\n"
+            )
+        elif "english" in query_lower:
+            language_instruction = (
+                "\n\nLANGUAGE: Respond in clear, simple English that Filipino farmers can easily understand.\n"
+            )
+        
+        # Format conversation history as text for context
+        conversation_context = self._format_conversation_context()
+        
+        # Build the complete prompt with system context and conversation history
+        if conversation_context:
+            full_prompt = f"{system_prompt}{language_instruction}\n\n{conversation_context}\n\nUser's current question: {user_query}\n\nPlease provide a helpful, contextually-aware response based on the diagnosis information and conversation history above."
+        else:
+            full_prompt = f"{system_prompt}{language_instruction}\n\nUser's question: {user_query}\n\nPlease provide a helpful response based on the diagnosis information above."
+        return full_prompt
+    
     def process_query(self, user_query: str) -> str:
         """
         Process a user query with context awareness using Gemini API
@@ -257,58 +329,7 @@ class GeminiHandler:
                 return self._fallback_response(user_query)
             
             # Build the full context prompt
-            system_prompt = self.format_system_prompt()
-            
-            # Detect language preference from query and add strong language instruction
-            language_instruction = ""
-            query_lower = user_query.lower()
-            if "tagalog" in query_lower or "filipino" in query_lower:
-                language_instruction = (
-                    "\n\n🚨 MAHALAGANG TAGUBILIN SA WIKA 🚨\n"
-                    "DAPAT kang sumagot ng BUONG TAGALOG/FILIPINO lamang.\n"
-                    "HUWAG gumamit ng mga salitang Ingles. Gumamit ng purong Tagalog/Filipino sa buong sagot.\n\n"
-                    "ISALIN ang LAHAT ng teknikal na termino:\n"
-                    "- 'calcium' → 'kaltsyum' o 'calcium (kaltsyum)'\n"
-                    "- 'nitrogen' → 'nitroheno'\n"
-                    "- 'potassium' → 'potasyum'\n"
-                    "- 'phosphorus' → 'posporus'\n"
-                    "- 'magnesium' → 'magnesyum'\n"
-                    "- 'deficiency' → 'kakulangan'\n"
-                    "- 'fertilizer' → 'pataba' o 'abono'\n"
-                    "- 'symptoms' → 'mga sintomas' o 'mga palatandaan'\n"
-                    "- 'treatment' → 'paggamot' o 'solusyon'\n"
-                    "- 'prevention' → 'pag-iwas'\n"
-                    "- 'apply' → 'ilagay' o 'maglagay'\n"
-                    "- 'soil' → 'lupa'\n"
-                    "- 'leaves' → 'mga dahon'\n"
-                    "- 'foliar spray' → 'pang-spray sa dahon'\n"
-                    "- 'product' → 'produkto'\n"
-                    "- 'available' → 'mabibili' o 'makukuha'\n\n"
-                    "Para sa mga pangalan ng produkto (Calcium Nitrate, etc.), isulat: 'Calcium Nitrate (Kaltsyum Nitrate)'\n"
-                    "MANDATORY: Sumagot ng 100% Tagalog/Filipino. Walang halong Ingles maliban sa mga brand name.\n"
-                )
-            elif "english" in query_lower:
-                language_instruction = (
-                    "\n\nLANGUAGE: Respond in clear, simple English that Filipino farmers can easily understand.\n"
-                )
-            
-            # Format conversation history as text for context
-            conversation_context = self._format_conversation_context()
-            
-            # Build the complete prompt with system context and conversation history
-            if conversation_context:
-                full_prompt = f"{system_prompt}{language_instruction}\n\n{conversation_context}\n\nUser's current question: {user_query}\n\nPlease provide a helpful, contextually-aware response based on the diagnosis information and conversation history above."
-            else:
-                full_prompt = f"{system_prompt}{language_instruction}\n\nUser's question: {user_query}\n\nPlease provide a helpful response based on the diagnosis information above."
-            
-            # Generate response using the model
-            # Configure generation parameters for consistent, context-aware responses
-            generation_config = {
-                'temperature': 0.7,
-                'top_p': 0.9,
-                'top_k': 40,
-                'max_output_tokens': 2048,  # Balanced for good responses without timeout
-            }
+            full_prompt = self.build_prompt(user_query)
             
             # Retry logic with exponential backoff for rate limiting and timeout errors
             max_retries = 3
@@ -320,7 +341,7 @@ class GeminiHandler:
                 try:
                     response = self.model.generate_content(
                         full_prompt,
-                        generation_config=generation_config
+                        generation_config=self.GENERATION_CONFIG
                     )
                     break  # Success, exit retry loop
                 except Exception as retry_error:
@@ -384,6 +405,39 @@ class GeminiHandler:
             # Fallback to context-aware response on error
             return self._fallback_response(user_query)
     
+    async def process_query_async(self, user_query: str, client) -> str:
+        """
+        Process a user query on an event loop with an AsyncGeminiClient
+        
+        Builds the same prompt as process_query, but the Gemini call goes
+        through the client's pooled keep-alive connections (retrying like
+        process_query) and the event loop serves other conversations while
+        it waits.
+        
+        Args:
+            user_query: The user's query
+            client: AsyncGeminiClient, or None to use fallback responses
+            
+        Returns:
+            The LLM's response
+        """
+        if client is None:
+            return self._fallback_response(user_query)
+        
+        try:
+            response = await client.generate_content(self.build_prompt(user_query), self.GENERATION_CONFIG)
+            llm_response, finish_reason = client.extract_text(response)
+            if finish_reason == 'MAX_TOKENS':
+                print(f"Warning: Response may have been truncated due to max_output_tokens limit")
+            
+            # Saving the turn writes the context file, so it runs off the event loop
+            await asyncio.to_thread(self.context_manager.add_conversation_turn, user_query, llm_response)
+            return llm_response
+        
+        except Exception as e:
+            print(f"Error processing query with Gemini API: {e}")
+            return self._fallback_response(user_query)
+    
     def _fallback_response(self, user_query: str) -> str:
         """
         Fallback response when Gemini API is not available
@@ -1,8 +1,31 @@
+import sys
+import base64
+import binascii
+from io import BytesIO
+
 import numpy as np
 from PIL import Image
-import tensorflow as tf
-from tensorflow.keras.preprocessing import image
-from tensorflow.keras.applications.efficientnet import preprocess_input
+
+# Preprocessing is pure NumPy/Pillow so that TFLite deployments never import
+# TensorFlow. It matches tf.keras.preprocessing and the Keras applications'
+# preprocess_input for the models we serve.
+
+def preprocess_input(img_array):
+    """
+    Model-specific input normalization
+    
+    EfficientNet and MobileNetV3 rescale inside the model graph, so Keras'
+    efficientnet.preprocess_input is a pass-through: the model expects float32
+    RGB values in [0, 255]. Models exported with --uint8-input (see
+    training/uint8_input.py) take the uint8 pixels directly instead.
+    
+    Args:
+        img_array: Image array of RGB values in [0, 255]
+        
+    Returns:
+        The array as float32
+    """
+    return np.asarray(img_array, dtype=np.float32)
 
 def load_and_preprocess_image(img_path, target_size=(224, 224)):
     """
@@ -15,42 +38,400 @@ def load_and_preprocess_image(img_path, target_size=(224, 224)):
     Returns:
         Preprocessed image array ready for model prediction
     """
-    img = image.load_img(img_path, target_size=target_size)
-    return preprocess_pil_image(img)
+    img = Image.open(img_path)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    # Nearest-neighbour resize, the same as tf.keras.preprocessing.image.load_img
+    img = img.resize(target_size, Image.NEAREST)
+    return preprocess_pil_image(img, target_size)
 
-def preprocess_pil_image(pil_img, target_size=(224, 224)):
+def apply_jpeg_draft(pil_img, target_size=(224, 224)):
     """
-    Preprocess a PIL Image object
+    Let the JPEG decoder downscale in the DCT domain
+    
+    libjpeg can decode at 1/2, 1/4 or 1/8 scale for a fraction of the cost of
+    a full decode, which skips most of the work for phone photos many times
+    larger than the model input. The smallest scale that is still at least
+    target_size is picked, so the final resize always downsamples.
+    
+    Must be called before the pixel data is loaded; other formats and
+    already loaded images are left unchanged.
+    
+    Args:
+        pil_img: Lazily opened PIL Image object
+        target_size: Size the image will be resized to
+        
+    Returns:
+        The same PIL Image object
+    """
+    if pil_img.format == 'JPEG':
+        pil_img.draft('RGB', tuple(target_size))
+    return pil_img
+
+def pil_image_to_pixels(pil_img, target_size=(224, 224), draft=False, out=None):
+    """
+    Resize a PIL Image and return its RGB pixels without converting them
+    
+    The models take RGB values in [0, 255], so the uint8 pixels are already a
+    valid model input. Inference backends cast them while copying into their
+    own input buffer, which skips the float32 array preprocess_pil_image
+    builds.
     
     Args:
         pil_img: PIL Image object
         target_size: Size to resize the image to (default: 224x224)
+        draft: Decode JPEGs close to target_size first (see apply_jpeg_draft)
+        out: Optional uint8 array of shape (height, width, 3), e.g. one row of
+            a preallocated batch, to write the pixels into
         
     Returns:
-        Preprocessed image array ready for model prediction
+        uint8 array of shape (1, height, width, 3), a view of out if given
+        and read-only otherwise
     """
+    if draft:
+        apply_jpeg_draft(pil_img, target_size)
+    
     if pil_img.mode != 'RGB':
         pil_img = pil_img.convert('RGB')
     
-    pil_img = pil_img.resize(target_size)
-    img_array = image.img_to_array(pil_img)
-    img_array = np.expand_dims(img_array, axis=0)
-    img_array = preprocess_input(img_array)
-    return img_array
+    if pil_img.size != tuple(target_size):
+        pil_img = pil_img.resize(target_size)
+    if out is not None:
+        out[...] = np.asarray(pil_img)
+        return out[np.newaxis]
+    return np.asarray(pil_img)[np.newaxis]
+
+def preprocess_pil_image(pil_img, target_size=(224, 224), draft=False):
+    """
+    Preprocess a PIL Image object
+    
+    Args:
+        pil_img: PIL Image object
+        target_size: Size to resize the image to (default: 224x224)
+        draft: Decode JPEGs close to target_size first (see apply_jpeg_draft)
+        
+    Returns:
+        Preprocessed image array ready for model prediction
+    """
+    return preprocess_input(pil_image_to_pixels(pil_img, target_size, draft))
+
+def preprocess_pil_image_batch(pil_images, target_size=(224, 224), dtype=np.float32):
+    """
+    Preprocess several PIL Image objects into a single batch
+    
+    Images are resized and written straight into one preallocated array,
+    so the batch is built without per-image intermediate copies.
+    
+    Args:
+        pil_images: List of PIL Image objects
+        target_size: Size to resize the images to (default: 224x224)
+        dtype: np.uint8 keeps the raw pixels, a quarter of the float32 size;
+            the inference backends cast them to the model's input dtype
+        
+    Returns:
+        Preprocessed image batch of shape (N, height, width, 3)
+    """
+    width, height = target_size
+    batch = np.empty((len(pil_images), height, width, 3), dtype=dtype)
+    
+    for i, pil_img in enumerate(pil_images):
+        if pil_img.mode != 'RGB':
+            pil_img = pil_img.convert('RGB')
+        if pil_img.size != tuple(target_size):
+            pil_img = pil_img.resize(target_size)
+        batch[i] = np.asarray(pil_img)
+    
+    if batch.dtype == np.uint8:
+        return batch
+    return preprocess_input(batch)
+
+# DCT-II basis used by perceptual_hash (32x32 input, top-left 8x8 coefficients kept)
+_HASH_SIZE = 8
+_HASH_DCT_SIZE = 32
+_HASH_DCT_BASIS = np.cos(
+    np.pi * (2 * np.arange(_HASH_DCT_SIZE)[None, :] + 1) * np.arange(_HASH_SIZE)[:, None] / (2 * _HASH_DCT_SIZE)
+).astype(np.float32)
+
+def perceptual_hash(img_array):
+    """
+    Compute a 64-bit DCT perceptual hash of an already resized image
+    
+    Re-compressed, slightly cropped or re-scaled copies of the same photo get
+    hashes within a small Hamming distance of each other.
+    
+    Args:
+        img_array: Preprocessed image array of shape (1, H, W, 3) or (H, W, 3)
+        
+    Returns:
+        Hash as a Python int
+    """
+    img = np.asarray(img_array, dtype=np.float32)
+    if img.ndim == 4:
+        img = img[0]
+    gray = img @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    
+    # Downsample to 32x32 with a box filter (224 / 32 = 7 for the model input)
+    height, width = gray.shape
+    if height % _HASH_DCT_SIZE == 0 and width % _HASH_DCT_SIZE == 0:
+        small = gray.reshape(_HASH_DCT_SIZE, height // _HASH_DCT_SIZE,
+                             _HASH_DCT_SIZE, width // _HASH_DCT_SIZE).mean(axis=(1, 3))
+    else:
+        small = np.asarray(Image.fromarray(gray).resize((_HASH_DCT_SIZE, _HASH_DCT_SIZE), Image.BOX))
+    
+    # Low-frequency DCT coefficients compared to their median (DC term excluded)
+    coefficients = (_HASH_DCT_BASIS @ small @ _HASH_DCT_BASIS.T).flatten()
+    bits = coefficients > np.median(coefficients[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+# Test-time augmentations applied by build_tta_batch, in batch order
+TTA_AUGMENTATIONS = ('identity', 'flip_lr', 'flip_ud', 'rot90', 'rot270', 'center_crop')
+
+def build_tta_batch(img_array, augmentations=TTA_AUGMENTATIONS, crop_fraction=0.875):
+    """
+    Build a batch of augmented copies of one preprocessed image
+    
+    The augmentations are geometric only, so they can be applied after
+    preprocess_input. All copies are written into one preallocated array
+    so they can be scored in a single forward pass.
+    
+    Args:
+        img_array: Preprocessed image array of shape (1, H, W, 3) or (H, W, 3)
+        augmentations: Names from TTA_AUGMENTATIONS
+        crop_fraction: Side length kept by 'center_crop' before scaling back up
+        
+    Returns:
+        Image batch of shape (len(augmentations), H, W, 3)
+    """
+    img = img_array[0] if img_array.ndim == 4 else img_array
+    height, width = img.shape[:2]
+    batch = np.empty((len(augmentations),) + img.shape, dtype=img.dtype)
+    
+    for i, name in enumerate(augmentations):
+        if name == 'identity':
+            batch[i] = img
+        elif name == 'flip_lr':
+            batch[i] = img[:, ::-1]
+        elif name == 'flip_ud':
+            batch[i] = img[::-1]
+        elif name in ('rot90', 'rot270'):
+            if height != width:
+                raise ValueError(f"'{name}' augmentation needs a square image, got {width}x{height}")
+            batch[i] = np.rot90(img, 1 if name == 'rot90' else 3)
+        elif name == 'center_crop':
+            # Nearest-neighbour zoom into the center of the image
+            rows = ((np.arange(height) + 0.5) * crop_fraction + height * (1 - crop_fraction) / 2).astype(np.intp)
+            cols = ((np.arange(width) + 0.5) * crop_fraction + width * (1 - crop_fraction) / 2).astype(np.intp)
+            batch[i] = img[rows[:, None], cols]
+        else:
+            raise ValueError(f"Unknown test-time augmentation: {name}")
+    
+    return batch
+
+# Largest change of aspect ratio plan_tile_grid accepts when resizing an
+# image to a tile grid, unless squashing it into one tile distorts it more
+_TILE_MAX_DISTORTION = 1.25
+
+def plan_tile_grid(width, height, tile_size=224, max_tiles=16, overlap=0.25):
+    """
+    Pick the tile grid for tiled high-resolution inference
+    
+    Picks the grid with the most tiles (up to max_tiles) that doesn't need
+    the image upscaled and keeps its aspect ratio within _TILE_MAX_DISTORTION
+    (or distorts it no more than a single squashed tile would). Ties go to
+    the grid with the closest aspect ratio. The image is then
+    resized to the grid's working size and cut into overlapping tile_size
+    squares.
+    
+    Args:
+        width, height: Image size in pixels
+        tile_size: Side of one tile (the model input size)
+        max_tiles: Maximum number of tiles
+        overlap: Fraction of a tile shared with its neighbour, in [0, 1)
+        
+    Returns:
+        Tuple of (rows, cols, stride) with the stride between tiles in pixels
+    """
+    if not 0.0 <= overlap < 1.0:
+        raise ValueError("overlap must be in [0, 1)")
+    stride = max(1, int(round(tile_size * (1.0 - overlap))))
+    # The small slack keeps grids exactly as distorted as a single tile
+    max_distortion = max(np.log(_TILE_MAX_DISTORTION), abs(np.log(width / height))) + 1e-9
+    
+    best_key, best_grid = None, (1, 1)
+    for rows in range(1, int(max_tiles) + 1):
+        for cols in range(1, int(max_tiles) // rows + 1):
+            grid_width = tile_size + (cols - 1) * stride
+            grid_height = tile_size + (rows - 1) * stride
+            if (cols > 1 and grid_width > width) or (rows > 1 and grid_height > height):
+                continue
+            distortion = abs(np.log(grid_width * height / (grid_height * width)))
+            if distortion > max_distortion:
+                continue
+            key = (rows * cols, -distortion)
+            if best_key is None or key > best_key:
+                best_key, best_grid = key, (rows, cols)
+    return best_grid + (stride,)
+
+def build_tile_batch(pil_img, tile_size=224, max_tiles=16, overlap=0.25, draft=False):
+    """
+    Cut an image into overlapping model-input tiles
+    
+    Squashing a whole field photo into one 224x224 input loses small
+    patterns such as interveinal chlorosis. Tiles keep more of the original
+    resolution while the tile count stays bounded.
+    
+    Args:
+        pil_img: PIL Image object
+        tile_size: Side of one tile (the model input size)
+        max_tiles: Maximum number of tiles (see plan_tile_grid)
+        overlap: Fraction of a tile shared with its neighbour
+        draft: Decode JPEGs close to the working size first (see apply_jpeg_draft)
+        
+    Returns:
+        Tuple of (uint8 tile batch of shape (rows * cols, tile_size, tile_size, 3)
+        in row-major order, (rows, cols))
+    """
+    rows, cols, stride = plan_tile_grid(pil_img.width, pil_img.height, tile_size, max_tiles, overlap)
+    working_size = (tile_size + (cols - 1) * stride, tile_size + (rows - 1) * stride)
+    pixels = pil_image_to_pixels(pil_img, working_size, draft=draft)[0]
+    
+    batch = np.empty((rows * cols, tile_size, tile_size, 3), dtype=np.uint8)
+    for row in range(rows):
+        for col in range(cols):
+            top, left = row * stride, col * stride
+            batch[row * cols + col] = pixels[top:top + tile_size, left:left + tile_size]
+    return batch, (rows, cols)
+
+def load_image_tiles(image_bytes, tile_size=224, max_tiles=16, overlap=0.25, image_format=None, draft=False):
+    """
+    Load an image from bytes as a batch of overlapping tiles (see build_tile_batch)
+    
+    Returns:
+        Tuple of (uint8 tile batch, (rows, cols))
+    """
+    img = open_image_bytes(image_bytes, image_format)
+    return build_tile_batch(img, tile_size, max_tiles, overlap, draft=draft)
+
+# Leading bytes of the image formats accepted from clients, by Pillow format name
+IMAGE_SIGNATURES = {
+    'JPEG': b'\xff\xd8',
+    'PNG': b'\x89PNG',
+}
+
+def sniff_image_format(image_bytes):
+    """
+    Identify the image format from its header bytes
+    
+    Args:
+        image_bytes: Image file bytes
+        
+    Returns:
+        Pillow format name ('JPEG' or 'PNG'), or None for other formats
+    """
+    for image_format, signature in IMAGE_SIGNATURES.items():
+        if image_bytes.startswith(signature):
+            return image_format
+    return None
+
+def open_image_bytes(image_bytes, image_format=None):
+    """
+    Open an image held in memory without copying the buffer
+    
+    Args:
+        image_bytes: Image file bytes, or a file-like object
+        image_format: Pillow format name if already known from the header,
+            so Pillow doesn't try every other decoder first
+        
+    Returns:
+        Lazily decoded PIL Image object
+    """
+    if isinstance(image_bytes, (bytes, bytearray, memoryview)):
+        # BytesIO shares the memory of an immutable bytes object
+        image_bytes = BytesIO(image_bytes)
+    return Image.open(image_bytes, formats=[image_format] if image_format else None)
 
-def load_image_from_bytes(image_bytes, target_size=(224, 224)):
+def read_image_header(image_bytes, image_format=None):
+    """
+    Read an image's dimensions, mode and frame count without decoding pixels
+    
+    Pillow only parses the file header (and, for APNG and MPO files, the
+    frame index) when an image is opened, so this costs about the same
+    whatever the image dimensions.
+    
+    Args:
+        image_bytes: Image file bytes, or a file-like object
+        image_format: Pillow format name if already known (see sniff_image_format)
+        
+    Returns:
+        Dictionary with width, height, mode and frames
+    """
+    with open_image_bytes(image_bytes, image_format) as img:
+        return {
+            'width': img.width,
+            'height': img.height,
+            'mode': img.mode,
+            'frames': getattr(img, 'n_frames', 1),
+        }
+
+def load_image_from_bytes(image_bytes, target_size=(224, 224), image_format=None, draft=False):
     """
     Load an image from bytes (e.g., from a file upload)
     
     Args:
-        image_bytes: Image as bytes
+        image_bytes: Image as bytes, or a file-like object
         target_size: Size to resize the image to (default: 224x224)
+        image_format: Pillow format name if already known (see sniff_image_format)
+        draft: Decode JPEGs close to target_size first (see apply_jpeg_draft)
         
     Returns:
         Preprocessed image array ready for model prediction
     """
-    img = Image.open(image_bytes)
-    return preprocess_pil_image(img, target_size)
+    img = open_image_bytes(image_bytes, image_format)
+    return preprocess_pil_image(img, target_size, draft=draft)
+
+def load_image_pixels(image_bytes, target_size=(224, 224), image_format=None, draft=False, out=None):
+    """
+    Load an image from bytes as uint8 model input (see pil_image_to_pixels)
+    
+    Args:
+        image_bytes: Image as bytes, or a file-like object
+        target_size: Size to resize the image to (default: 224x224)
+        image_format: Pillow format name if already known (see sniff_image_format)
+        draft: Decode JPEGs close to target_size first (see apply_jpeg_draft)
+        out: Optional uint8 array of shape (height, width, 3) to write the pixels into
+        
+    Returns:
+        uint8 array of shape (1, height, width, 3), a view of out if given
+        and read-only otherwise
+    """
+    img = open_image_bytes(image_bytes, image_format)
+    return pil_image_to_pixels(img, target_size, draft=draft, out=out)
+
+def decode_base64_payload(base64_string):
+    """
+    Decode a base64 string (optionally a data URL) into raw image bytes
+    
+    The string is decoded in a single strict pass, so callers validate and
+    load the returned bytes instead of decoding the payload again.
+    
+    Args:
+        base64_string: Base64 encoded image string
+        
+    Returns:
+        Decoded image file bytes
+        
+    Raises:
+        binascii.Error: If the payload is not valid base64
+    """
+    # Remove data URL prefix if present
+    prefix_end = base64_string.find(',', 0, 256)
+    if prefix_end != -1:
+        base64_string = base64_string[prefix_end + 1:]
+    
+    if sys.version_info >= (3, 11):
+        # Validates while decoding, straight from the str's ASCII buffer
+        return binascii.a2b_base64(base64_string, strict_mode=True)
+    return base64.b64decode(base64_string, validate=True)
 
 def decode_and_load_base64_image(base64_string, target_size=(224, 224)):
     """
@@ -63,8 +444,4 @@ def decode_and_load_base64_image(base64_string, target_size=(224, 224)):
     Returns:
         Preprocessed image array ready for model prediction
     """
-    import base64
-    from io import BytesIO
-    
-    image_bytes = base64.b64decode(base64_string)
-    return load_image_from_bytes(BytesIO(image_bytes), target_size) 
\ No newline at end of file
+    return load_image_from_bytes(decode_base64_payload(base64_string), target_size)
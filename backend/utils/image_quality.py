@@ -0,0 +1,184 @@
+import threading
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+# Weights applied to the RGB planes in one matrix product: luma (ITU-R
+# BT.601) for the grayscale image, and excess green (2G - R - B), high for
+# green and yellow leaf pixels
+_CHANNEL_WEIGHTS = np.array([[0.299, 0.587, 0.114],
+                             [-1.0, 2.0, -1.0]], dtype=np.float32)
+
+# The metrics use every second row and column of the model input
+_SAMPLE_STEP = 2
+
+# Advice returned to the client for each failed check
+RETAKE_ADVICE = {
+    'too_dark': 'Take the photo in daylight or move out of the shade.',
+    'overexposed': 'Avoid direct sunlight on the leaf or shade it with your hand.',
+    'blurry': 'Hold the phone steady and tap the leaf to focus before taking the photo.',
+    'no_leaf': 'Fill the frame with the banana leaf.',
+}
+
+
+class ImageQualityError(Exception):
+    """Raised for images that fail the quality gate; carries the gate's report"""
+
+    def __init__(self, report: Dict[str, Any]):
+        super().__init__(f"Image quality too low: {', '.join(report['issues'])}")
+        self.report = report
+
+
+class ImageQualityGate:
+    """
+    Cheap quality checks on the downscaled image before inference
+
+    Blurry, badly exposed or non-leaf photos give unreliable diagnoses, so they
+    are flagged before the forward pass with advice on how to retake the
+    photo. An enforcing gate rejects them; otherwise the advice is returned
+    as a warning next to the diagnosis. All checks run on every second pixel of the model input (112x112
+    samples of the 224x224 image) in a few vectorized NumPy passes:
+    - sharpness: variance of the 4-neighbour Laplacian of the grayscale samples;
+    - exposure: mean brightness and the fractions of crushed shadows and
+      blown highlights;
+    - green ratio: fraction of leaf-coloured pixels (green to yellow, so
+      chlorotic leaves still pass).
+    """
+
+    def __init__(self, min_sharpness: float = 150.0, min_brightness: float = 40.0,
+                 max_brightness: float = 225.0, max_clipped_fraction: float = 0.5,
+                 min_green_ratio: float = 0.15, enforce: bool = False):
+        """
+        Initialize the gate
+
+        Args:
+            min_sharpness: Minimum Laplacian variance of the subsampled image;
+                lower is rejected as blurry
+            min_brightness: Minimum mean brightness (0-255)
+            max_brightness: Maximum mean brightness (0-255)
+            max_clipped_fraction: Maximum fraction of crushed (all channels below
+                16) or blown (any channel above 250) pixels
+            min_green_ratio: Minimum fraction of leaf-coloured pixels
+            enforce: Reject flagged photos instead of only warning about them
+        """
+        self.min_sharpness = min_sharpness
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.max_clipped_fraction = max_clipped_fraction
+        self.min_green_ratio = min_green_ratio
+        self.enforce = enforce
+
+        self._lock = threading.Lock()
+        self._checked = 0
+        self._flagged = 0
+        self._flagged_by_issue = {issue: 0 for issue in RETAKE_ADVICE}
+        self._total_check_time = 0.0
+
+    @staticmethod
+    def measure(img_array: np.ndarray) -> Dict[str, float]:
+        """
+        Compute the quality metrics of an already resized image
+
+        Args:
+            img_array: uint8 pixels of shape (1, H, W, 3) or (H, W, 3)
+
+        Returns:
+            Dictionary with sharpness, brightness, dark_fraction,
+            bright_fraction and green_ratio
+        """
+        img = np.asarray(img_array)
+        if img.ndim == 4:
+            img = img[0]
+        # Gather the samples into contiguous channel planes once, so no pass
+        # below walks the interleaved RGB pixels
+        planes = np.ascontiguousarray(np.moveaxis(img[::_SAMPLE_STEP, ::_SAMPLE_STEP], -1, 0))
+        height, width = planes.shape[1:]
+        gray, excess_green = (_CHANNEL_WEIGHTS @ planes.reshape(3, -1).astype(np.float32)).reshape(2, height, width)
+
+        laplacian = (gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]
+                     - 4.0 * gray[1:-1, 1:-1])
+
+        # A blown highlight usually saturates one channel (green on sunlit
+        # leaves) long before the luma does
+        peak = planes.max(axis=0)
+
+        # Leaf pixels: green clearly above the red/blue average and above blue
+        # (yellowing leaves qualify, gray soil, sky and skin do not)
+        leaf = (excess_green > 20) & (planes[1] > planes[2])
+
+        return {
+            'sharpness': float(laplacian.var()),
+            'brightness': float(gray.mean()),
+            'dark_fraction': float(np.count_nonzero(peak < 16) / peak.size),
+            'bright_fraction': float(np.count_nonzero(peak > 250) / peak.size),
+            'green_ratio': float(np.count_nonzero(leaf) / leaf.size),
+        }
+
+    def check(self, img_array: np.ndarray) -> Dict[str, Any]:
+        """
+        Check an image and count the outcome
+
+        Args:
+            img_array: uint8 pixels of shape (1, H, W, 3) or (H, W, 3)
+
+        Returns:
+            Dictionary with 'passed', the failed checks under 'issues', retake
+            advice for each of them under 'advice' and the 'metrics'
+        """
+        started = time.perf_counter()
+        metrics = self.measure(img_array)
+
+        issues = []
+        if metrics['brightness'] < self.min_brightness or metrics['dark_fraction'] > self.max_clipped_fraction:
+            issues.append('too_dark')
+        elif metrics['brightness'] > self.max_brightness or metrics['bright_fraction'] > self.max_clipped_fraction:
+            issues.append('overexposed')
+        # Bad exposure flattens contrast, so blur is only judged on well-exposed photos
+        elif metrics['sharpness'] < self.min_sharpness:
+            issues.append('blurry')
+        if metrics['green_ratio'] < self.min_green_ratio:
+            issues.append('no_leaf')
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._checked += 1
+            self._total_check_time += elapsed
+            if issues:
+                self._flagged += 1
+                for issue in issues:
+                    self._flagged_by_issue[issue] += 1
+
+        return {
+            'passed': not issues,
+            'issues': issues,
+            'advice': [RETAKE_ADVICE[issue] for issue in issues],
+            'metrics': metrics,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get gate statistics
+
+        Returns:
+            Dictionary with the mode, the thresholds, check and flag counts,
+            the flag rate, flags per issue and the mean check time
+        """
+        with self._lock:
+            checked = self._checked
+            return {
+                'enabled': True,
+                'enforce': self.enforce,
+                'thresholds': {
+                    'min_sharpness': self.min_sharpness,
+                    'min_brightness': self.min_brightness,
+                    'max_brightness': self.max_brightness,
+                    'max_clipped_fraction': self.max_clipped_fraction,
+                    'min_green_ratio': self.min_green_ratio,
+                },
+                'checked': checked,
+                'flagged': self._flagged,
+                'flag_rate': (self._flagged / checked) if checked else 0.0,
+                'flagged_by_issue': dict(self._flagged_by_issue),
+                'mean_check_ms': (self._total_check_time / checked * 1000.0) if checked else 0.0,
+            }
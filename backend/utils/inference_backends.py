@@ -0,0 +1,331 @@
+import os
+import threading
+import numpy as np
+
+from .interpreter_pool import InterpreterPool
+
+# TensorFlow takes seconds and hundreds of MB to import, so it is only imported
+# when a Keras model is loaded (or TFLite has to fall back to tf.lite)
+tf = None
+
+def import_tensorflow():
+    """Import TensorFlow on first use"""
+    global tf
+    if tf is None:
+        import tensorflow
+        tf = tensorflow
+    return tf
+
+def get_tflite_interpreter_class(runtime):
+    """
+    Find a TFLite interpreter implementation
+
+    Args:
+        runtime: 'slim' requires a standalone interpreter, 'tensorflow' always
+            uses tf.lite, 'auto' prefers a standalone interpreter
+
+    Returns:
+        Tuple of (Interpreter class, backend name)
+    """
+    if runtime != 'tensorflow':
+        try:
+            from tflite_runtime.interpreter import Interpreter
+            return Interpreter, 'tflite_runtime'
+        except ImportError:
+            pass
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+            return Interpreter, 'ai_edge_litert'
+        except ImportError:
+            if runtime == 'slim':
+                raise ImportError("The slim runtime needs tflite-runtime (pip install -r requirements-slim.txt)")
+    return import_tensorflow().lite.Interpreter, 'tensorflow'
+
+
+class InferenceBackend:
+    """
+    Interface implemented by every inference runtime
+
+    A backend owns one loaded model and turns preprocessed batches of shape
+    (N, H, W, 3) into probability arrays of shape (N, num_classes). Batches
+    are cast to the model's input dtype: float32, or uint8 for models
+    exported with --uint8-input.
+    """
+
+    name = None
+
+    def load(self, model_path):
+        """Load the model file (raises on failure)"""
+        raise NotImplementedError
+
+    def get_input_shape(self):
+        """Model input shape without the batch dimension, e.g. (224, 224, 3)"""
+        raise NotImplementedError
+
+    def predict_batch(self, img_batch):
+        """Run a preprocessed batch and return probabilities of shape (N, num_classes)"""
+        raise NotImplementedError
+
+    def predict_single(self, img_array):
+        """
+        Run one image of shape (1, H, W, 3) or (H, W, 3), e.g. uint8 pixels
+
+        Backends override this to copy the image straight into their input
+        buffer instead of building a float32 batch first.
+        """
+        return self.predict_batch(img_array.reshape((1,) + img_array.shape[-3:]))
+
+    def warmup(self, img_batch):
+        """Run a dummy batch so one-time setup happens before real traffic"""
+        self.predict_batch(img_batch)
+
+    def describe(self):
+        """JSON-serializable description of the runtime and its settings"""
+        return {'runtime': self.name}
+
+    def unload(self):
+        """Release the model so its memory can be reclaimed"""
+
+
+class KerasBackend(InferenceBackend):
+    """Keras (.h5/.keras) model run with model.predict or a traced tf.function"""
+
+    name = 'keras'
+
+    # model.predict per call, a traced tf.function, or a traced tf.function
+    # compiled with XLA
+    INFERENCE_MODES = ('predict', 'function', 'xla')
+
+    def __init__(self, inference_mode='function'):
+        if inference_mode not in self.INFERENCE_MODES:
+            raise ValueError(f"inference_mode must be one of {self.INFERENCE_MODES}")
+        self.inference_mode = inference_mode
+        self.model = None
+        self._input_dtype = np.float32
+        self._inference_fn = None
+
+    def load(self, model_path):
+        import_tensorflow()
+        self.model = tf.keras.models.load_model(model_path)
+        self._input_dtype = self.model.inputs[0].dtype.as_numpy_dtype
+        self._build_inference_fn()
+        print(f"Model loaded successfully ({os.path.basename(model_path)}, {self.inference_mode} mode)")
+
+    def _build_inference_fn(self):
+        """Wrap the Keras model in a traced tf.function with a fixed input signature"""
+        if self.inference_mode == 'predict':
+            self._inference_fn = None
+            return
+
+        # Only the batch dimension is left open, so a single graph serves every batch size
+        input_signature = [tf.TensorSpec(shape=(None,) + tuple(self.model.input_shape[1:]), dtype=self._input_dtype)]
+        model = self.model
+
+        @tf.function(input_signature=input_signature, jit_compile=(self.inference_mode == 'xla'))
+        def serve(img_batch):
+            return model(img_batch, training=False)
+
+        self._inference_fn = serve
+
+    def get_input_shape(self):
+        return tuple(self.model.input_shape[1:])
+
+    def predict_batch(self, img_batch):
+        img_batch = np.asarray(img_batch, dtype=self._input_dtype)
+        if self._inference_fn is not None:
+            # The traced function skips model.predict's per-call data adapter
+            # and dispatch loop
+            return self._inference_fn(tf.convert_to_tensor(img_batch)).numpy()
+        return self.model.predict(img_batch, batch_size=len(img_batch), verbose=0)
+
+    def describe(self):
+        return {
+            'runtime': self.name,
+            'input_dtype': np.dtype(self._input_dtype).name,
+            'inference_mode': self.inference_mode
+        }
+
+    def unload(self):
+        self.model = None
+        self._inference_fn = None
+
+
+class TFLiteBackend(InferenceBackend):
+    """TFLite model served from a pool of interpreters"""
+
+    name = 'tflite'
+
+    def __init__(self, pool_size=2, num_threads=1, wait_timeout=10.0, runtime='auto', use_mmap=True):
+        """
+        Args:
+            pool_size: Number of interpreters serving requests in parallel
+            num_threads: CPU threads used by each interpreter
+            wait_timeout: Seconds a request waits for a free interpreter
+            runtime: Interpreter implementation preference (see get_tflite_interpreter_class)
+            use_mmap: Let TFLite memory-map the model file instead of reading
+                it into a private buffer
+        """
+        self.pool_size = pool_size
+        self.num_threads = num_threads
+        self.wait_timeout = wait_timeout
+        self.runtime = runtime
+        self.use_mmap = use_mmap
+        self.interpreter_backend = None
+        self.interpreter_pool = None
+        self.input_details = None
+        self.output_details = None
+
+    def load(self, model_path):
+        interpreter_class, self.interpreter_backend = get_tflite_interpreter_class(self.runtime)
+
+        if self.use_mmap:
+            # TFLite maps the file read-only, so the weights live in the page
+            # cache and are shared by every interpreter and every process on
+            # the node instead of being copied into each one
+            model_source = {'model_path': model_path}
+        else:
+            # The file is read once and every interpreter in the pool is built
+            # from the same buffer
+            with open(model_path, 'rb') as f:
+                model_source = {'model_content': f.read()}
+
+        self.interpreter_pool = InterpreterPool(
+            lambda: interpreter_class(
+                num_threads=self.num_threads,
+                **model_source
+            ),
+            pool_size=self.pool_size,
+            wait_timeout=self.wait_timeout
+        )
+
+        # Get input and output tensors
+        with self.interpreter_pool.checkout() as pooled:
+            self.input_details = pooled.input_details
+            self.output_details = pooled.output_details
+        print(f"TFLite Model loaded successfully ({os.path.basename(model_path)}, {self.interpreter_backend}, "
+              f"pool of {self.pool_size}, {self.num_threads} thread(s) each)")
+
+    def get_input_shape(self):
+        return tuple(int(dim) for dim in self.input_details[0]['shape'][1:])
+
+    def predict_batch(self, img_batch):
+        # Using a TFLite interpreter borrowed from the pool
+        with self.interpreter_pool.checkout() as pooled:
+            try:
+                return pooled.invoke(img_batch)
+            except (ValueError, RuntimeError) as e:
+                if len(img_batch) == 1:
+                    raise
+                # Some converted graphs have the batch dimension baked in;
+                # fall back to one invocation per image
+                print(f"TFLite batch resize failed ({e}), running images one by one")
+                return np.concatenate([
+                    pooled.invoke(img_batch[i:i + 1])
+                    for i in range(len(img_batch))
+                ])
+
+    def predict_single(self, img_array):
+        with self.interpreter_pool.checkout() as pooled:
+            return pooled.invoke_single(img_array)
+
+    def warmup(self, img_batch):
+        # Every pooled interpreter allocates its own tensors
+        self.interpreter_pool.warmup(img_batch)
+
+    def describe(self):
+        return {
+            'runtime': self.name,
+            'tflite_backend': self.interpreter_backend,
+            'input_dtype': np.dtype(self.input_details[0]['dtype']).name if self.input_details else None,
+            'num_threads': self.num_threads,
+            'mmap': self.use_mmap,
+            'pool': self.interpreter_pool.get_stats() if self.interpreter_pool is not None else None
+        }
+
+    def unload(self):
+        self.interpreter_pool = None
+
+
+class OnnxBackend(InferenceBackend):
+    """ONNX model run with ONNX Runtime (training/convert_to_onnx.py exports it)"""
+
+    name = 'onnx'
+
+    # NumPy dtype for each supported ONNX input type
+    INPUT_DTYPES = {
+        'tensor(float)': np.float32,
+        'tensor(uint8)': np.uint8,
+    }
+
+    def __init__(self, num_threads=1, providers=None):
+        """
+        Args:
+            num_threads: Intra-op CPU threads per inference (0 lets ONNX Runtime decide)
+            providers: Execution providers in priority order (default: CPU)
+        """
+        self.num_threads = num_threads
+        self.providers = list(providers or ['CPUExecutionProvider'])
+        self.session = None
+        self._input_name = None
+        self._input_shape = None
+        self._input_dtype = np.float32
+        # Per-thread input buffer for single images
+        self._single_input = threading.local()
+
+    def load(self, model_path):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("ONNX models need onnxruntime (pip install onnxruntime)")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # A session is safe to call from several threads at once, so one
+        # session serves all concurrent requests
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=self.providers)
+
+        model_input = self.session.get_inputs()[0]
+        self._input_name = model_input.name
+        self._input_shape = tuple(int(dim) for dim in model_input.shape[1:])
+        if model_input.type not in self.INPUT_DTYPES:
+            raise ValueError(f"Unsupported ONNX input type {model_input.type}")
+        self._input_dtype = self.INPUT_DTYPES[model_input.type]
+        print(f"ONNX model loaded successfully ({os.path.basename(model_path)}, "
+              f"{', '.join(self.session.get_providers())}, {self.num_threads} thread(s))")
+
+    def get_input_shape(self):
+        return self._input_shape
+
+    def predict_batch(self, img_batch):
+        return self.session.run(None, {self._input_name: np.asarray(img_batch, dtype=self._input_dtype)})[0]
+
+    def predict_single(self, img_array):
+        img_array = img_array.reshape((1,) + img_array.shape[-3:])
+        buffer = getattr(self._single_input, 'buffer', None)
+        if buffer is None or buffer.shape != img_array.shape:
+            buffer = self._single_input.buffer = np.empty(img_array.shape, dtype=self._input_dtype)
+        # ONNX Runtime reads numpy inputs in place, so the image is cast once
+        # into a buffer reused by every request on this thread
+        np.copyto(buffer, img_array, casting='unsafe')
+        return self.session.run(None, {self._input_name: buffer})[0]
+
+    def describe(self):
+        return {
+            'runtime': self.name,
+            'input_dtype': np.dtype(self._input_dtype).name,
+            'num_threads': self.num_threads,
+            'providers': self.session.get_providers() if self.session is not None else self.providers
+        }
+
+    def unload(self):
+        self.session = None
+
+
+# Backend used for each model file extension
+BACKENDS_BY_EXTENSION = {
+    '.h5': KerasBackend,
+    '.keras': KerasBackend,
+    '.tflite': TFLiteBackend,
+    '.onnx': OnnxBackend,
+}
@@ -0,0 +1,195 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class PooledInterpreter:
+    """A TFLite interpreter together with its cached tensor details"""
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.interpreter.allocate_tensors()
+        self.input_details = interpreter.get_input_details()
+        self.output_details = interpreter.get_output_details()
+        self.input_shape = tuple(self.input_details[0]['shape'])
+
+    def invoke(self, img_batch):
+        """
+        Run inference, resizing the input tensor for the batch if needed
+
+        Args:
+            img_batch: Preprocessed image batch of shape (N, H, W, C)
+
+        Returns:
+            Array of prediction probabilities with shape (N, num_classes)
+        """
+        input_detail = self.input_details[0]
+        if self.input_shape != img_batch.shape:
+            self.interpreter.resize_tensor_input(input_detail['index'], img_batch.shape)
+            self.interpreter.allocate_tensors()
+            self.input_shape = tuple(img_batch.shape)
+
+        self.interpreter.set_tensor(input_detail['index'], _quantize(img_batch, input_detail))
+        self.interpreter.invoke()
+        # Copy, since the output buffer is reused by the next invocation
+        return _dequantize(self.interpreter.get_tensor(self.output_details[0]['index']), self.output_details[0])
+
+    def invoke_single(self, img_array):
+        """
+        Run one image by writing it straight into the input tensor
+
+        The pixels (e.g. uint8 straight from Pillow) are cast while they are
+        copied into the interpreter's own input buffer, so neither a float32
+        input array nor set_tensor's extra copy is needed.
+
+        Args:
+            img_array: Image array of shape (1, H, W, C) or (H, W, C)
+
+        Returns:
+            Array of prediction probabilities with shape (1, num_classes)
+        """
+        img_array = img_array.reshape((1,) + img_array.shape[-3:])
+        input_detail = self.input_details[0]
+        scale, zero_point = input_detail.get('quantization', (0.0, 0))
+        if np.issubdtype(input_detail['dtype'], np.integer) and scale and (scale, zero_point) != (1.0, 0):
+            # Quantized inputs need rescaling first
+            return self.invoke(img_array)
+
+        if self.input_shape != img_array.shape:
+            self.interpreter.resize_tensor_input(input_detail['index'], img_array.shape)
+            self.interpreter.allocate_tensors()
+            self.input_shape = tuple(img_array.shape)
+
+        # The tensor view must not outlive this statement: TFLite refuses to
+        # invoke while numpy still references its buffers
+        np.copyto(self.interpreter.tensor(input_detail['index'])(), img_array, casting='unsafe')
+        self.interpreter.invoke()
+        return _dequantize(self.interpreter.get_tensor(self.output_details[0]['index']), self.output_details[0])
+
+
+def _quantize(values, detail):
+    """Convert float input to the tensor's dtype, applying its quantization parameters"""
+    dtype = detail['dtype']
+    scale, zero_point = detail.get('quantization', (0.0, 0))
+    if np.issubdtype(dtype, np.integer) and scale:
+        info = np.iinfo(dtype)
+        values = np.clip(np.round(values / scale + zero_point), info.min, info.max)
+    return values.astype(dtype, copy=False)
+
+
+def _dequantize(values, detail):
+    """Convert a (possibly quantized) output tensor to float32 probabilities"""
+    scale, zero_point = detail.get('quantization', (0.0, 0))
+    if np.issubdtype(values.dtype, np.integer) and scale:
+        return (values.astype(np.float32) - zero_point) * scale
+    return np.array(values)
+
+
+class InterpreterPool:
+    """
+    Pool of TFLite interpreters built from one shared model buffer
+
+    A TFLite interpreter must only be used by one thread at a time, so each
+    request checks an interpreter out of the pool, runs inference and checks
+    it back in. Requests wait a bounded time for a free interpreter.
+    """
+
+    def __init__(self, interpreter_factory, pool_size=2, wait_timeout=10.0):
+        """
+        Initialize the interpreter pool
+
+        Args:
+            interpreter_factory: Callable returning a new, unallocated interpreter
+            pool_size: Number of interpreters to create
+            wait_timeout: Default seconds to wait for a free interpreter
+        """
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+
+        self.pool_size = int(pool_size)
+        self.wait_timeout = wait_timeout
+        self._idle = queue.LifoQueue()
+        for _ in range(self.pool_size):
+            self._idle.put(PooledInterpreter(interpreter_factory()))
+
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """
+        Borrow an interpreter from the pool
+
+        Args:
+            timeout: Seconds to wait for a free interpreter (defaults to wait_timeout)
+
+        Yields:
+            PooledInterpreter for exclusive use inside the with-block
+        """
+        if timeout is None:
+            timeout = self.wait_timeout
+
+        started = time.perf_counter()
+        try:
+            pooled = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise TimeoutError(f"No TFLite interpreter became available within {timeout}s")
+        waited = time.perf_counter() - started
+
+        with self._stats_lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        try:
+            yield pooled
+        finally:
+            with self._stats_lock:
+                self._in_use -= 1
+            self._idle.put(pooled)
+
+    def warmup(self, img_batch):
+        """
+        Run one inference on every interpreter in the pool
+
+        Args:
+            img_batch: Dummy image batch used to allocate tensors
+        """
+        borrowed = [self._idle.get() for _ in range(self.pool_size)]
+        try:
+            for pooled in borrowed:
+                pooled.invoke(img_batch)
+        finally:
+            for pooled in borrowed:
+                self._idle.put(pooled)
+
+    def get_stats(self):
+        """
+        Get pool utilisation statistics
+
+        Returns:
+            Dictionary with pool size, usage and checkout wait timings
+        """
+        with self._stats_lock:
+            checkouts = self._checkouts
+            return {
+                'pool_size': self.pool_size,
+                'in_use': self._in_use,
+                'peak_in_use': self._peak_in_use,
+                'checkouts': checkouts,
+                'timeouts': self._timeouts,
+                'mean_wait_ms': (self._total_wait / checkouts * 1000.0) if checkouts else 0.0,
+                'max_wait_ms': self._max_wait * 1000.0,
+            }
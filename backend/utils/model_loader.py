@@ -1,15 +1,69 @@
-import tensorflow as tf
 import os
+import threading
+import time
 import numpy as np
 
+from .image_preprocessor import TTA_AUGMENTATIONS, build_tta_batch
+from .inference_backends import BACKENDS_BY_EXTENSION, KerasBackend, OnnxBackend, TFLiteBackend
+from .model_server import ModelServerClient
+
 class ModelLoader:
-    def __init__(self, model_dir='../models_runtime'):
+    # Keras inference modes: model.predict per call, a traced tf.function,
+    # or a traced tf.function compiled with XLA
+    INFERENCE_MODES = KerasBackend.INFERENCE_MODES
+    
+    # Runtimes: 'slim' serves TFLite and ONNX models without ever importing
+    # TensorFlow, 'tensorflow' runs TFLite through tf.lite, 'auto' imports
+    # TensorFlow only when a Keras model is loaded
+    RUNTIMES = ('auto', 'slim', 'tensorflow')
+    
+    # Ways predict_tiles combines tile probabilities into one prediction
+    TILE_AGGREGATIONS = ('mean', 'max', 'vote')
+    
+    def __init__(self, model_dir='../models_runtime', interpreter_pool_size=2,
+                 interpreter_num_threads=1, pool_wait_timeout=10.0,
+                 inference_mode='function', warmup_batch_sizes=(1,),
+                 class_mapping_file='class_mapping.txt', model_server_address=None,
+                 model_server_authkey=None, cascade_model_file=None,
+                 cascade_class_mapping_file='mobile_class_mapping.txt',
+                 cascade_confidence_threshold=0.85, cascade_margin_threshold=0.0,
+                 cascade_log_interval=500, runtime='auto', onnx_num_threads=1,
+                 tflite_use_mmap=True):
         """
         Initialize the model loader
         
         Args:
             model_dir: Directory where model files are stored
+            interpreter_pool_size: Number of TFLite interpreters serving requests in parallel
+            interpreter_num_threads: CPU threads used by each TFLite interpreter
+            pool_wait_timeout: Seconds a request waits for a free TFLite interpreter
+            inference_mode: How the Keras model is called ('predict', 'function' or 'xla')
+            warmup_batch_sizes: Batch sizes to run once at load time so the first
+                requests don't pay for tracing, compilation or tensor allocation
+            class_mapping_file: Class mapping file name inside model_dir
+            model_server_address: Unix socket of a shared model server. When set,
+                no model is loaded in this process and inference is forwarded
+                to the server (client mode).
+            model_server_authkey: Shared secret for the model server
+            cascade_model_file: Fast model (e.g. the MobileNetV3 model) that answers
+                first; only images it is unsure about are sent to the main model.
+                None disables the cascade.
+            cascade_class_mapping_file: Class mapping file of the fast model
+            cascade_confidence_threshold: Escalate when the fast model's top-1
+                confidence is below this value
+            cascade_margin_threshold: Escalate when the gap between the fast
+                model's top-1 and top-2 probabilities is below this value
+            cascade_log_interval: Log cascade statistics every this many images
+            runtime: Inference runtime ('auto', 'slim' or 'tensorflow')
+            onnx_num_threads: Intra-op CPU threads for ONNX Runtime (0 lets it decide)
+            tflite_use_mmap: Memory-map TFLite model files so their weights are
+                shared between processes instead of copied into each
         """
+        if inference_mode not in self.INFERENCE_MODES:
+            raise ValueError(f"inference_mode must be one of {self.INFERENCE_MODES}")
+        if runtime not in self.RUNTIMES:
+            raise ValueError(f"runtime must be one of {self.RUNTIMES}")
+        
         # Convert to absolute path if relative
         if not os.path.isabs(model_dir):
             current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,18 +72,48 @@ class ModelLoader:
             self.model_dir = model_dir
             
         print(f"Using model directory: {self.model_dir}")
-        self.model = None
-        self.interpreter = None
-        self.input_details = None
-        self.output_details = None
+        self.class_mapping_file = class_mapping_file
+        self.model_path = None
+        self.backend = None
+        self.model_server = None
         self.class_mapping = {}
         
+        self.interpreter_pool_size = interpreter_pool_size
+        self.interpreter_num_threads = interpreter_num_threads
+        self.pool_wait_timeout = pool_wait_timeout
+        self.tflite_use_mmap = tflite_use_mmap
+        
+        self.inference_mode = inference_mode
+        self.runtime = runtime
+        self.onnx_num_threads = onnx_num_threads
+        self.warmup_batch_sizes = tuple(warmup_batch_sizes or ())
+        self.warmup_times = {}
+        self.warmup_error = None
+        self.load_time_ms = None
+        
+        self.model_server_address = model_server_address
+        self.model_server_authkey = model_server_authkey
+        self._model_server_key = None
+        self._model_server_input_shape = None
+        
+        self.cascade_model_file = cascade_model_file
+        self.cascade_class_mapping_file = cascade_class_mapping_file
+        self.cascade_confidence_threshold = cascade_confidence_threshold
+        self.cascade_margin_threshold = cascade_margin_threshold
+        self.cascade_log_interval = cascade_log_interval
+        self.fast_loader = None
+        self.cascade_error = None
+        self._cascade_class_order = None
+        self._cascade_lock = threading.Lock()
+        self._cascade_stats = {'images': 0, 'escalated': 0, 'fast_batches': 0, 'fast_time': 0.0,
+                               'primary_batches': 0, 'primary_time': 0.0}
+        
         # Load class mapping
         self._load_class_mapping()
         
     def _load_class_mapping(self):
         """Load class mapping from file or use default mapping"""
-        mapping_file = os.path.join(self.model_dir, 'class_mapping.txt')
+        mapping_file = os.path.join(self.model_dir, self.class_mapping_file)
         
         try:
             with open(mapping_file, 'r') as f:
@@ -51,59 +135,390 @@ class ModelLoader:
             }
             print("Used default class mapping without Sulphur class")
     
-    def load_model(self):
+    def load_model(self, model_path=None):
         """
         Load the trained model
         
+        Args:
+            model_path: Specific .h5, .keras, .tflite or .onnx file to load,
+                absolute or relative to model_dir. By default the h5 model is
+                tried first, then the TFLite model.
+        
         Returns:
             True if model loaded successfully, False otherwise
         """
-        h5_model_path = os.path.join(self.model_dir, 'banana_nutrient_model.h5')
-        tflite_model_path = os.path.join(self.model_dir, 'banana_nutrient_model.tflite')
+        if self.model_server_address:
+            return self._connect_model_server(model_path)
         
-        try:
-            # Try to load the h5 model
-            self.model = tf.keras.models.load_model(h5_model_path)
-            print("Model loaded successfully (h5 format)")
-            return True
-        except:
+        if model_path is None:
+            candidates = [
+                os.path.join(self.model_dir, 'banana_nutrient_model.h5'),
+                os.path.join(self.model_dir, 'banana_nutrient_model.tflite')
+            ]
+            if self.runtime == 'slim':
+                candidates = [candidate for candidate in candidates if candidate.endswith('.tflite')]
+        else:
+            candidates = [os.path.join(self.model_dir, model_path)]
+        started = time.perf_counter()
+        
+        for candidate in candidates:
             try:
-                # Try to load the TFLite model
-                self.interpreter = tf.lite.Interpreter(model_path=tflite_model_path)
-                self.interpreter.allocate_tensors()
-                
-                # Get input and output tensors
-                self.input_details = self.interpreter.get_input_details()
-                self.output_details = self.interpreter.get_output_details()
-                print("TFLite Model loaded successfully")
-                return True
+                # Check before loading so a missing h5 file never imports TensorFlow
+                if not os.path.exists(candidate):
+                    raise FileNotFoundError(f"Model file not found: {candidate}")
+                backend = self._create_backend(candidate)
+                backend.load(candidate)
+                self.backend = backend
+                self.model_path = candidate
+                break
             except Exception as e:
-                print(f"Error loading model: {e}")
-                return False
+                last_error = e
+        else:
+            print(f"Error loading model: {last_error}")
+            return False
+        
+        self.load_time_ms = (time.perf_counter() - started) * 1000.0
+        self._run_load_warmup()
+        
+        # The fast tier is attached after the main model is warmed up, so the
+        # warmup above exercises the main model only
+        if self.cascade_model_file:
+            self._load_cascade_model()
+        return True
+    
+    def _load_cascade_model(self):
+        """Load the fast model that answers confidently classified images first"""
+        fast_loader = ModelLoader(
+            model_dir=self.model_dir,
+            interpreter_pool_size=self.interpreter_pool_size,
+            interpreter_num_threads=self.interpreter_num_threads,
+            pool_wait_timeout=self.pool_wait_timeout,
+            inference_mode=self.inference_mode,
+            warmup_batch_sizes=self.warmup_batch_sizes,
+            class_mapping_file=self.cascade_class_mapping_file,
+            runtime=self.runtime,
+            onnx_num_threads=self.onnx_num_threads,
+            tflite_use_mmap=self.tflite_use_mmap
+        )
+        
+        try:
+            if not fast_loader.load_model(self.cascade_model_file):
+                raise RuntimeError(f"Could not load {self.cascade_model_file}")
+            if fast_loader.warmup_error:
+                raise RuntimeError(f"Warmup inference failed: {fast_loader.warmup_error}")
+            
+            # Reorder the fast model's outputs into the main model's class order
+            fast_indices = {name: idx for idx, name in fast_loader.class_mapping.items()}
+            if set(fast_indices) != set(self.class_mapping.values()):
+                raise ValueError(f"Class mappings differ: {sorted(fast_indices)} vs "
+                                 f"{sorted(self.class_mapping.values())}")
+            self._cascade_class_order = np.array([
+                fast_indices[self.class_mapping[idx]] for idx in sorted(self.class_mapping)
+            ])
+        except Exception as e:
+            # Serve with the main model alone rather than not at all
+            self.cascade_error = str(e)
+            print(f"Warning: Cascade disabled, fast model failed to load: {e}")
+            return
+        
+        self.fast_loader = fast_loader
+        self.cascade_error = None
+        print(f"Cascade enabled: {self.cascade_model_file} first, escalating below "
+              f"{self.cascade_confidence_threshold:.2f} confidence or {self.cascade_margin_threshold:.2f} margin")
+    
+    def _connect_model_server(self, model_path=None):
+        """Ask the shared model server to load the model and use it for inference"""
+        started = time.perf_counter()
+        try:
+            client = ModelServerClient(
+                self.model_server_address,
+                authkey=self.model_server_authkey,
+                pool_size=self.interpreter_pool_size
+            )
+            info = client.load(model_path, self.class_mapping_file)
+        except Exception as e:
+            print(f"Error connecting to model server at {self.model_server_address}: {e}")
+            return False
+        
+        self.model_server = client
+        self._model_server_key = info['model']
+        self._model_server_input_shape = tuple(info['input_shape'])
+        self.model_path = info['model_path']
+        # The server's class mapping is authoritative for the model it serves
+        self.class_mapping = dict(info['class_mapping'])
+        print(f"Using shared model server at {self.model_server_address} ({os.path.basename(self.model_path or '')})")
+        
+        self.load_time_ms = (time.perf_counter() - started) * 1000.0
+        self._run_load_warmup()
+        return True
+    
+    def _run_load_warmup(self):
+        try:
+            self.warmup()
+            self.warmup_error = None
+        except Exception as e:
+            self.warmup_error = str(e)
+            print(f"Warning: Model warmup failed: {e}")
+    
+    def _create_backend(self, model_path):
+        """Create the inference backend for a model file, chosen by its extension"""
+        extension = os.path.splitext(model_path)[1].lower()
+        backend_class = BACKENDS_BY_EXTENSION.get(extension)
+        if backend_class is None:
+            raise ValueError(f"Unsupported model file type: {os.path.basename(model_path)}")
+        
+        if backend_class is KerasBackend:
+            if self.runtime == 'slim':
+                raise ValueError(f"The slim runtime does not load Keras models ({os.path.basename(model_path)})")
+            return KerasBackend(inference_mode=self.inference_mode)
+        if backend_class is TFLiteBackend:
+            return TFLiteBackend(
+                pool_size=self.interpreter_pool_size,
+                num_threads=self.interpreter_num_threads,
+                wait_timeout=self.pool_wait_timeout,
+                runtime=self.runtime,
+                use_mmap=self.tflite_use_mmap
+            )
+        return OnnxBackend(num_threads=self.onnx_num_threads)
+    
+    def warmup(self, batch_sizes=None):
+        """
+        Run dummy inferences so tracing, XLA compilation and tensor allocation
+        happen before real traffic arrives
+        
+        Args:
+            batch_sizes: Batch sizes to warm up (defaults to warmup_batch_sizes)
+            
+        Returns:
+            Dictionary mapping batch size to warmup time in milliseconds
+        """
+        if batch_sizes is None:
+            batch_sizes = self.warmup_batch_sizes
+        
+        input_shape = self.get_input_shape()
+        
+        for batch_size in batch_sizes:
+            dummy_batch = np.zeros((batch_size,) + input_shape, dtype=np.float32)
+            started = time.perf_counter()
+            if self.backend is not None:
+                self.backend.warmup(dummy_batch)
+            else:
+                self._predict_batch_main(dummy_batch)
+            self.warmup_times[batch_size] = (time.perf_counter() - started) * 1000.0
+            print(f"Warmup batch size {batch_size}: {self.warmup_times[batch_size]:.1f} ms")
+        
+        return dict(self.warmup_times)
+    
+    def get_input_shape(self):
+        """Get the model input shape without the batch dimension, e.g. (224, 224, 3)"""
+        if self.model_server is not None:
+            return self._model_server_input_shape
+        if self.backend is not None:
+            return self.backend.get_input_shape()
+        return None
     
     def predict(self, img_array):
         """
         Make prediction using the model
         
         Args:
-            img_array: Preprocessed image array
+            img_array: Preprocessed image array of shape (1, H, W, C) or
+                (H, W, C); uint8 pixels are accepted as well
             
         Returns:
             Array of prediction probabilities
         """
-        if self.model is not None:
-            # Using Keras model
-            predictions = self.model.predict(img_array)
-            return predictions[0]
-        elif self.interpreter is not None:
-            # Using TFLite interpreter
-            self.interpreter.set_tensor(self.input_details[0]['index'], img_array)
-            self.interpreter.invoke()
-            output_data = self.interpreter.get_tensor(self.output_details[0]['index'])
-            return output_data[0]
+        if self.fast_loader is None and self.model_server is None and self.backend is not None:
+            # Single image straight into the backend's input buffer
+            return self.backend.predict_single(img_array)[0]
+        return self.predict_batch(img_array.reshape((1,) + img_array.shape[-3:]))[0]
+    
+    def predict_batch(self, img_batch):
+        """
+        Make predictions for a batch of images in a single forward pass
+        
+        With a cascade configured, the fast model scores the whole batch and
+        only the images it is unsure about are run through the main model.
+        
+        Args:
+            img_batch: Preprocessed image batch of shape (N, H, W, C)
+            
+        Returns:
+            Array of prediction probabilities with shape (N, num_classes)
+        """
+        if self.fast_loader is not None:
+            return self._predict_batch_cascade(img_batch)
+        return self._predict_batch_main(img_batch)
+    
+    def _predict_batch_cascade(self, img_batch):
+        """Score with the fast model and escalate uncertain images to the main model"""
+        started = time.perf_counter()
+        fast_predictions = self.fast_loader.predict_batch(img_batch)[:, self._cascade_class_order]
+        fast_time = time.perf_counter() - started
+        
+        top2 = np.sort(fast_predictions, axis=1)[:, -2:]
+        escalate = np.flatnonzero(
+            (top2[:, 1] < self.cascade_confidence_threshold)
+            | (top2[:, 1] - top2[:, 0] < self.cascade_margin_threshold)
+        )
+        
+        predictions = fast_predictions
+        primary_time = 0.0
+        if len(escalate):
+            started = time.perf_counter()
+            primary_predictions = self._predict_batch_main(img_batch[escalate])
+            primary_time = time.perf_counter() - started
+            predictions = fast_predictions.astype(primary_predictions.dtype, copy=True)
+            predictions[escalate] = primary_predictions
+        
+        with self._cascade_lock:
+            stats = self._cascade_stats
+            previous_images = stats['images']
+            stats['images'] += len(img_batch)
+            stats['escalated'] += len(escalate)
+            stats['fast_batches'] += 1
+            stats['fast_time'] += fast_time
+            if len(escalate):
+                stats['primary_batches'] += 1
+                stats['primary_time'] += primary_time
+            log_now = (self.cascade_log_interval
+                       and stats['images'] // self.cascade_log_interval > previous_images // self.cascade_log_interval)
+        
+        if log_now:
+            cascade = self.get_cascade_stats()
+            print(f"Cascade: {cascade['images']} images, escalation rate {cascade['escalation_rate']:.1%}, "
+                  f"fast {cascade['fast_mean_ms_per_image']:.2f} ms/image, "
+                  f"main {cascade['primary_mean_ms_per_image']:.2f} ms/image")
+        
+        return predictions
+    
+    def get_cascade_stats(self):
+        """
+        Get escalation rate and per-tier latency for the cascade
+        
+        Returns:
+            Dictionary of cascade statistics, or None if the cascade is disabled
+        """
+        if self.fast_loader is None:
+            return None
+        with self._cascade_lock:
+            stats = dict(self._cascade_stats)
+        return {
+            'fast_model_file': os.path.basename(self.fast_loader.model_path),
+            'confidence_threshold': self.cascade_confidence_threshold,
+            'margin_threshold': self.cascade_margin_threshold,
+            'images': stats['images'],
+            'escalated': stats['escalated'],
+            'escalation_rate': (stats['escalated'] / stats['images']) if stats['images'] else 0.0,
+            'fast_mean_batch_ms': (stats['fast_time'] / stats['fast_batches'] * 1000.0) if stats['fast_batches'] else 0.0,
+            'fast_mean_ms_per_image': (stats['fast_time'] / stats['images'] * 1000.0) if stats['images'] else 0.0,
+            'primary_mean_batch_ms': (stats['primary_time'] / stats['primary_batches'] * 1000.0) if stats['primary_batches'] else 0.0,
+            'primary_mean_ms_per_image': (stats['primary_time'] / stats['escalated'] * 1000.0) if stats['escalated'] else 0.0,
+        }
+    
+    def _predict_batch_main(self, img_batch):
+        """Run a batch through the main model only"""
+        if self.model_server is not None:
+            # Using the shared model server process
+            return self.model_server.predict_batch(img_batch, self._model_server_key)
+        elif self.backend is not None:
+            # Using the local Keras, TFLite or ONNX Runtime backend
+            return self.backend.predict_batch(img_batch)
         else:
             raise Exception("No model loaded. Call load_model() first")
     
+    def predict_tta(self, img_array, augmentations=TTA_AUGMENTATIONS):
+        """
+        Make a test-time augmented prediction in a single batched forward pass
+        
+        Args:
+            img_array: Preprocessed image array of shape (1, H, W, C)
+            augmentations: Augmentation names from TTA_AUGMENTATIONS
+            
+        Returns:
+            Array of prediction probabilities averaged over the augmentations
+        """
+        return self.predict_batch(build_tta_batch(img_array, augmentations)).mean(axis=0)
+    
+    def predict_tiles(self, tile_batch, aggregation='mean', batch_size=None):
+        """
+        Predict every tile of an image and combine them into one prediction
+        
+        Args:
+            tile_batch: Tile batch of shape (N, H, W, C) (see build_tile_batch)
+            aggregation: One of TILE_AGGREGATIONS: 'mean' averages the tile
+                probabilities, 'max' keeps each class's strongest tile
+                (renormalized), 'vote' counts tile top-1 classes with the mean
+                breaking ties
+            batch_size: Maximum tiles per forward pass (None runs all at once)
+            
+        Returns:
+            Tuple of (aggregated probabilities, per-tile probabilities of shape (N, num_classes))
+        """
+        if aggregation not in self.TILE_AGGREGATIONS:
+            raise ValueError(f"aggregation must be one of {self.TILE_AGGREGATIONS}")
+        
+        step = int(batch_size) if batch_size else len(tile_batch)
+        tile_predictions = np.concatenate([
+            self.predict_batch(tile_batch[start:start + step])
+            for start in range(0, len(tile_batch), step)
+        ])
+        
+        if aggregation == 'max':
+            probabilities = tile_predictions.max(axis=0)
+            probabilities = probabilities / probabilities.sum()
+        elif aggregation == 'vote':
+            votes = np.bincount(np.argmax(tile_predictions, axis=1), minlength=tile_predictions.shape[1])
+            probabilities = (votes + tile_predictions.mean(axis=0)) / (len(tile_predictions) + 1)
+        else:
+            probabilities = tile_predictions.mean(axis=0)
+        return probabilities, tile_predictions
+    
+    def unload(self):
+        """Release the loaded model so its memory can be reclaimed"""
+        if self.backend is not None:
+            self.backend.unload()
+            self.backend = None
+        self.model_server = None
+        if self.fast_loader is not None:
+            self.fast_loader.unload()
+            self.fast_loader = None
+    
+    def is_loaded(self):
+        """Check whether a local backend or the model server is ready"""
+        return self.backend is not None or self.model_server is not None
+    
+    def get_stats(self):
+        """
+        Get runtime statistics for the loaded model
+        
+        Returns:
+            Dictionary describing the active runtime and its pool usage
+        """
+        stats = self._get_runtime_stats()
+        if self.fast_loader is not None:
+            stats['cascade'] = self.get_cascade_stats()
+        elif self.cascade_error:
+            stats['cascade'] = {'error': self.cascade_error}
+        return stats
+    
+    def _get_runtime_stats(self):
+        model_file = os.path.basename(self.model_path) if self.model_path else None
+        if self.model_server is not None:
+            return {
+                'runtime': 'model_server',
+                'model_file': model_file,
+                'warmup_ms': self.warmup_times,
+                'client': self.model_server.get_stats()
+            }
+        if self.backend is not None:
+            return {
+                **self.backend.describe(),
+                'model_file': model_file,
+                'warmup_ms': self.warmup_times
+            }
+        return {'runtime': None}
+    
     def get_prediction_label(self, predictions):
         """
         Get the predicted class from prediction probabilities
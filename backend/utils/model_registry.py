@@ -0,0 +1,265 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+
+class ModelVersionError(Exception):
+    """Raised when a requested model version cannot serve traffic"""
+
+
+class ModelVersion:
+    """A loaded model version together with its serving state"""
+
+    # Lifecycle: loading -> ready -> (active) -> draining -> retired
+    #                   \-> failed
+    def __init__(self, version: str, loader, model_path: Optional[str] = None, generation: int = 0):
+        self.version = version
+        self.loader = loader
+        self.model_path = model_path
+        self.generation = generation
+        self.scheduler = None
+        self.state = 'loading'
+        self.error: Optional[str] = None
+        self.in_flight = 0
+        self.requests_served = 0
+        self.created_at = time.time()
+        self.ready_at: Optional[float] = None
+
+    @property
+    def cache_key(self) -> str:
+        """
+        Name of this load of the version for result caches
+
+        A version reloaded under the same name (possibly from another model
+        file) gets a new generation, so results of the old load never match.
+        """
+        return f"{self.version}@{self.generation}"
+
+    def predict(self, img_array):
+        """Predict a single image, going through the batch scheduler if present"""
+        if self.scheduler is not None:
+            return self.scheduler.submit(img_array)
+        return self.loader.predict(img_array)
+
+    def predict_batch(self, img_batch):
+        """Predict a batch of images in one forward pass"""
+        return self.loader.predict_batch(img_batch)
+
+    def describe(self) -> Dict[str, Any]:
+        """Get a JSON-serializable summary of this version"""
+        summary = {
+            'version': self.version,
+            'state': self.state,
+            'model_path': self.model_path,
+            'generation': self.generation,
+            'in_flight': self.in_flight,
+            'requests_served': self.requests_served,
+            'created_at': self.created_at,
+            'ready_at': self.ready_at,
+        }
+        if self.error:
+            summary['error'] = self.error
+        if self.loader is not None and self.state != 'retired':
+            summary['model'] = self.loader.get_stats()
+        if self.scheduler is not None:
+            summary['batching'] = self.scheduler.get_stats()
+        return summary
+
+
+class ModelRegistry:
+    """
+    Registry of versioned models with zero-downtime hot swapping
+
+    New versions are loaded and warmed up in the background. Once ready they
+    can be activated, which atomically switches default traffic to them; the
+    previously active version then drains its in-flight requests before its
+    memory is released. Requests may also pin any ready version explicitly.
+    """
+
+    def __init__(self, loader_factory: Callable[..., Any],
+                 scheduler_factory: Optional[Callable[[Any], Any]] = None,
+                 drain_timeout: float = 30.0):
+        """
+        Initialize the model registry
+
+        Args:
+            loader_factory: Callable returning a new ModelLoader; keyword
+                arguments (e.g. class_mapping_file) are passed through
+            scheduler_factory: Optional callable wrapping a loader in a BatchScheduler
+            drain_timeout: Seconds to wait for in-flight requests before retiring a version
+        """
+        self.loader_factory = loader_factory
+        self.scheduler_factory = scheduler_factory
+        self.drain_timeout = drain_timeout
+
+        self._versions: Dict[str, ModelVersion] = {}
+        self._active_version: Optional[str] = None
+        self._generation = 0
+        self._lock = threading.Condition()
+
+    @property
+    def active_version(self) -> Optional[str]:
+        """Name of the version serving unpinned requests"""
+        return self._active_version
+
+    def load_version(self, version: str, model_path: Optional[str] = None, activate: bool = True,
+                     wait: bool = False, **loader_kwargs) -> ModelVersion:
+        """
+        Load and warm up a model version
+
+        Args:
+            version: Version name, e.g. 'efficientnet-v2'
+            model_path: Model file passed to ModelLoader.load_model (None uses its default)
+            activate: Switch traffic to this version once it is ready
+            wait: Block until loading finishes instead of loading in the background
+            **loader_kwargs: Extra keyword arguments for the loader factory
+
+        Returns:
+            The ModelVersion entry, in 'loading' state unless wait=True
+        """
+        with self._lock:
+            existing = self._versions.get(version)
+            if existing is not None and existing.state in ('loading', 'ready'):
+                raise ModelVersionError(f"Model version '{version}' is already {existing.state}")
+            self._generation += 1
+            entry = ModelVersion(version, None, model_path, self._generation)
+            self._versions[version] = entry
+
+        if wait:
+            self._load(entry, activate, loader_kwargs)
+        else:
+            threading.Thread(
+                target=self._load, args=(entry, activate, loader_kwargs),
+                name=f'model-load-{version}', daemon=True
+            ).start()
+        return entry
+
+    def _load(self, entry: ModelVersion, activate: bool, loader_kwargs: Dict[str, Any]) -> None:
+        try:
+            loader = self.loader_factory(**loader_kwargs)
+            if not loader.load_model(entry.model_path):
+                raise RuntimeError("Model file could not be loaded")
+            if loader.warmup_error:
+                raise RuntimeError(f"Warmup inference failed: {loader.warmup_error}")
+        except Exception as e:
+            with self._lock:
+                entry.state = 'failed'
+                entry.error = str(e)
+            print(f"Failed to load model version '{entry.version}': {e}")
+            return
+
+        with self._lock:
+            entry.loader = loader
+            if self.scheduler_factory is not None:
+                entry.scheduler = self.scheduler_factory(loader)
+            entry.state = 'ready'
+            entry.ready_at = time.time()
+        print(f"Model version '{entry.version}' is ready")
+
+        if activate:
+            self.activate(entry.version)
+
+    def activate(self, version: str, retire_previous: bool = True) -> None:
+        """
+        Atomically switch unpinned traffic to a ready version
+
+        Args:
+            version: Version to activate
+            retire_previous: Drain and release the previously active version
+        """
+        with self._lock:
+            entry = self._versions.get(version)
+            if entry is None or entry.state != 'ready':
+                raise ModelVersionError(f"Model version '{version}' is not ready")
+            previous = self._active_version
+            self._active_version = version
+        print(f"Activated model version '{version}'")
+
+        if retire_previous and previous is not None and previous != version:
+            self.retire(previous)
+
+    def retire(self, version: str) -> None:
+        """
+        Stop routing requests to a version and release it once drained
+
+        Args:
+            version: Version to retire (must not be the active version)
+        """
+        with self._lock:
+            entry = self._versions.get(version)
+            if entry is None or entry.state != 'ready':
+                return
+            if version == self._active_version:
+                raise ModelVersionError("Cannot retire the active model version")
+            entry.state = 'draining'
+
+        threading.Thread(
+            target=self._drain, args=(entry,), name=f'model-drain-{version}', daemon=True
+        ).start()
+
+    def _drain(self, entry: ModelVersion) -> None:
+        deadline = time.monotonic() + self.drain_timeout
+        with self._lock:
+            while entry.in_flight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"Drain timeout for model version '{entry.version}' "
+                          f"with {entry.in_flight} request(s) still in flight")
+                    break
+                self._lock.wait(remaining)
+            entry.state = 'retired'
+            scheduler, loader = entry.scheduler, entry.loader
+            entry.scheduler = None
+
+        if scheduler is not None:
+            scheduler.stop()
+        if loader is not None:
+            loader.unload()
+        print(f"Retired model version '{entry.version}'")
+
+    @contextmanager
+    def acquire(self, version: Optional[str] = None):
+        """
+        Borrow a model version for the duration of a request
+
+        Args:
+            version: Pinned version, or None for the active version
+
+        Yields:
+            ModelVersion that stays loaded until the with-block exits
+        """
+        with self._lock:
+            name = version or self._active_version
+            entry = self._versions.get(name) if name else None
+            if entry is None:
+                raise ModelVersionError(f"Unknown model version '{name}'" if name else "No active model version")
+            if entry.state != 'ready':
+                raise ModelVersionError(f"Model version '{name}' is {entry.state}")
+            entry.in_flight += 1
+
+        try:
+            yield entry
+        finally:
+            with self._lock:
+                entry.in_flight -= 1
+                entry.requests_served += 1
+                self._lock.notify_all()
+
+    def get_version(self, version: Optional[str] = None) -> Optional[ModelVersion]:
+        """Get a version entry (the active one by default)"""
+        with self._lock:
+            return self._versions.get(version or self._active_version)
+
+    def describe(self) -> Dict[str, Any]:
+        """
+        Get a summary of all registered versions
+
+        Returns:
+            Dictionary with the active version name and per-version details
+        """
+        with self._lock:
+            return {
+                'active_version': self._active_version,
+                'versions': [entry.describe() for entry in self._versions.values()]
+            }
@@ -0,0 +1,257 @@
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+# Protocol: every message is a small pickled header sent with Connection.send,
+# optionally followed by a raw array payload sent with Connection.send_bytes so
+# image batches and probabilities are never pickled.
+
+
+def _send_array(conn, header: Dict[str, Any], array: np.ndarray) -> None:
+    array = np.ascontiguousarray(array)
+    conn.send({**header, 'shape': array.shape, 'dtype': array.dtype.str})
+    # Flat byte view: send_bytes measures the buffer with len(), which is only
+    # the first dimension for multi-dimensional uint8 arrays
+    conn.send_bytes(memoryview(array).cast('B'))
+
+
+def _recv_array(conn, header: Dict[str, Any]) -> np.ndarray:
+    return np.frombuffer(conn.recv_bytes(), dtype=np.dtype(header['dtype'])).reshape(header['shape'])
+
+
+class ModelServer:
+    """
+    Sidecar inference process that owns the models for all API workers
+
+    API workers connect over a Unix domain socket and send preprocessed
+    batches; the server runs them through its own ModelLoader instances, so
+    TensorFlow and the model weights are loaded once per node instead of once
+    per worker.
+    """
+
+    def __init__(self, loader_factory: Callable[..., Any], address: str, authkey: bytes):
+        """
+        Initialize the model server
+
+        Args:
+            loader_factory: Callable returning a new ModelLoader; receives
+                class_mapping_file as a keyword argument
+            address: Unix domain socket path to listen on
+            authkey: Shared secret clients must present (required)
+
+        Raises:
+            ValueError: If authkey is empty
+        """
+        if not authkey:
+            raise ValueError("The model server requires an authkey")
+        self.loader_factory = loader_factory
+        self.address = address
+        self.authkey = authkey
+        self._loaders: Dict[str, Any] = {}
+        self._load_lock = threading.Lock()
+        self._listener = None
+
+    def get_loader(self, model_path: Optional[str] = None, class_mapping_file: str = 'class_mapping.txt'):
+        """
+        Get a loaded model, loading it on first use
+
+        Args:
+            model_path: Model file passed to ModelLoader.load_model (None uses its default)
+            class_mapping_file: Class mapping file for this model
+
+        Returns:
+            Tuple of (model key, loaded ModelLoader)
+        """
+        key = f"{model_path or ''}|{class_mapping_file}"
+        with self._load_lock:
+            loader = self._loaders.get(key)
+            if loader is None:
+                loader = self.loader_factory(class_mapping_file=class_mapping_file)
+                if not loader.load_model(model_path):
+                    raise RuntimeError(f"Could not load model '{model_path or 'default'}'")
+                self._loaders[key] = loader
+        return key, loader
+
+    def serve_forever(self) -> None:
+        """Accept client connections until the process is stopped"""
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        # Bind under a restrictive umask so the socket is created owner-only
+        # (0600) and other users can never connect, not even briefly
+        previous_umask = os.umask(0o177)
+        try:
+            self._listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        finally:
+            os.umask(previous_umask)
+        print(f"Model server listening on {self.address}")
+
+        try:
+            while True:
+                try:
+                    conn = self._listener.accept()
+                except Exception as e:
+                    # Failed handshakes (e.g. wrong authkey) must not stop the server
+                    print(f"Rejected model server connection: {e}")
+                    continue
+                threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+        finally:
+            self._listener.close()
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+
+    def _handle_connection(self, conn) -> None:
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                try:
+                    self._handle_request(conn, request)
+                except Exception as e:
+                    conn.send({'ok': False, 'error': str(e)})
+
+    def _handle_request(self, conn, request: Dict[str, Any]) -> None:
+        op = request.get('op')
+        if op == 'predict':
+            img_batch = _recv_array(conn, request)
+            loader = self._loaders.get(request['model'])
+            if loader is None:
+                raise RuntimeError(f"Model '{request['model']}' is not loaded on the model server")
+            _send_array(conn, {'ok': True}, loader.predict_batch(img_batch).astype(np.float32, copy=False))
+        elif op == 'load':
+            key, loader = self.get_loader(request.get('model_path'), request.get('class_mapping_file', 'class_mapping.txt'))
+            conn.send({
+                'ok': True,
+                'model': key,
+                'model_path': loader.model_path,
+                'input_shape': loader.get_input_shape(),
+                'class_mapping': loader.class_mapping
+            })
+        elif op == 'stats':
+            conn.send({'ok': True, 'models': {key: loader.get_stats() for key, loader in self._loaders.items()}})
+        else:
+            raise ValueError(f"Unknown model server operation: {op}")
+
+
+class ModelServerError(Exception):
+    """Raised when the model server reports a failure"""
+
+
+class ModelServerClient:
+    """Client used by API workers to run inference on a shared ModelServer"""
+
+    def __init__(self, address: str, authkey: bytes, pool_size: int = 2):
+        """
+        Initialize the client
+
+        Args:
+            address: Unix domain socket path of the model server
+            authkey: Shared secret configured on the server (required)
+            pool_size: Maximum number of concurrent connections
+
+        Raises:
+            ValueError: If authkey is empty
+        """
+        if not authkey:
+            raise ValueError("MODEL_SERVER_AUTHKEY must be set to use the model server")
+        self.address = address
+        self.authkey = authkey
+        self.pool_size = pool_size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.Semaphore(pool_size)
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._total_round_trip = 0.0
+
+    def _call(self, header: Dict[str, Any], array: Optional[np.ndarray] = None):
+        with self._slots:
+            for attempt in range(2):
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+
+                try:
+                    if array is not None:
+                        _send_array(conn, header, array)
+                    else:
+                        conn.send(header)
+                    response = conn.recv()
+                    payload = _recv_array(conn, response) if response.get('ok') and 'shape' in response else None
+                except (EOFError, OSError):
+                    # The server restarted or dropped the connection; retry once on a fresh one
+                    conn.close()
+                    if attempt == 1:
+                        raise
+                    continue
+
+                self._idle.put(conn)
+                if not response.get('ok'):
+                    raise ModelServerError(response.get('error', 'Unknown model server error'))
+                return response, payload
+
+    def load(self, model_path: Optional[str] = None, class_mapping_file: str = 'class_mapping.txt') -> Dict[str, Any]:
+        """
+        Ask the server to load a model (no-op if already loaded)
+
+        Returns:
+            Dictionary with the model key, input shape and class mapping
+        """
+        response, _ = self._call({'op': 'load', 'model_path': model_path, 'class_mapping_file': class_mapping_file})
+        return response
+
+    def predict_batch(self, img_batch: np.ndarray, model: str) -> np.ndarray:
+        """
+        Run a preprocessed batch on the server
+
+        Args:
+            img_batch: Preprocessed image batch of shape (N, H, W, C)
+            model: Model key returned by load()
+
+        Returns:
+            Array of prediction probabilities with shape (N, num_classes)
+        """
+        started = time.perf_counter()
+        try:
+            # uint8 pixels are sent as they are, a quarter of the float32 size
+            if img_batch.dtype != np.uint8:
+                img_batch = img_batch.astype(np.float32, copy=False)
+            _, predictions = self._call({'op': 'predict', 'model': model}, img_batch)
+        except Exception:
+            with self._stats_lock:
+                self._errors += 1
+            raise
+        with self._stats_lock:
+            self._requests += 1
+            self._total_round_trip += time.perf_counter() - started
+        return predictions
+
+    def server_stats(self) -> Dict[str, Any]:
+        """Get model statistics from the server"""
+        response, _ = self._call({'op': 'stats'})
+        return response['models']
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get client-side statistics
+
+        Returns:
+            Dictionary with request counts and mean round-trip time
+        """
+        with self._stats_lock:
+            return {
+                'address': self.address,
+                'pool_size': self.pool_size,
+                'requests': self._requests,
+                'errors': self._errors,
+                'mean_round_trip_ms': (self._total_round_trip / self._requests * 1000.0) if self._requests else 0.0,
+            }
@@ -0,0 +1,111 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# Number of set bits for every byte value, used to popcount XOR-ed hashes
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class NearDuplicateIndex:
+    """
+    Bounded index of recent predictions keyed by perceptual hash
+
+    Near-identical photos of the same leaf (re-compressed, slightly cropped)
+    have perceptual hashes within a small Hamming distance. A lookup scans all
+    recent hashes in one vectorized pass and returns the closest prediction
+    made by the same model version if it is within max_distance.
+
+    Entries live in a fixed-size ring buffer, so memory stays bounded and the
+    oldest predictions are overwritten first.
+    """
+
+    def __init__(self, max_entries: int = 512, max_distance: int = 8, ttl_seconds: float = 600.0):
+        """
+        Initialize the index
+
+        Args:
+            max_entries: Number of recent predictions kept
+            max_distance: Largest Hamming distance (out of 64 bits) treated as a duplicate
+            ttl_seconds: Seconds a prediction may be reused for
+        """
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+
+        self._hashes = np.zeros(max_entries, dtype=np.uint64)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._versions = np.empty(max_entries, dtype=object)
+        self._values = [None] * max_entries
+        self._next = 0
+        self._lock = threading.Lock()
+
+        self._lookups = 0
+        self._hits = 0
+        self._total_hit_distance = 0
+
+    def lookup(self, image_hash: int, model_version: str) -> Optional[Tuple[Any, int]]:
+        """
+        Find the closest recent prediction for a perceptual hash
+
+        Args:
+            image_hash: 64-bit perceptual hash from perceptual_hash()
+            model_version: Version of the model serving the request
+
+        Returns:
+            Tuple of (prediction, Hamming distance), or None if there is no near duplicate
+        """
+        with self._lock:
+            self._lookups += 1
+            valid = (self._versions == model_version) & (self._expires_at >= time.monotonic())
+            if not valid.any():
+                return None
+
+            candidates = np.flatnonzero(valid)
+            xor = self._hashes[candidates] ^ np.uint64(image_hash)
+            distances = _POPCOUNT_TABLE[xor.view(np.uint8)].reshape(len(candidates), 8).sum(axis=1)
+            best = int(np.argmin(distances))
+            distance = int(distances[best])
+            if distance > self.max_distance:
+                return None
+
+            self._hits += 1
+            self._total_hit_distance += distance
+            return self._values[candidates[best]], distance
+
+    def add(self, image_hash: int, model_version: str, value: Any) -> None:
+        """
+        Record a prediction, overwriting the oldest entry when full
+
+        Args:
+            image_hash: 64-bit perceptual hash from perceptual_hash()
+            model_version: Version of the model that made the prediction
+            value: Prediction to return for near duplicates
+        """
+        with self._lock:
+            slot = self._next
+            self._hashes[slot] = image_hash
+            self._expires_at[slot] = time.monotonic() + self.ttl_seconds
+            self._versions[slot] = model_version
+            self._values[slot] = value
+            self._next = (slot + 1) % self.max_entries
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get index statistics
+
+        Returns:
+            Dictionary with lookups and the number of inferences saved
+        """
+        with self._lock:
+            return {
+                'entries': int(np.count_nonzero(self._versions != None)),  # noqa: E711
+                'max_entries': self.max_entries,
+                'max_distance': self.max_distance,
+                'ttl_seconds': self.ttl_seconds,
+                'lookups': self._lookups,
+                'inferences_saved': self._hits,
+                'hit_rate': (self._hits / self._lookups) if self._lookups else 0.0,
+                'mean_hit_distance': (self._total_hit_distance / self._hits) if self._hits else 0.0,
+            }
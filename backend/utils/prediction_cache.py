@@ -0,0 +1,157 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _InFlight:
+    """A computation that concurrent identical requests wait on"""
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PredictionCache:
+    """
+    Content-addressed prediction cache with single-flight coalescing
+
+    Entries are keyed by a hash of the decoded image bytes plus the model
+    version, bounded by an LRU size limit and expired after a TTL. Concurrent
+    requests for the same key share one inference instead of each running it.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0):
+        """
+        Initialize the prediction cache
+
+        Args:
+            max_entries: Maximum number of cached predictions (LRU eviction)
+            ttl_seconds: Seconds before a cached prediction expires
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @staticmethod
+    def make_key(image_bytes: bytes, model_version: str) -> str:
+        """
+        Build a cache key from the decoded image bytes and the model version
+
+        Args:
+            image_bytes: Decoded (not base64) image file bytes
+            model_version: Version of the model that produces the prediction
+
+        Returns:
+            Cache key string
+        """
+        return f"{model_version}:{hashlib.sha256(image_bytes).hexdigest()}"
+
+    def _lookup(self, key: str):
+        """Return a fresh cached value or None; the caller must hold the lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self._expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, value: Any) -> None:
+        """Insert a value, evicting the least recently used entries; the caller must hold the lock"""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any],
+                       should_store: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, str]:
+        """
+        Get a cached value, or compute it exactly once across concurrent callers
+
+        Args:
+            key: Cache key from make_key()
+            compute: Callable producing the value on a miss
+            should_store: Optional predicate; computed values it rejects are
+                returned (also to coalesced callers) but not cached
+
+        Returns:
+            Tuple of (value, status) where status is 'hit', 'miss' or 'coalesced'
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self._hits += 1
+                return entry[1], 'hit'
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                self._coalesced += 1
+                leader = False
+            else:
+                self._misses += 1
+                in_flight = self._in_flight[key] = _InFlight()
+                leader = True
+
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.value, 'coalesced'
+
+        try:
+            in_flight.value = compute()
+        except Exception as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if in_flight.error is None and (should_store is None or should_store(in_flight.value)):
+                    self._store(key, in_flight.value)
+                del self._in_flight[key]
+            in_flight.done.set()
+
+        return in_flight.value, 'miss'
+
+    def clear(self) -> None:
+        """Remove all cached predictions"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with size and hit/miss/eviction counters
+        """
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'in_flight': len(self._in_flight),
+                'hits': self._hits,
+                'misses': self._misses,
+                'coalesced': self._coalesced,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'hit_rate': ((self._hits + self._coalesced) / lookups) if lookups else 0.0,
+            }
@@ -0,0 +1,43 @@
+import os
+from typing import Dict, Optional, Union
+
+# Fields of /proc/<pid>/smaps(_rollup), in kB
+_MEMORY_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def read_memory_usage(pid: Union[int, str] = 'self') -> Optional[Dict[str, float]]:
+    """
+    Read the memory usage of a process, split into shared and unique pages
+
+    With pre-forked workers, RSS counts the shared model weights in every
+    worker. USS (pages only this process maps) is what one more worker really
+    costs, and the sum of PSS over all processes is the node's total.
+
+    Args:
+        pid: Process id, or 'self' for the current process
+
+    Returns:
+        Dictionary with rss_mb, pss_mb, uss_mb and shared_mb, or None when
+        /proc is not available (non-Linux)
+    """
+    totals = dict.fromkeys(_MEMORY_FIELDS, 0)
+    # smaps_rollup (Linux 4.14+) is much cheaper to read than the full smaps
+    for file_name in ('smaps_rollup', 'smaps'):
+        try:
+            with open(os.path.join('/proc', str(pid), file_name)) as f:
+                for line in f:
+                    key, _, value = line.partition(':')
+                    if key in totals:
+                        totals[key] += int(value.split()[0])
+            break
+        except (OSError, ValueError):
+            continue
+    else:
+        return None
+
+    return {
+        'rss_mb': totals['Rss'] / 1024.0,
+        'pss_mb': totals['Pss'] / 1024.0,
+        'uss_mb': (totals['Private_Clean'] + totals['Private_Dirty']) / 1024.0,
+        'shared_mb': (totals['Shared_Clean'] + totals['Shared_Dirty']) / 1024.0,
+    }